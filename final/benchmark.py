@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""Measure how the cost of a simulation cycle scales with network size.
+
+This script builds networks of increasing size, runs each for a number of
+simulation cycles and prints the time taken per cycle and per device. If
+device lookups are constant time, the time per device stays roughly constant
+as the network grows. It can also time how long building a network of
+D-types takes, which should grow linearly with the number of devices, and
+how long scanning a definition file with that many distinct device names
+takes, which should also grow linearly if name lookups are constant time.
+The memory taken by each device of a network is measured with tracemalloc.
+
+The suite generates definition files of each topology in generate.py and
+reports the time to scan, parse and build them, the time per simulation
+cycle and the peak memory, optionally as JSON to track across versions.
+
+Usage
+-----
+Show help: benchmark.py -h
+Default sizes (100 to 100000 devices): benchmark.py
+Chosen sizes and cycles: benchmark.py -s 100,1000,10000 -c 5
+Event-driven engine: benchmark.py -e event
+NumPy vector engine: benchmark.py -e vector
+Generated Python code engine: benchmark.py -e compiled
+Build time of D-type shift registers: benchmark.py -b -s 1000,10000
+Scan time of 1000000 device names: benchmark.py -n -s 1000000
+Memory per device: benchmark.py -m -s 1000000
+Suite of every topology from 10 to 1000000 devices: benchmark.py -a
+Suite with JSON output: benchmark.py -a -t adder,random -s 10,1000 -j out.json
+"""
+import getopt
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from generate import (make_netlist, write_definition_file as write_netlist,
+                      build_netlist, topologies)
+
+
+def make_names(size):
+    """Return the names of build_network and its switch and gate IDs."""
+    names = Names()
+    no_of_switches = max(2, size // 10)
+    switch_ids = names.lookup(["SW" + str(i) for i in range(no_of_switches)])
+    gate_ids = names.lookup(["G" + str(i)
+                             for i in range(size - no_of_switches)])
+    return names, switch_ids, gate_ids
+
+
+def build_network(size, engine="levelized", compact=False):
+    """Return a network of size devices: switches driving 2-input NANDs.
+
+    One device in ten is a switch and every gate reads two of the switches,
+    so the network settles within a couple of iterations whatever its size.
+    If compact is True, the devices are stored in a compact device table.
+    """
+    names, switch_ids, gate_ids = make_names(size)
+    devices = Devices(names, compact=compact)
+    network = Network(names, devices, engine)
+
+    no_of_switches = len(switch_ids)
+    [I1_ID, I2_ID] = names.lookup(["I1", "I2"])
+
+    for number, switch_id in enumerate(switch_ids):
+        devices.make_device(switch_id, devices.SWITCH, number % 2)
+    for number, gate_id in enumerate(gate_ids):
+        devices.make_device(gate_id, devices.NAND, 2)
+        first_switch = switch_ids[number % no_of_switches]
+        second_switch = switch_ids[(7 * number + 1) % no_of_switches]
+        network.make_connection(first_switch, None, gate_id, I1_ID)
+        network.make_connection(second_switch, None, gate_id, I2_ID)
+
+    return names, devices, network
+
+
+def build_shift_register(names, devices, network, size):
+    """Make a shift register of size D-types driven by a clock and a switch.
+
+    The names of the devices are looked up first, so that only making the
+    devices and connections is timed. Return the time taken in seconds.
+    """
+    [CLOCK_ID, SWITCH_ID] = names.lookup(["CLK", "SW"])
+    d_type_ids = names.lookup(["D" + str(i) for i in range(size)])
+
+    start = time.perf_counter()
+    devices.make_device(CLOCK_ID, devices.CLOCK, 1)
+    devices.make_device(SWITCH_ID, devices.SWITCH, 0)
+    data_output = (SWITCH_ID, None)
+    for d_type_id in d_type_ids:
+        devices.make_device(d_type_id, devices.D_TYPE)
+        network.make_connection(CLOCK_ID, None, d_type_id, devices.CLK_ID)
+        network.make_connection(data_output[0], data_output[1], d_type_id,
+                                devices.DATA_ID)
+        network.make_connection(SWITCH_ID, None, d_type_id, devices.SET_ID)
+        network.make_connection(SWITCH_ID, None, d_type_id, devices.CLEAR_ID)
+        data_output = (d_type_id, devices.Q_ID)
+    devices.cold_startup()
+    return time.perf_counter() - start
+
+
+def run_build_benchmark(sizes):
+    """Return a list of (size, seconds to build) pairs for each size."""
+    results = []
+    for size in sizes:
+        names = Names()
+        devices = Devices(names)
+        network = Network(names, devices)
+        results.append((size, build_shift_register(names, devices, network,
+                                                   size)))
+    return results
+
+
+def write_definition_file(file, size):
+    """Write a definition file of size switches with distinct names."""
+    file.write("DEVICE:\n")
+    for number in range(size):
+        file.write("SWITCH SW%d = %d;\n" % (number, number % 2))
+    file.write("CONNECTION:\nMONITOR:\n")
+
+
+def time_scanning(path):
+    """Return the time taken in seconds to scan every symbol in path."""
+    names = Names()
+    start = time.perf_counter()
+    for symbol in Scanner(path, names).symbols():
+        pass
+    return time.perf_counter() - start
+
+
+def run_names_benchmark(sizes):
+    """Return a list of (size, seconds to scan) pairs for each size.
+
+    Each file declares size switches, so the scanner looks up and adds size
+    distinct names as well as the keywords and numbers.
+    """
+    results = []
+    for size in sizes:
+        with tempfile.NamedTemporaryFile("w", suffix=".txt",
+                                         delete=False) as file:
+            write_definition_file(file, size)
+        try:
+            results.append((size, time_scanning(file.name)))
+        finally:
+            os.remove(file.name)
+    return results
+
+
+def trace_memory(function, *args):
+    """Return the memory allocated by the function and still held."""
+    tracemalloc.start()
+    try:
+        result = function(*args)
+        memory, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return memory
+
+
+def run_memory_benchmark(sizes, compact=False):
+    """Return a list of (size, bytes per device, bytes per device without
+    names) for each size.
+
+    The memory allocated while the network of build_network is made is
+    traced, so the names, devices and connections are all counted. The
+    memory of the names alone is then subtracted to give the memory of the
+    devices and connections. If compact is True, the devices are stored in
+    a compact device table.
+    """
+    results = []
+    for size in sizes:
+        memory = trace_memory(build_network, size, "levelized", compact)
+        names_memory = trace_memory(make_names, size)
+        results.append((size, memory / size,
+                        (memory - names_memory) / size))
+    return results
+
+
+def time_cycles(network, cycles):
+    """Return the average wall time in seconds of one simulation cycle."""
+    start = time.perf_counter()
+    for _ in range(cycles):
+        network.execute_network()
+    return (time.perf_counter() - start) / cycles
+
+
+def run_benchmark(sizes, cycles, engine="levelized"):
+    """Return a list of (size, seconds per cycle) pairs for each size."""
+    results = []
+    for size in sizes:
+        names, devices, network = build_network(size, engine)
+        network.execute_network()  # let the network settle first
+        results.append((size, time_cycles(network, cycles)))
+    return results
+
+
+def make_network(engine="levelized"):
+    """Return new names, devices, network and monitors instances."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, engine)
+    monitors = Monitors(names, devices, network)
+    return names, devices, network, monitors
+
+
+def parse_file(path, engine="levelized"):
+    """Parse a definition file.
+
+    Return the network objects and the time taken in seconds, or raise
+    ValueError if the file has errors.
+    """
+    network_objects = make_network(engine)
+    names = network_objects[0]
+    start = time.perf_counter()
+    scanner = Scanner(path, names)
+    parser = Parser(*network_objects, scanner)
+    if not parser.parse_network():
+        raise ValueError("Expected a definition file without errors.")
+    return network_objects, time.perf_counter() - start
+
+
+def run_suite_entry(topology, size, cycles, engine="levelized"):
+    """Return a dictionary of the costs of a generated definition file.
+
+    The file is scanned, parsed and built directly from its netlist, each
+    from scratch, then simulated for cycles cycles after a first cycle that
+    compiles the network. The peak memory is traced in a separate parse and
+    cycle, since tracing slows everything down.
+    """
+    netlist = make_netlist(topology, size)
+    with tempfile.NamedTemporaryFile("w", suffix=".txt",
+                                     delete=False) as file:
+        write_netlist(netlist, file)
+    try:
+        scan_seconds = time_scanning(file.name)
+        (names, devices, network, monitors), parse_seconds = parse_file(
+            file.name, engine)
+
+        network.execute_network()
+        monitors.record_signals()
+        start = time.perf_counter()
+        for _ in range(cycles):
+            network.execute_network()
+            monitors.record_signals()
+        cycle_seconds = (time.perf_counter() - start) / max(cycles, 1)
+        del names, devices, network, monitors
+
+        network_objects = make_network(engine)
+        start = time.perf_counter()
+        build_netlist(netlist, *network_objects)
+        build_seconds = time.perf_counter() - start
+        del network_objects
+
+        tracemalloc.start()
+        try:
+            (names, devices, network, monitors), _ = parse_file(file.name,
+                                                                engine)
+            network.execute_network()
+            monitors.record_signals()
+            memory, peak_bytes = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    finally:
+        os.remove(file.name)
+
+    return {"topology": topology, "size": size,
+            "devices": len(netlist[0]),
+            "connections": len(netlist[1]),
+            "scan_seconds": scan_seconds,
+            "parse_seconds": parse_seconds,
+            "build_seconds": build_seconds,
+            "cycle_seconds": cycle_seconds,
+            "peak_bytes": peak_bytes}
+
+
+def run_suite(topology_names, sizes, cycles, engine="levelized"):
+    """Return a dictionary of the suite results for JSON output.
+
+    It holds the Python version, platform, engine and cycles used, and the
+    run_suite_entry results for every topology and size.
+    """
+    results = [run_suite_entry(topology, size, cycles, engine)
+               for topology in topology_names for size in sizes]
+    return {"python": platform.python_version(),
+            "platform": platform.platform(),
+            "engine": engine,
+            "cycles": cycles,
+            "results": results}
+
+
+def main(arg_list):
+    """Parse the command line options and print the benchmark results."""
+    usage_message = ("Usage:\n"
+                     "Show help: benchmark.py -h\n"
+                     "Run the benchmark: benchmark.py [-s sizes] [-c cycles] "
+                     "[-e engine]\n"
+                     "Time building D-types: benchmark.py -b [-s sizes]\n"
+                     "Time scanning names: benchmark.py -n [-s sizes]\n"
+                     "Measure memory per device: benchmark.py -m [-s sizes]\n"
+                     "Run the suite: benchmark.py -a [-t topologies] "
+                     "[-s sizes] [-c cycles] [-e engine] [-j json path]")
+    try:
+        options, arguments = getopt.getopt(arg_list, "hbnmas:c:e:t:j:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit()
+
+    sizes = None
+    cycles = 3
+    engine = "levelized"
+    build = False
+    scan = False
+    memory = False
+    suite = False
+    topology_names = list(topologies)
+    json_path = None
+    for option, value in options:
+        if option == "-h":
+            print(usage_message)
+            sys.exit()
+        elif option == "-b":
+            build = True
+        elif option == "-n":
+            scan = True
+        elif option == "-m":
+            memory = True
+        elif option == "-a":
+            suite = True
+        elif option == "-t":
+            topology_names = value.split(",")
+        elif option == "-j":
+            json_path = value
+        elif option == "-s":
+            sizes = [int(size) for size in value.split(",")]
+        elif option == "-c":
+            cycles = int(value)
+        elif option == "-e":
+            engine = value
+
+    if engine not in Network.engine_types:
+        print("Error: unknown engine", engine, "\n")
+        print(usage_message)
+        sys.exit()
+
+    if sizes is None:
+        if suite:
+            sizes = [10, 100, 1000, 10000, 100000, 1000000]
+        else:
+            sizes = [100, 1000, 10000, 100000]
+
+    if build:
+        print("devices   ms/build   us/device")
+        for size, seconds in run_build_benchmark(sizes):
+            print("%7d %10.3f %11.3f" % (size, seconds * 1e3,
+                                         seconds * 1e6 / size))
+        return
+
+    if scan:
+        print("  names    ms/scan     us/name")
+        for size, seconds in run_names_benchmark(sizes):
+            print("%7d %10.3f %11.3f" % (size, seconds * 1e3,
+                                         seconds * 1e6 / size))
+        return
+
+    if suite:
+        print("topology  devices    scan ms   parse ms   build ms   "
+              "cycle ms    peak MB")
+        for topology in topology_names:
+            if topology not in topologies:
+                print("Error: unknown topology", topology)
+                return
+        suite_results = run_suite(topology_names, sizes, cycles, engine)
+        for result in suite_results["results"]:
+            print("%-8s %8d %10.3f %10.3f %10.3f %10.3f %10.3f" % (
+                result["topology"], result["devices"],
+                result["scan_seconds"] * 1e3, result["parse_seconds"] * 1e3,
+                result["build_seconds"] * 1e3, result["cycle_seconds"] * 1e3,
+                result["peak_bytes"] / 1e6))
+        if json_path is not None:
+            with open(json_path, "w") as file:
+                json.dump(suite_results, file, indent=2)
+        return
+
+    if memory:
+        print("devices    storage   bytes/device   without names")
+        for compact, storage in [(False, "objects"), (True, "compact")]:
+            for size, bytes_per_device, device_bytes in \
+                    run_memory_benchmark(sizes, compact):
+                print("%7d %10s %14.1f %15.1f" % (
+                    size, storage, bytes_per_device, device_bytes))
+        return
+
+    print("devices   ms/cycle   us/device")
+    for size, seconds in run_benchmark(sizes, cycles, engine):
+        print("%7d %10.3f %11.3f" % (size, seconds * 1e3,
+                                     seconds * 1e6 / size))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
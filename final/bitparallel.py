@@ -0,0 +1,521 @@
+"""Simulate many cold starts of a network at once.
+
+Used in the Logic Simulator project to look for start-up hazards. Every signal
+is stored as a pair of Python integers whose bits belong to independent
+simulation instances, so one pass over the network simulates as many cold
+starts as there are seeds.
+
+Classes
+-------
+BitParallelSimulator - simulates one cold start of the network per bit.
+"""
+
+
+class BitParallelSimulator:
+
+    """Simulate one cold start of the network per bit.
+
+    Instance number i is the run that devices.set_seed(seeds[i]) followed by
+    devices.cold_startup() would give. The devices are executed in the order
+    of network.Network.execute_network, so the traces of every instance are
+    identical to those of a single run of the network.
+
+    A signal is stored as two words: its level (the level it is at or heading
+    to) and whether it is still changing. LOW is (0, 0), HIGH is (1, 0),
+    RISING is (1, 1) and FALLING is (0, 1), so updating a signal towards the
+    target t gives the level t and the pending bit level ^ t, and the logic
+    gates become bitwise operations on the levels.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    seeds: list of the random seeds of the instances.
+
+    Public methods
+    --------------
+    cold_startup(self): Sets every instance to its cold start state.
+
+    execute_network(self): Executes all the devices in every instance for one
+                           simulation cycle.
+
+    record_signals(self): Records the current signals of all monitors.
+
+    run_network(self, cycles): Runs the network for the given number of
+                               cycles, recording the monitors.
+
+    get_signal(self, instance, device_id, output_id): Returns the signal of
+                                                      the given instance.
+
+    get_monitor_traces(self, instance): Returns the monitor traces of the
+                                        given instance.
+
+    get_divergence(self): Returns the first cycle and the instances that
+                          differ from the first instance for each monitor.
+
+    get_diverging_instances(self): Returns the instances whose traces differ
+                                   from the first instance.
+
+    get_unsteady_instances(self): Returns the instances that oscillated.
+
+    display_divergence(self): Displays the divergence summary in the text
+                              console.
+    """
+
+    def __init__(self, names, devices, network, monitors, seeds):
+        """Compile the network and cold start every instance."""
+        if not seeds:
+            raise ValueError("Expected at least one seed.")
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+        self.seeds = list(seeds)
+        self.no_of_instances = len(self.seeds)
+        self.mask = (1 << self.no_of_instances) - 1
+
+        # Signal codes indexed by [level bit][pending bit]
+        self.signal_codes = [[devices.LOW, devices.FALLING],
+                             [devices.HIGH, devices.RISING]]
+
+        # traces stores {(device_id, output_id): [(level, pending)]}
+        self.traces = {}
+        self.unsteady = 0  # instances that did not settle in some cycle
+        self.cycles_completed = 0
+
+        if network.schedule is None or \
+                network.schedule_revision != devices.revision:
+            network.compile_network()
+        self.connected = network.check_network()
+        self.compile_simulator()
+        self.cold_startup()
+
+    def compile_simulator(self):
+        """Build the lists of signal indices executed in each sweep."""
+        devices = self.devices
+        self.output_index = {}
+        for device in devices.devices_list:
+            for output_id in device.outputs:
+                self.output_index[(device.device_id, output_id)] = \
+                    len(self.output_index)
+        if not self.connected:
+            return
+
+        def output_of(device_ids):
+            return [self.output_index[(device_id, None)]
+                    for device_id in device_ids]
+
+        self.switch_devices = [
+            (devices.get_device(device_id), self.output_index[(device_id,
+                                                               None)])
+            for device_id in devices.find_devices(devices.SWITCH)]
+        self.d_types = []
+        for device_id in devices.find_devices(devices.D_TYPE):
+            device = devices.get_device(device_id)
+            self.d_types.append(
+                tuple(self.output_index[device.inputs[input_id]]
+                      for input_id in [devices.CLK_ID, devices.DATA_ID,
+                                       devices.SET_ID, devices.CLEAR_ID]) +
+                (self.output_index[(device_id, devices.Q_ID)],
+                 self.output_index[(device_id, devices.QBAR_ID)]))
+        self.clock_ids = devices.find_devices(devices.CLOCK)
+        self.siggen_ids = devices.find_devices(devices.SIGGEN)
+        self.rc_ids = devices.find_devices(devices.RC)
+        self.source_outputs = output_of(self.clock_ids + self.siggen_ids +
+                                        self.rc_ids)
+
+        # One (gates, loops) pair per level, with each gate stored as
+        # (output index, input indices, x, y)
+        self.levels = []
+        for gate_ids, loops in self.network.schedule:
+            self.levels.append((self.compile_gates(gate_ids),
+                                [self.compile_gates(loop) for loop in loops]))
+
+    def compile_gates(self, gate_ids):
+        """Return the gates as (output index, input indices, x, y) tuples."""
+        gates = []
+        for device_id in gate_ids:
+            device = self.devices.get_device(device_id)
+            x, y = self.network.gate_arguments[device_id]
+            gates.append((self.output_index[(device_id, None)],
+                          [self.output_index[connected_output]
+                           for connected_output in device.inputs.values()],
+                          x, y))
+        return gates
+
+    def get_device_state(self):
+        """Return the signals and the cold start state of the devices."""
+        state = []
+        for device in self.devices.devices_list:
+            state.append((dict(device.outputs),
+                          [getattr(device, attribute)
+                           for attribute in device.state_attributes]))
+        return state
+
+    def set_device_state(self, state):
+        """Restore the state returned by get_device_state."""
+        for device, (outputs, values) in zip(self.devices.devices_list,
+                                             state):
+            for attribute, value in zip(device.state_attributes, values):
+                setattr(device, attribute, value)
+            device.outputs.update(outputs)
+
+    def cold_startup(self):
+        """Set every instance to its cold start state.
+
+        Each instance is cold started through devices.cold_startup so that it
+        matches a single run with the same seed. The devices and their random
+        number generator are restored afterwards.
+        """
+        devices = self.devices
+        saved_random = (devices.random, devices.seed)
+        saved_device_state = self.get_device_state()
+
+        self.levels_word = [0] * len(self.output_index)
+        self.pending_word = [0] * len(self.output_index)
+        self.d_type_memory = [0] * len(self.d_types) if self.connected else []
+        # toggles stores {device_id: [mask of the instances whose signal
+        # changes in each cycle of its period]}
+        self.clock_toggles = {device_id: [0] * devices.get_device(
+            device_id).clock_half_period for device_id in self.clock_ids} \
+            if self.connected else {}
+        self.siggen_highs = {device_id: [0] * len(devices.get_device(
+            device_id).siggen_wave) for device_id in self.siggen_ids} \
+            if self.connected else {}
+        self.rc_falls = {}  # {cycle: [(output index, mask)]}
+
+        for instance, seed in enumerate(self.seeds):
+            bit = 1 << instance
+            devices.set_seed(seed)
+            devices.cold_startup()
+            for (device_id, output_id), index in self.output_index.items():
+                signal = devices.get_device(device_id).outputs[output_id]
+                if signal in [devices.HIGH, devices.RISING]:
+                    self.levels_word[index] |= bit
+                if signal in [devices.RISING, devices.FALLING]:
+                    self.pending_word[index] |= bit
+            if not self.connected:
+                continue
+            for number, device_id in enumerate(
+                    devices.find_devices(devices.D_TYPE)):
+                if devices.get_device(device_id).dtype_memory == devices.HIGH:
+                    self.d_type_memory[number] |= bit
+            for device_id in self.clock_ids:
+                device = devices.get_device(device_id)
+                period = device.clock_half_period
+                # The clock changes when its counter reaches the half period
+                self.clock_toggles[device_id][
+                    -device.clock_counter % period] |= bit
+            for device_id in self.siggen_ids:
+                device = devices.get_device(device_id)
+                length = len(device.siggen_wave)
+                for cycle in range(length):
+                    counter = (device.siggen_counter + cycle + 1) % length
+                    if device.siggen_wave[counter] == devices.HIGH:
+                        self.siggen_highs[device_id][cycle] |= bit
+            for device_id in self.rc_ids:
+                device = devices.get_device(device_id)
+                cycle = device.time_constant - device.rc_counter
+                if cycle >= 0:
+                    self.rc_falls.setdefault(cycle, []).append(
+                        (self.output_index[(device_id, None)], bit))
+
+        self.set_device_state(saved_device_state)
+        devices.random, devices.seed = saved_random
+        self.cycles_completed = 0
+        self.unsteady = 0
+        self.traces = {}
+
+    def update_signal(self, index, target, active=None):
+        """Update the signal at index towards the target levels.
+
+        Only the instances in the active mask are updated, if it is given.
+        Return the mask of the instances whose signal changed.
+        """
+        level = self.levels_word[index]
+        pending = self.pending_word[index]
+        new_pending = level ^ target
+        if active is not None:
+            target = (target & active) | (level & ~active)
+            new_pending = (new_pending & active) | (pending & ~active)
+        changed = (level ^ target) | (pending ^ new_pending)
+        if changed:
+            self.levels_word[index] = target
+            self.pending_word[index] = new_pending
+        return changed
+
+    def toggle_signal(self, index, toggles):
+        """Start a transition of the settled signals of the given instances,
+        as when a clock or siggen changes."""
+        toggles &= ~self.pending_word[index]
+        self.levels_word[index] ^= toggles
+        self.pending_word[index] |= toggles
+
+    def update_sources(self):
+        """Set clock, siggen and RC signals to RISING or FALLING if it is
+        time to do so."""
+        cycle = self.cycles_completed
+        for device_id in self.clock_ids:
+            toggles = self.clock_toggles[device_id]
+            if cycle:  # the counters start below the half period
+                self.toggle_signal(self.output_index[(device_id, None)],
+                                   toggles[cycle % len(toggles)])
+        for device_id in self.siggen_ids:
+            index = self.output_index[(device_id, None)]
+            highs = self.siggen_highs[device_id]
+            self.toggle_signal(index, self.levels_word[index] ^
+                               highs[cycle % len(highs)])
+        for index, falls in self.rc_falls.get(cycle, []):
+            self.levels_word[index] &= ~falls
+            self.pending_word[index] |= falls
+
+    def execute_gates(self, gates, active=None):
+        """Execute the gates once, in the active instances if a mask is
+        given. Return the mask of changed instances.
+
+        As in network.Network.execute_gate, a changing input is read as the
+        level it is heading to only with edge_levels. Otherwise an AND or
+        NAND gate reads it as LOW, an OR or NOR gate as HIGH, and an XOR gate
+        compares both words.
+        """
+        levels_word = self.levels_word
+        pending_word = self.pending_word
+        edge_levels = self.network.edge_levels
+        mask = self.mask
+        changed = 0
+        for output, inputs, x, y in gates:
+            if x is None:  # XOR gate
+                target = levels_word[inputs[0]] ^ levels_word[inputs[1]]
+                if not edge_levels:
+                    target |= pending_word[inputs[0]] ^ pending_word[inputs[1]]
+            else:
+                if x == self.devices.HIGH:
+                    all_x = mask
+                    for index in inputs:
+                        all_x &= levels_word[index]
+                        if not edge_levels:
+                            all_x &= ~pending_word[index]
+                else:
+                    any_high = 0
+                    for index in inputs:
+                        any_high |= levels_word[index]
+                        if not edge_levels:
+                            any_high |= pending_word[index]
+                    all_x = mask & ~any_high
+                target = all_x if y == self.devices.HIGH else mask & ~all_x
+            changed |= self.update_signal(output, target, active)
+        return changed
+
+    def find_repeats(self, state, states):
+        """Return the mask of the instances in which the state, a list of
+        words, equals one of the earlier states."""
+        repeated = 0
+        for earlier_state in states:
+            differ = 0
+            for word, earlier_word in zip(state, earlier_state):
+                differ |= word ^ earlier_word
+            repeated |= ~differ
+        return repeated & self.mask
+
+    def execute_loop(self, loop, active):
+        """Execute a feedback loop of gates in the active instances until it
+        settles.
+
+        As in network.Network.execute_loop, an instance stops executing the
+        loop once a pass leaves its outputs unchanged or repeats the outputs
+        of an earlier pass, or after iteration_limit passes. Return the mask
+        of the instances whose signals changed.
+        """
+        levels_word = self.levels_word
+        pending_word = self.pending_word
+        outputs = [output for output, inputs, x, y in loop]
+        changed = 0
+        loop_states = []  # the output words after each pass
+        for _ in range(self.network.iteration_limit):
+            loop_changed = self.execute_gates(loop, active)
+            changed |= loop_changed
+            active &= loop_changed
+            if not active:
+                break
+            loop_state = [levels_word[output] for output in outputs] + \
+                [pending_word[output] for output in outputs]
+            # Every earlier pass is a state of the instances still active
+            active &= ~self.find_repeats(loop_state, loop_states)
+            if not active:
+                break
+            loop_states.append(loop_state)
+        return changed
+
+    def execute_d_types(self, active):
+        """Execute the D-types in the active instances. Return the mask of
+        changed instances."""
+        levels_word = self.levels_word
+        pending_word = self.pending_word
+        mask = self.mask
+        changed = 0
+        for number, (clock, data, set_, clear, q, qbar) in \
+                enumerate(self.d_types):
+            rising = levels_word[clock] & pending_word[clock]
+            # HIGH and FALLING data both give the level before the change
+            data_level = levels_word[data] ^ pending_word[data]
+            memory = (rising & data_level) | \
+                (~rising & self.d_type_memory[number])
+            memory |= levels_word[set_] & ~pending_word[set_]
+            memory &= ~(levels_word[clear] & ~pending_word[clear]) & mask
+            memory = (memory & active) | \
+                (self.d_type_memory[number] & ~active)
+            self.d_type_memory[number] = memory
+            changed |= self.update_signal(q, memory, active)
+            changed |= self.update_signal(qbar, mask & ~memory, active)
+        return changed
+
+    def execute_network(self):
+        """Execute all the devices in every instance for one simulation cycle.
+
+        Return the mask of the instances that settled, or None if the network
+        has an unconnected input.
+        """
+        if not self.connected:
+            return None
+        mask = self.mask
+        limit = self.network.iteration_limit
+        self.update_sources()
+
+        # As in network.Network.execute_network, an instance stops once it
+        # settles or its state repeats a state of an earlier iteration
+        active = mask
+        states = []
+        settled = 0
+        iterations = 0
+        while iterations < limit:
+            iterations += 1
+            changed = 0
+            for device, index in self.switch_devices:
+                changed |= self.update_signal(
+                    index, mask if device.switch_state else 0, active)
+            changed |= self.execute_d_types(active)
+            for index in self.source_outputs:  # complete transitions
+                completed = self.pending_word[index] & active
+                if completed:
+                    changed |= completed
+                    self.pending_word[index] &= ~completed
+            for gates, loops in self.levels:
+                changed |= self.execute_gates(gates, active)
+                for loop in loops:
+                    changed |= self.execute_loop(loop, active)
+            settled |= active & ~changed
+            active &= changed
+            if not active:
+                break
+            if iterations > 2:
+                state = self.levels_word + self.pending_word + \
+                    self.d_type_memory
+                active &= ~self.find_repeats(state, states)
+                if not active:
+                    break
+                states.append(state)
+        self.cycles_completed += 1
+        self.unsteady |= mask & ~settled
+        return settled
+
+    def record_signals(self):
+        """Record the current signals of all monitors of every instance."""
+        for device_id, output_id in self.monitors.monitors_dictionary:
+            index = self.output_index[(device_id, output_id)]
+            self.traces.setdefault((device_id, output_id), []).append(
+                (self.levels_word[index], self.pending_word[index]))
+
+    def run_network(self, cycles):
+        """Run the network for the given number of cycles.
+
+        Return False if the network has an unconnected input.
+        """
+        for _ in range(cycles):
+            if self.execute_network() is None:
+                return False
+            self.record_signals()
+        return True
+
+    def decode(self, instance, level, pending):
+        """Return the signal code of the instance in the given words."""
+        return self.signal_codes[(level >> instance) & 1][
+            (pending >> instance) & 1]
+
+    def get_signal(self, instance, device_id, output_id):
+        """Return the current signal at the output in the given instance.
+
+        Return None if the output is invalid.
+        """
+        index = self.output_index.get((device_id, output_id))
+        if index is None:
+            return None
+        return self.decode(instance, self.levels_word[index],
+                           self.pending_word[index])
+
+    def get_monitor_traces(self, instance):
+        """Return {(device_id, output_id): [signal_list]} for the instance."""
+        return {monitor: [self.decode(instance, level, pending)
+                          for level, pending in words]
+                for monitor, words in self.traces.items()}
+
+    def get_divergence(self):
+        """Return how the monitor traces differ from the first instance.
+
+        Return {(device_id, output_id): (first_cycle, instances)} for the
+        monitors on which some instances differ from the first instance,
+        where instances is the sorted list of the instances that differ.
+        """
+        divergence = {}
+        for monitor, words in self.traces.items():
+            first_cycle = None
+            differing = 0
+            for cycle, (level, pending) in enumerate(words):
+                # Copy the bits of the first instance into every instance
+                reference = (-(level & 1) & self.mask,
+                             -(pending & 1) & self.mask)
+                difference = (level ^ reference[0]) | \
+                    (pending ^ reference[1])
+                if difference and first_cycle is None:
+                    first_cycle = cycle
+                differing |= difference
+            if differing:
+                divergence[monitor] = (first_cycle,
+                                       self.get_instances(differing))
+        return divergence
+
+    def get_instances(self, bits):
+        """Return the sorted list of the instances whose bits are set."""
+        return [instance for instance in range(self.no_of_instances)
+                if (bits >> instance) & 1]
+
+    def get_diverging_instances(self):
+        """Return the instances whose traces differ from the first one."""
+        instances = set()
+        for first_cycle, differing in self.get_divergence().values():
+            instances.update(differing)
+        return sorted(instances)
+
+    def get_unsteady_instances(self):
+        """Return the instances that did not settle in some cycle."""
+        return self.get_instances(self.unsteady)
+
+    def display_divergence(self):
+        """Display the divergence summary in the text console."""
+        print("Simulated", self.no_of_instances, "cold starts for",
+              self.cycles_completed, "cycles.")
+        divergence = self.get_divergence()
+        if not divergence:
+            print("All instances give the same traces.")
+        for (device_id, output_id), (first_cycle, instances) in \
+                divergence.items():
+            seeds = ", ".join(str(self.seeds[instance])
+                              for instance in instances)
+            print(self.devices.get_signal_name(device_id, output_id) +
+                  ": differs from seed", self.seeds[0], "at cycle",
+                  str(first_cycle) + " with seeds", seeds)
+        unsteady = self.get_unsteady_instances()
+        if unsteady:
+            print("Oscillating seeds:", ", ".join(str(self.seeds[instance])
+                                                  for instance in unsteady))
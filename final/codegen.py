@@ -0,0 +1,410 @@
+"""Execute the network with Python code generated for the netlist.
+
+Used in the Logic Simulator project as the "compiled" simulation engine of
+the network. The compiled schedule is turned into the source of a single
+function, with one local variable per signal and a straight-line expression
+per gate, which is compiled once and called once per simulation cycle. The
+compiled code is cached on disk, keyed by a hash of the netlist, so that
+loading the same netlist again skips both the generation and the compilation.
+The cache is the logsim directory in $XDG_CACHE_HOME, or in ~/.cache, and
+keeps the code of the most recently used netlists. Deleting it only makes
+the next runs generate their code again.
+
+Classes
+-------
+CompiledEngine - generates, caches and calls the function of a netlist.
+"""
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+
+
+def get_cache_dir():
+    """Return the default directory of the cached code.
+
+    This is logsim in $XDG_CACHE_HOME if it is set to an absolute path, and
+    in ~/.cache otherwise.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME", "")
+    if not os.path.isabs(cache_home):
+        cache_home = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "logsim")
+
+
+class CompiledEngine:
+
+    """Generate, cache and call the function that executes a netlist.
+
+    The generated function executes the devices in the same order as
+    network.Network.execute_network and gives identical signals. It reads
+    the signals, D-type memories and switch states when it is called, settles
+    them in its local variables and returns them to be stored back into the
+    devices, so the devices always hold the state of the network between
+    cycles. The clocks, siggens and RCs are updated by the network as usual.
+
+    The update_signal rules become lookup tables indexed by the signal code
+    and the target level, and the gates become bitwise operations on the
+    levels their inputs are read as, so LOW and HIGH must be 0 and 1.
+
+    The code is cached in the directory cache_dir, which is get_cache_dir()
+    unless it is changed after the engine is made, or set to None to generate
+    and compile the function of every netlist. Once the cache holds more
+    than max_cache_files netlists, the least recently used are removed.
+
+    Parameters
+    ----------
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    get_plan(self): Returns the netlist, as the signal indices read and
+                    written by each device, in execution order.
+
+    get_key(self, plan): Returns the hash of the plan that names its cached
+                         code.
+
+    generate_source(self, plan): Returns the source of the function that
+                                 executes the plan.
+
+    load_function(self, plan): Returns the function of the plan, generating
+                               and caching its code if necessary.
+
+    evict_cache(self): Removes the least recently used code beyond
+                       max_cache_files from the cache directory.
+
+    compile_engine(self): Loads the function of the compiled schedule of the
+                          network.
+
+    execute_network(self): Executes all the devices in the network for one
+                           simulation cycle.
+    """
+
+    # Changing the generated code must change this, to ignore older caches
+    generator_version = 2
+
+    max_cache_files = 200
+
+    def __init__(self, network):
+        """Initialise the lookup tables and the functions loaded."""
+        self.network = network
+        self.devices = network.devices
+        self.cache_dir = get_cache_dir()
+        devices = self.devices
+        signals = [devices.LOW, devices.HIGH, devices.RISING,
+                   devices.FALLING]
+
+        # Lookup tables indexed by signal code (and target level)
+        self.updated_signal = tuple(
+            (devices.LOW, devices.RISING)
+            if signal in [devices.LOW, devices.FALLING]
+            else (devices.FALLING, devices.HIGH) for signal in signals)
+        self.signal_level = tuple(network.signal_levels[signal]
+                                  for signal in signals)
+        # The signal an XOR gate compares, and the level an AND or NAND gate
+        # and an OR or NOR gate read, see network.Network.gate_signals
+        self.xor_signal = tuple(network.gate_signals[signal]
+                                for signal in signals)
+        self.and_level = tuple(int(signal == devices.HIGH)
+                               for signal in self.xor_signal)
+        self.or_level = tuple(int(signal != devices.LOW)
+                              for signal in self.xor_signal)
+        # The level a D-type reads on its DATA input, see execute_d_type
+        self.previous_level = tuple(
+            devices.HIGH if signal in [devices.HIGH, devices.FALLING]
+            else devices.LOW for signal in signals)
+
+        self.schedule = None
+        self.function = None
+        self.from_cache = False  # True if the code was read from the cache
+        # functions stores {key: function} for every netlist loaded, so that
+        # a network simulating a changing set of devices reuses them
+        self.functions = {}
+        # signal_outputs lists the (device.outputs, output_id) pair of each
+        # signal index, in the order of network.get_network_state
+        self.signal_outputs = []
+        self.d_type_devices = []
+        self.switch_devices = []
+
+    def get_plan(self):
+        """Return the netlist as the signal indices used by each device.
+
+        Signals are indexed in the order of the devices, and D-type memories
+        in the order of the D-types. The plan is a tuple of plain integers
+        and strings, in the order the devices are executed, so that equal
+        plans give the same function.
+        """
+        network = self.network
+        devices = self.devices
+        output_index = {}
+        for device in devices.devices_list:
+            for output_id in device.outputs:
+                output_index[(device.device_id, output_id)] = \
+                    len(output_index)
+        memory_index = {device_id: number for number, device_id
+                        in enumerate(devices.find_devices(devices.D_TYPE))}
+
+        switches = tuple(output_index[(device_id, None)] for device_id
+                         in network.find_simulated_devices(devices.SWITCH))
+        d_types = []
+        for device_id in network.find_simulated_devices(devices.D_TYPE):
+            inputs = devices.get_device(device_id).inputs
+            d_types.append((memory_index[device_id],) + tuple(
+                output_index[inputs[input_id]] for input_id
+                in [devices.CLK_ID, devices.DATA_ID, devices.SET_ID,
+                    devices.CLEAR_ID]) + (
+                output_index[(device_id, devices.Q_ID)],
+                output_index[(device_id, devices.QBAR_ID)]))
+        sources = tuple(output_index[(device_id, None)]
+                        for device_kind in [devices.CLOCK, devices.SIGGEN,
+                                            devices.RC]
+                        for device_id
+                        in network.find_simulated_devices(device_kind))
+
+        def gate(device_id):
+            device = devices.get_device(device_id)
+            x, y = network.gate_arguments[device_id]
+            if device.device_kind == devices.XOR:
+                operator, inverted = "^", False
+            else:
+                operator = "&" if x == devices.HIGH else "|"
+                inverted = x != y
+            return (output_index[(device_id, None)],
+                    tuple(output_index[connected_output]
+                          for connected_output in device.inputs.values()),
+                    operator, inverted)
+
+        levels = tuple((tuple(gate(device_id) for device_id in gate_ids),
+                        tuple(tuple(gate(device_id) for device_id in loop)
+                              for loop in loops))
+                       for gate_ids, loops in network.schedule)
+        return (self.generator_version, self.updated_signal,
+                self.signal_level, self.previous_level, self.and_level,
+                self.or_level, self.xor_signal, devices.RISING,
+                devices.HIGH, len(output_index), len(memory_index), switches,
+                tuple(d_types), sources, levels)
+
+    def get_key(self, plan):
+        """Return the hash of the plan, which names its cached code."""
+        return hashlib.sha256(repr(plan).encode("utf-8")).hexdigest()
+
+    def generate_source(self, plan):
+        """Return the source of the function that executes the plan.
+
+        The function is execute_cycle(signals, memories, switch_states,
+        iteration_limit, record_state), where record_state is
+        network.Network.record_state. It returns the steady state, the
+        number of settle iterations, the states recorded and the new
+        signals and D-type memories.
+        """
+        [_, updated_signal, signal_level, previous_level, and_level,
+         or_level, xor_signal, RISING, HIGH, no_of_signals, no_of_memories,
+         switches, d_types, sources, levels] = plan
+        signals = ["n%d" % index for index in range(no_of_signals)]
+        memories = ["m%d" % index for index in range(no_of_memories)]
+        switch_states = ["s%d" % index for index in range(len(switches))]
+        state = "(" + "".join(name + ", " for name in signals + memories) + ")"
+        lines = ["# Generated by codegen.py, do not edit.",
+                 "U = %r" % (updated_signal,),
+                 "L = %r" % (signal_level,),
+                 "P = %r" % (previous_level,),
+                 "A = %r" % (and_level,),
+                 "O = %r" % (or_level,),
+                 "X = %r" % (xor_signal,),
+                 "",
+                 "",
+                 "def execute_cycle(signals, memories, switch_states, "
+                 "iteration_limit,",
+                 "                  record_state, U=U, L=L, P=P, A=A, O=O, "
+                 "X=X):"]
+        for names, argument in [(signals, "signals"),
+                                (memories, "memories"),
+                                (switch_states, "switch_states")]:
+            if names:
+                lines.append("    " + "".join(name + ", " for name in names)
+                             + "= " + argument)
+        lines.extend(["    states = {}",
+                      "    steady = False",
+                      "    iterations = 0",
+                      "    while iterations < iteration_limit:",
+                      "        iterations += 1",
+                      "        steady = True"])
+
+        def update(indent, signal, target, flag):
+            lines.extend([indent + "v = U[%s][%s]" % (signal, target),
+                          indent + "if v != %s:" % signal,
+                          indent + "    %s = v" % signal,
+                          indent + "    %s = False" % flag])
+
+        def execute_gate(indent, gate, flag):
+            output, inputs, operator, inverted = gate
+            if operator == "^":
+                target = "X[n%d] != X[n%d]" % inputs
+            else:
+                table = "A" if operator == "&" else "O"
+                target = (" %s " % operator).join(
+                    "%s[n%d]" % (table, index) for index in inputs)
+            if inverted:
+                target = "(%s) ^ 1" % target
+            update(indent, "n%d" % output, target, flag)
+
+        indent = " " * 8
+        for number, index in enumerate(switches):
+            update(indent, "n%d" % index, "s%d" % number, "steady")
+        for memory, clock, data, set_, clear, q, qbar in d_types:
+            lines.extend([
+                indent + "if n%d == %d:" % (clock, RISING),
+                indent + "    m%d = P[n%d]" % (memory, data),
+                indent + "if n%d == %d:" % (set_, HIGH),
+                indent + "    m%d = %d" % (memory, HIGH),
+                indent + "if n%d == %d:" % (clear, HIGH),
+                indent + "    m%d = %d" % (memory, 1 - HIGH)])
+            update(indent, "n%d" % q, "m%d" % memory, "steady")
+            update(indent, "n%d" % qbar, "m%d ^ 1" % memory, "steady")
+        for index in sources:  # complete clock, siggen and RC transitions
+            lines.extend([indent + "v = L[n%d]" % index,
+                          indent + "if v != n%d:" % index,
+                          indent + "    n%d = v" % index,
+                          indent + "    steady = False"])
+        for gates, loops in levels:
+            for gate in gates:
+                execute_gate(indent, gate, "steady")
+            for loop in loops:  # see network.Network.execute_loop
+                loop_state = "(" + "".join("n%d, " % gate[0]
+                                           for gate in loop) + ")"
+                lines.extend([indent + "changed = False",
+                              indent + "loop_states = set()",
+                              indent + "for _ in range(iteration_limit):",
+                              indent + "    loop_steady = True"])
+                for gate in loop:
+                    execute_gate(indent + "    ", gate, "loop_steady")
+                lines.extend([indent + "    if loop_steady:",
+                              indent + "        break",
+                              indent + "    changed = True",
+                              indent + "    loop_state = " + loop_state,
+                              indent + "    if loop_state in loop_states:",
+                              indent + "        break",
+                              indent + "    loop_states.add(loop_state)",
+                              indent + "if changed:",
+                              indent + "    steady = False"])
+        lines.extend([
+            "        if steady:",
+            "            break",
+            "        if iterations > 2 and not record_state(",
+            "                states, " + state + "):",
+            "            break",
+            "    return (steady, iterations, states,",
+            "            (" + "".join(name + ", " for name in signals) + "),",
+            "            (" + "".join(name + ", " for name in memories) + "))",
+            ""])
+        return "\n".join(lines)
+
+    def load_function(self, plan):
+        """Return the function of the plan.
+
+        The compiled code is read from the cache directory if it holds the
+        code of the plan for this Python version, and the source is generated
+        and compiled, and the code written there, otherwise. A cache
+        directory that cannot be read or written is ignored.
+        """
+        key = self.get_key(plan)
+        if key in self.functions:
+            return self.functions[key]
+        code = None
+        path = None
+        cache_tag = sys.implementation.cache_tag  # marshal format version
+        if self.cache_dir is not None and cache_tag is not None:
+            path = os.path.join(self.cache_dir,
+                                "%s.%s.code" % (key, cache_tag))
+            try:
+                with open(path, "rb") as file:
+                    code = marshal.load(file)
+                os.utime(path)  # marks it as recently used
+            except (OSError, EOFError, ValueError, TypeError):
+                code = None
+        self.from_cache = code is not None
+        if code is None:
+            code = compile(self.generate_source(plan), "<netlist %s>" % key,
+                           "exec")
+            if path is not None:
+                try:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    # Write to a new file first so that a partly written
+                    # file is never read
+                    descriptor, temporary_path = tempfile.mkstemp(
+                        suffix=".tmp", dir=self.cache_dir)
+                    with os.fdopen(descriptor, "wb") as file:
+                        marshal.dump(code, file)
+                    os.replace(temporary_path, path)
+                    self.evict_cache()
+                except OSError:
+                    pass
+        namespace = {}
+        exec(code, namespace)
+        self.functions[key] = namespace["execute_cycle"]
+        return self.functions[key]
+
+    def evict_cache(self):
+        """Remove the least recently used code beyond max_cache_files."""
+        paths = [os.path.join(self.cache_dir, file_name)
+                 for file_name in os.listdir(self.cache_dir)
+                 if file_name.endswith(".code")]
+        if len(paths) <= self.max_cache_files:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_cache_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def compile_engine(self):
+        """Load the function of the compiled schedule of the network."""
+        network = self.network
+        devices = self.devices
+        self.schedule = network.schedule
+        self.function = None
+        if not network.check_network():
+            return
+        self.signal_outputs = [(device.outputs, output_id)
+                               for device in devices.devices_list
+                               for output_id in device.outputs]
+        self.d_type_devices = [devices.get_device(device_id) for device_id
+                               in devices.find_devices(devices.D_TYPE)]
+        self.switch_devices = [
+            devices.get_device(device_id) for device_id
+            in network.find_simulated_devices(devices.SWITCH)]
+        self.function = self.load_function(self.get_plan())
+
+    def execute_network(self):
+        """Execute all the devices in the network for one simulation cycle.
+
+        Return True if successful and the network does not oscillate.
+        """
+        network = self.network
+        if self.schedule is not network.schedule:
+            self.compile_engine()
+        if self.function is None:  # an input is unconnected
+            return False
+        network.update_clocks()
+        network.update_siggen()
+        network.update_rc()
+
+        network.oscillating_devices = []
+        steady, iterations, states, signals, memories = self.function(
+            [outputs[output_id] for outputs, output_id in self.signal_outputs],
+            [device.dtype_memory for device in self.d_type_devices],
+            [device.switch_state for device in self.switch_devices],
+            network.iteration_limit, network.record_state)
+        for (outputs, output_id), signal in zip(self.signal_outputs,
+                                                signals):
+            outputs[output_id] = signal
+        for device, memory in zip(self.d_type_devices, memories):
+            device.dtype_memory = memory
+        if not steady and not network.oscillating_devices:
+            network.oscillating_devices = \
+                network.find_last_changing_devices(states)
+        network.settle_iterations = iterations
+        network.steady_state = steady
+        return steady
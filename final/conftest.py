@@ -0,0 +1,41 @@
+"""Configure the tests of the Logic Simulator."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path_factory, monkeypatch):
+    """Keep the code cached by the compiled engine out of the user's cache."""
+    monkeypatch.setenv("XDG_CACHE_HOME",
+                       str(tmp_path_factory.getbasetemp() / "cache"))
+
+
+@pytest.fixture
+def make_simulator():
+    """Return a function making the names, devices, network and monitors
+    of a definition file, seeded so that every run is the same."""
+    def make(engine="levelized", path="definition_file_1.txt", seed=3):
+        names = Names()
+        devices = Devices(names, seed=seed)
+        network = Network(names, devices, engine)
+        monitors = Monitors(names, devices, network)
+        scanner = Scanner(path, names)
+        parser = Parser(names, devices, network, monitors, scanner)
+        assert parser.parse_network()
+        return names, devices, network, monitors
+    return make
+
+
+@pytest.fixture
+def get_traces():
+    """Return a function returning the list of signals of every monitor."""
+    def get(monitors):
+        return {monitor: list(trace)
+                for monitor, trace in monitors.monitors_dictionary.items()}
+    return get
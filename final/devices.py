@@ -6,15 +6,28 @@ properties.
 Classes
 -------
 Device - stores device properties.
+SwitchDevice - stores the properties of a switch.
+ClockDevice - stores the properties of a clock.
+DTypeDevice - stores the properties of a D-type.
+SiggenDevice - stores the properties of a signal generator.
+RCDevice - stores the properties of an RC device.
 Devices - makes and stores all the devices in the logic network.
 """
 import random
 
+from devicetable import DeviceTable, DeviceSequence
+
 
 class Device:
 
     """Store device properties.
 
+    Logic gates are stored as plain Device objects. The other device kinds
+    use the subclasses below, which add slots for their own properties. The
+    properties of the other kinds read as None, so any device can be asked
+    for any property. __slots__ keeps each device free of an attribute
+    dictionary, since large networks have millions of them.
+
     Parameters
     ----------
     device_id: device ID.
@@ -24,6 +37,22 @@ class Device:
     No public methods.
     """
 
+    __slots__ = ("device_id", "device_kind", "inputs", "outputs")
+
+    # Properties of the other device kinds, overridden by the slots of the
+    # subclasses
+    switch_state = None
+    clock_half_period = None
+    clock_counter = None
+    dtype_memory = None
+    siggen_wave = None
+    siggen_counter = None
+    time_constant = None
+    rc_counter = None
+
+    # state_attributes lists the properties that change during simulation
+    state_attributes = ()
+
     def __init__(self, device_id):
         """Initialise device properties."""
 
@@ -37,14 +66,118 @@ class Device:
         self.outputs = {}
 
         self.device_kind = None
+
+
+class SwitchDevice(Device):
+
+    """Store the properties of a switch.
+
+    Parameters
+    ----------
+    device_id: device ID.
+
+    Public methods
+    --------------
+    No public methods.
+    """
+
+    __slots__ = ("switch_state",)
+
+    def __init__(self, device_id):
+        """Initialise switch properties."""
+        super().__init__(device_id)
+        self.switch_state = None
+
+
+class ClockDevice(Device):
+
+    """Store the properties of a clock.
+
+    Parameters
+    ----------
+    device_id: device ID.
+
+    Public methods
+    --------------
+    No public methods.
+    """
+
+    __slots__ = ("clock_half_period", "clock_counter")
+    state_attributes = ("clock_counter",)
+
+    def __init__(self, device_id):
+        """Initialise clock properties."""
+        super().__init__(device_id)
         self.clock_half_period = None
         self.clock_counter = None
-        self.switch_state = None
+
+
+class DTypeDevice(Device):
+
+    """Store the properties of a D-type.
+
+    Parameters
+    ----------
+    device_id: device ID.
+
+    Public methods
+    --------------
+    No public methods.
+    """
+
+    __slots__ = ("dtype_memory",)
+    state_attributes = ("dtype_memory",)
+
+    def __init__(self, device_id):
+        """Initialise D-type properties."""
+        super().__init__(device_id)
         self.dtype_memory = None
+
+
+class SiggenDevice(Device):
+
+    """Store the properties of a signal generator.
+
+    Parameters
+    ----------
+    device_id: device ID.
+
+    Public methods
+    --------------
+    No public methods.
+    """
+
+    __slots__ = ("siggen_wave", "siggen_counter")
+    state_attributes = ("siggen_counter",)
+
+    def __init__(self, device_id):
+        """Initialise siggen properties."""
+        super().__init__(device_id)
         self.siggen_wave = None
         self.siggen_counter = None
+
+
+class RCDevice(Device):
+
+    """Store the properties of an RC device.
+
+    Parameters
+    ----------
+    device_id: device ID.
+
+    Public methods
+    --------------
+    No public methods.
+    """
+
+    __slots__ = ("time_constant", "rc_counter")
+    state_attributes = ("rc_counter",)
+
+    def __init__(self, device_id):
+        """Initialise RC properties."""
+        super().__init__(device_id)
         self.time_constant = None
-        self.rc_counter = None 
+        self.rc_counter = None
 
 
 class Devices:
@@ -57,6 +190,11 @@ class Devices:
     Parameters
     ----------
     names: instance of the names.Names() class.
+    seed: seed of the random start-up states, see set_seed (optional).
+    compact: if True, the devices are stored in the arrays of a
+             devicetable.DeviceTable() and read through views, which takes
+             about a tenth of the memory of Device objects but is slower
+             to simulate (optional).
 
     Public methods
     --------------
@@ -69,6 +207,12 @@ class Devices:
     add_device(self, device_id, device_kind): Adds the specified device to the
                                               network.
 
+    remove_device(self, device_id): Removes the specified device from the
+                                    network.
+
+    replace_device(self, device_id, device_kind): Replaces the specified
+                                device with a device of another kind.
+
     add_input(self, device_id, input_id): Adds the specified input to the
                                           specified device.
 
@@ -101,20 +245,43 @@ class Devices:
     make_rc(self, device_id, time_constant): Makes a RC device with the 
                                              specified time constant
 
+    set_seed(self, seed): Sets the seed or random number generator used for
+                          the cold start-up.
+
     cold_startup(self): Simulates cold start-up of D-types, clocks, siggens 
                         and RC.
 
+    cold_start_device(self, device): Simulates cold start-up of a single
+                                     device.
+
     make_device(self, device_id, device_kind, device_property=None): Creates
                        the specified device and returns errors if unsuccessful.
     """
 
-    def __init__(self, names):
+    def __init__(self, names, seed=None, compact=False):
         """Initialise devices list and constants."""
 
         self.names = names
 
         self.devices_list = []
 
+        # devices_dictionary stores {device_id: Device} and kinds_dictionary
+        # stores {device_kind: [device_id, ...]}, so that lookups do not have
+        # to scan devices_list
+        self.devices_dictionary = {}
+        self.kinds_dictionary = {}
+        # revision counts the devices added or removed, so that other
+        # classes can tell when the set of devices has changed
+        self.revision = 0
+        # startup_count counts the cold start-ups, so that other classes can
+        # tell when the device states have been reset
+        self.startup_count = 0
+        # random draws the random start-up states, and seed is the seed it
+        # restarts from at every cold start-up (None if it is not seeded)
+        self.random = random
+        self.seed = None
+        self.set_seed(seed)
+
         gate_strings = ["AND", "OR", "NAND", "NOR", "XOR"]
         device_strings = ["CLOCK", "SWITCH", "DTYPE", "SIGGEN", "RC"]
         dtype_inputs = ["CLK", "SET", "CLEAR", "DATA"]
@@ -137,12 +304,27 @@ class Devices:
 
         self.max_gate_inputs = 16
 
+        # device_classes stores {device_kind: class} for the kinds which are
+        # not stored as plain Device objects
+        self.device_classes = {self.SWITCH: SwitchDevice,
+                               self.CLOCK: ClockDevice,
+                               self.D_TYPE: DTypeDevice,
+                               self.SIGGEN: SiggenDevice,
+                               self.RC: RCDevice}
+
+        # table stores the devices in compact mode, and is None otherwise.
+        # devices_list is then a view of the devices in the table.
+        self.table = None
+        if compact:
+            self.table = DeviceTable(self)
+            self.devices_list = DeviceSequence(self.table)
+            self.devices_dictionary = self.kinds_dictionary = None
+
     def get_device(self, device_id):
         """Return the Device object corresponding to device_id."""
-        for device in self.devices_list:
-            if device.device_id == device_id:
-                return device
-        return None
+        if self.table is not None:
+            return self.table.get_device(device_id)
+        return self.devices_dictionary.get(device_id)
 
     def find_devices(self, device_kind=None):
         """Return a list of device IDs of the specified device_kind.
@@ -150,19 +332,68 @@ class Devices:
         Return a list of all device IDs in the network if no device_kind is
         specified.
         """
-        device_id_list = []
-        for device in self.devices_list:
-            if device_kind is None:
-                device_id_list.append(device.device_id)
-            elif device.device_kind == device_kind:
-                device_id_list.append(device.device_id)
-        return device_id_list
+        if self.table is not None:
+            return self.table.find_devices(device_kind)
+        if device_kind is None:
+            return list(self.devices_dictionary)
+        return list(self.kinds_dictionary.get(device_kind, []))
 
     def add_device(self, device_id, device_kind):
         """Add the specified device to the network."""
-        new_device = Device(device_id)
+        self.revision += 1
+        if self.table is not None:
+            self.table.add_device(device_id, device_kind)
+            return
+        new_device = self.device_classes.get(device_kind, Device)(device_id)
         new_device.device_kind = device_kind
         self.devices_list.append(new_device)
+        self.devices_dictionary[device_id] = new_device
+        self.kinds_dictionary.setdefault(device_kind, []).append(device_id)
+
+    def remove_device(self, device_id):
+        """Remove the specified device from the network.
+
+        Return True if successful. Connections made to the device's outputs
+        are not removed.
+        """
+        if self.table is not None:
+            if not self.table.remove_device(device_id):
+                return False
+            self.revision += 1
+            return True
+        device = self.devices_dictionary.pop(device_id, None)
+        if device is None:
+            return False
+        self.devices_list.remove(device)
+        self.kinds_dictionary[device.device_kind].remove(device_id)
+        self.revision += 1
+        return True
+
+    def replace_device(self, device_id, device_kind):
+        """Replace the specified device with a new device of the given kind.
+
+        The new device keeps the ID, the place in devices_list and the output
+        signals of the old device, but has no inputs, and connections made to
+        its outputs are kept. Return the new device, or None if the device
+        does not exist.
+        """
+        if self.table is not None:
+            if not self.table.replace_device(device_id, device_kind):
+                return None
+            self.revision += 1
+            return self.table.get_device(device_id)
+        old_device = self.devices_dictionary.get(device_id)
+        if old_device is None:
+            return None
+        new_device = self.device_classes.get(device_kind, Device)(device_id)
+        new_device.device_kind = device_kind
+        new_device.outputs = dict(old_device.outputs)
+        self.devices_list[self.devices_list.index(old_device)] = new_device
+        self.devices_dictionary[device_id] = new_device
+        self.kinds_dictionary[old_device.device_kind].remove(device_id)
+        self.kinds_dictionary.setdefault(device_kind, []).append(device_id)
+        self.revision += 1
+        return new_device
 
     def add_input(self, device_id, input_id):
         """Add the specified input to the specified device.
@@ -250,7 +481,7 @@ class Devices:
         self.add_device(device_id, self.CLOCK)
         device = self.get_device(device_id)
         device.clock_half_period = clock_half_period
-        self.cold_startup()  # clock initialised to a random point in its cycle
+        self.cold_start_device(device)  # random point in its cycle
 
     def make_gate(self, device_id, device_kind, no_of_inputs):
         """Make logic gates with the specified number of inputs."""
@@ -269,7 +500,7 @@ class Devices:
             self.add_input(device_id, input_id)
         for output_id in self.dtype_output_ids:
             self.add_output(device_id, output_id)
-        self.cold_startup()  # D-type initialised to a random state
+        self.cold_start_device(self.get_device(device_id))  # random state
     
     def check_siggen_property(self, waveform):
         """Return True if the waveform string is valid
@@ -294,7 +525,7 @@ class Devices:
                 device.siggen_wave.append(self.HIGH)
             else:
                 device.siggen_wave.append(self.LOW)
-        self.cold_startup()  # initialised to a random point in its cycle
+        self.cold_start_device(device)  # random point in its cycle
     
     def make_rc(self, device_id, time_constant):
         """Make an RC device with the specific time constant"""
@@ -305,36 +536,64 @@ class Devices:
         self.add_output(device.device_id, output_id=None,
                         signal=self.HIGH)
     
+    def set_seed(self, seed):
+        """Set the seed or random number generator used for cold start-up.
+
+        seed is an integer, a random.Random instance or None. With an integer
+        every cold start-up draws the same states, so runs are reproducible.
+        A random.Random instance is used as it is, and None uses the global
+        random module.
+        """
+        if seed is None:
+            self.random = random
+            self.seed = None
+        elif isinstance(seed, random.Random):
+            self.random = seed
+            self.seed = None
+        elif isinstance(seed, int) and not isinstance(seed, bool):
+            self.random = random.Random(seed)
+            self.seed = seed
+        else:
+            raise TypeError("Expected seed to be an integer, a random.Random "
+                            "instance or None.")
+
     def cold_startup(self):
         """Simulate cold start-up of D-types, clocks, siggens and RC
 
         Set the memory of the D-types to a random state and make the clocks
         and siggens begin from a random point in their cycles. Set RC to its
-        initial HIGH state.
+        initial HIGH state. If a seed is set, the random states are drawn
+        from the start of its sequence every time.
         """
+        self.startup_count += 1
+        if self.seed is not None:
+            self.random.seed(self.seed)
         for device in self.devices_list:
-            if device.device_kind == self.D_TYPE:
-                device.dtype_memory = random.choice([self.LOW, self.HIGH])
-
-            elif device.device_kind == self.CLOCK:
-                clock_signal = random.choice([self.LOW, self.HIGH])
-                self.add_output(device.device_id, output_id=None,
-                                signal=clock_signal)
-                # Initialise it to a random point in its cycle.
-                device.clock_counter = \
-                    random.randrange(device.clock_half_period)
-            
-            elif device.device_kind == self.SIGGEN:
-                device.siggen_counter = random.randint(0, len(device.siggen_wave) - 1)
-                siggen_signal = device.siggen_wave[device.siggen_counter]
-                self.add_output(device.device_id, output_id=None,
-                                signal=siggen_signal)
-            
-            elif device.device_kind == self.RC:
-                device.rc_counter = 0
-                rc_signal = 1
-                self.add_output(device.device_id, output_id=None,
-                                signal=rc_signal)
+            self.cold_start_device(device)
+
+    def cold_start_device(self, device):
+        """Simulate cold start-up of a single device.
+
+        Used by cold_startup and when a device is made, so that making a
+        device does not have to visit every other device.
+        """
+        rng = self.random
+        if device.device_kind == self.D_TYPE:
+            device.dtype_memory = rng.choice([self.LOW, self.HIGH])
+
+        elif device.device_kind == self.CLOCK:
+            clock_signal = rng.choice([self.LOW, self.HIGH])
+            device.outputs[None] = clock_signal
+            # Initialise it to a random point in its cycle.
+            device.clock_counter = rng.randrange(device.clock_half_period)
+
+        elif device.device_kind == self.SIGGEN:
+            device.siggen_counter = rng.randint(0, len(device.siggen_wave) - 1)
+            device.outputs[None] = device.siggen_wave[device.siggen_counter]
+
+        elif device.device_kind == self.RC:
+            device.rc_counter = 0
+            device.outputs[None] = self.HIGH
 
     def make_device(self, device_id, device_kind, device_property=None):
         """Create the specified device.
@@ -0,0 +1,478 @@
+"""Store the devices of a network in flat arrays.
+
+Used in the Logic Simulator project by devices.Devices(compact=True), so that
+networks of millions of devices fit in memory. Every device property is kept
+in an array indexed by the device's slot, and the devices are read and
+changed through views with the same attributes as devices.Device objects.
+
+Classes
+-------
+DeviceTable - stores the properties of every device in arrays.
+DeviceView - a device of the table, with the attributes of a Device.
+PortView - the inputs or outputs of a device of the table, as a dictionary.
+DeviceSequence - the devices of the table, in the order they were made.
+"""
+import array
+import collections.abc
+
+
+class DeviceTable:
+
+    """Store the properties of every device in arrays.
+
+    Each device has a slot, numbered in the order the devices are made. The
+    slot arrays hold its ID, its kind and the position and number of its
+    inputs and outputs in the port arrays. The inputs of a device are kept
+    together, and so are its outputs, and are moved to the end of the port
+    arrays if a device gains a port when another device's ports follow its
+    own. Each device kind has at most one property that changes during the
+    simulation, kept in states, and one that does not, kept in settings,
+    except for the siggen waveforms, which are lists.
+
+    A removed device leaves an empty slot, so that the slots of the other
+    devices do not change. Port IDs of None are stored as -1.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+
+    Public methods
+    --------------
+    get_slot(self, device_id): Returns the slot of a device, or None.
+
+    get_device(self, device_id): Returns a view of a device, or None.
+
+    find_devices(self, device_kind=None): Returns the IDs of the devices of
+                                          the kind, or of every device.
+
+    add_device(self, device_id, device_kind): Adds a device with no ports.
+
+    remove_device(self, device_id): Removes a device.
+
+    replace_device(self, device_id, device_kind): Changes the kind of a
+                                   device and removes its inputs.
+
+    get_ports(self, slot, outputs): Returns the position and number of the
+                                    inputs or outputs of the slot.
+
+    find_port(self, slot, outputs, port_id): Returns the position of a
+                                             port, or None.
+
+    add_port(self, slot, outputs, port_id): Adds an input or output to the
+                                            slot and returns its position.
+
+    remove_port(self, slot, outputs, port_id): Removes an input or output.
+    """
+
+    def __init__(self, devices):
+        """Initialise the empty arrays."""
+        self.devices = devices
+
+        # Slot arrays, indexed by slot. A kind of -1 marks an empty slot.
+        self.device_ids = array.array("i")
+        self.kinds = array.array("i")
+        self.input_starts = array.array("i")
+        self.input_counts = array.array("B")
+        self.output_starts = array.array("i")
+        self.output_counts = array.array("B")
+        self.states = array.array("q")
+        self.settings = array.array("i")
+        self.siggen_waves = {}  # {slot: waveform list}
+
+        # Input arrays: the input ID and the connected device and output
+        # IDs, with a connected device ID of -1 if it is not connected
+        self.input_ids = array.array("i")
+        self.input_devices = array.array("i")
+        self.input_outputs = array.array("i")
+        # Output arrays: the output ID and its signal
+        self.output_ids = array.array("i")
+        self.signals = array.array("b")
+
+        # slots stores the slot of each device ID, or -1, indexed by ID
+        self.slots = array.array("i")
+        self.kind_ids = {}  # {device_kind: array of device IDs}
+        self.no_of_devices = 0
+
+        # Attributes of each kind stored in states and settings
+        self.state_attributes = {
+            devices.SWITCH: "switch_state", devices.CLOCK: "clock_counter",
+            devices.D_TYPE: "dtype_memory", devices.SIGGEN: "siggen_counter",
+            devices.RC: "rc_counter"}
+        self.setting_attributes = {devices.CLOCK: "clock_half_period",
+                                   devices.RC: "time_constant"}
+
+    def get_slot(self, device_id):
+        """Return the slot of the device, or None if there is no device."""
+        if not isinstance(device_id, int) or \
+                not 0 <= device_id < len(self.slots):
+            return None
+        slot = self.slots[device_id]
+        if slot < 0:
+            return None
+        return slot
+
+    def get_device(self, device_id):
+        """Return a view of the device, or None if there is no device."""
+        slot = self.get_slot(device_id)
+        if slot is None:
+            return None
+        return DeviceView(self, slot)
+
+    def find_devices(self, device_kind=None):
+        """Return the IDs of the devices of the kind.
+
+        Return the IDs of every device, in the order they were made, if no
+        device_kind is specified.
+        """
+        if device_kind is None:
+            return [device_id for device_id, kind
+                    in zip(self.device_ids, self.kinds) if kind >= 0]
+        return list(self.kind_ids.get(device_kind, []))
+
+    def add_device(self, device_id, device_kind):
+        """Add a device of the kind with no inputs or outputs."""
+        if len(self.slots) <= device_id:
+            self.slots.extend([-1] * (device_id + 1 - len(self.slots)))
+        slot = len(self.device_ids)
+        self.slots[device_id] = slot
+        self.device_ids.append(device_id)
+        self.kinds.append(device_kind)
+        self.input_starts.append(len(self.input_ids))
+        self.input_counts.append(0)
+        self.output_starts.append(len(self.output_ids))
+        self.output_counts.append(0)
+        self.states.append(0)
+        self.settings.append(0)
+        self.kind_ids.setdefault(device_kind, array.array("i")).append(
+            device_id)
+        self.no_of_devices += 1
+
+    def remove_device(self, device_id):
+        """Remove the device. Return True if successful."""
+        slot = self.get_slot(device_id)
+        if slot is None:
+            return False
+        self.kind_ids[self.kinds[slot]].remove(device_id)
+        self.slots[device_id] = -1
+        self.kinds[slot] = -1
+        self.input_counts[slot] = 0
+        self.output_counts[slot] = 0
+        self.siggen_waves.pop(slot, None)
+        self.no_of_devices -= 1
+        return True
+
+    def replace_device(self, device_id, device_kind):
+        """Change the kind of the device and remove its inputs.
+
+        Its outputs and their signals are kept, and its properties are reset.
+        Return True if successful.
+        """
+        slot = self.get_slot(device_id)
+        if slot is None:
+            return False
+        self.kind_ids[self.kinds[slot]].remove(device_id)
+        self.kind_ids.setdefault(device_kind, array.array("i")).append(
+            device_id)
+        self.kinds[slot] = device_kind
+        self.input_counts[slot] = 0
+        self.states[slot] = 0
+        self.settings[slot] = 0
+        self.siggen_waves.pop(slot, None)
+        return True
+
+    def get_ports(self, slot, outputs):
+        """Return the position of the first input or output of the slot, and
+        the number of them."""
+        if outputs:
+            return self.output_starts[slot], self.output_counts[slot]
+        return self.input_starts[slot], self.input_counts[slot]
+
+    def find_port(self, slot, outputs, port_id):
+        """Return the position of the port in the port arrays, or None."""
+        start, count = self.get_ports(slot, outputs)
+        port_ids = self.output_ids if outputs else self.input_ids
+        if port_id is None:
+            port_id = -1
+        for position in range(start, start + count):
+            if port_ids[position] == port_id:
+                return position
+        return None
+
+    def add_port(self, slot, outputs, port_id):
+        """Add an input or output to the slot and return its position.
+
+        A new input is not connected, and a new output is LOW.
+        """
+        start, count = self.get_ports(slot, outputs)
+        if outputs:
+            columns = [self.output_ids, self.signals]
+            new_values = [-1 if port_id is None else port_id,
+                          self.devices.LOW]
+        else:
+            columns = [self.input_ids, self.input_devices,
+                       self.input_outputs]
+            new_values = [port_id, -1, -1]
+        if start + count != len(columns[0]):
+            # Other ports follow, so move the ports of the slot to the end
+            for column in columns:
+                column.extend(column[start:start + count])
+            start = len(columns[0]) - count
+        for column, value in zip(columns, new_values):
+            column.append(value)
+        if outputs:
+            self.output_starts[slot] = start
+            self.output_counts[slot] = count + 1
+        else:
+            self.input_starts[slot] = start
+            self.input_counts[slot] = count + 1
+        return start + count
+
+    def remove_port(self, slot, outputs, port_id):
+        """Remove the input or output. Return True if successful."""
+        position = self.find_port(slot, outputs, port_id)
+        if position is None:
+            return False
+        start, count = self.get_ports(slot, outputs)
+        if outputs:
+            columns = [self.output_ids, self.signals]
+            self.output_counts[slot] = count - 1
+        else:
+            columns = [self.input_ids, self.input_devices,
+                       self.input_outputs]
+            self.input_counts[slot] = count - 1
+        for column in columns:
+            column[position:start + count - 1] = \
+                column[position + 1:start + count]
+        return True
+
+
+class DeviceView:
+
+    """Read and change a device of the table like a Device object.
+
+    The properties of the other device kinds read as None, as they do for a
+    Device, and cannot be set.
+
+    Parameters
+    ----------
+    table: instance of the DeviceTable() class.
+    slot: slot of the device in the table.
+
+    Public methods
+    --------------
+    No public methods.
+    """
+
+    __slots__ = ("table", "slot")
+
+    def __init__(self, table, slot):
+        """Initialise the slot of the device."""
+        self.table = table
+        self.slot = slot
+
+    def __eq__(self, other):
+        """Return True if other is a view of the same device."""
+        return isinstance(other, DeviceView) and \
+            other.table is self.table and other.slot == self.slot
+
+    def __hash__(self):
+        """Return the hash of the slot."""
+        return hash(self.slot)
+
+    @property
+    def device_id(self):
+        """The ID of the device."""
+        return self.table.device_ids[self.slot]
+
+    @property
+    def device_kind(self):
+        """The kind of the device."""
+        return self.table.kinds[self.slot]
+
+    @property
+    def inputs(self):
+        """The dictionary of {input_id: (device_id, output_id)} or None."""
+        return PortView(self.table, self.slot, False)
+
+    @property
+    def outputs(self):
+        """The dictionary of {output_id: signal}."""
+        return PortView(self.table, self.slot, True)
+
+    @property
+    def state_attributes(self):
+        """The names of the properties that change during simulation."""
+        attribute = self.table.state_attributes.get(self.device_kind)
+        if attribute is None or attribute == "switch_state":
+            return ()
+        return (attribute,)
+
+    def get_property(self, attributes, values, name):
+        """Return the property stored in values if the device has it."""
+        if attributes.get(self.device_kind) != name:
+            return None
+        return values[self.slot]
+
+    def set_property(self, attributes, values, name, value):
+        """Store the property in values if the device has it."""
+        if attributes.get(self.device_kind) != name:
+            raise AttributeError("A device of this kind has no %s." % name)
+        values[self.slot] = value
+
+
+def table_property(name, setting=False):
+    """Return a DeviceView property stored in the states or settings array
+    of the table."""
+    def get_property(view):
+        table = view.table
+        if setting:
+            return view.get_property(table.setting_attributes,
+                                     table.settings, name)
+        return view.get_property(table.state_attributes, table.states, name)
+
+    def set_property(view, value):
+        table = view.table
+        if setting:
+            view.set_property(table.setting_attributes, table.settings, name,
+                              value)
+        else:
+            view.set_property(table.state_attributes, table.states, name,
+                              value)
+    return property(get_property, set_property)
+
+
+for _name in ["switch_state", "clock_counter", "dtype_memory",
+              "siggen_counter", "rc_counter"]:
+    setattr(DeviceView, _name, table_property(_name))
+for _name in ["clock_half_period", "time_constant"]:
+    setattr(DeviceView, _name, table_property(_name, setting=True))
+del _name
+
+
+def get_siggen_wave(view):
+    """Return the waveform list of a siggen, or None."""
+    return view.table.siggen_waves.get(view.slot)
+
+
+def set_siggen_wave(view, wave):
+    """Set the waveform list of a siggen."""
+    if view.device_kind != view.table.devices.SIGGEN:
+        raise AttributeError("A device of this kind has no siggen_wave.")
+    view.table.siggen_waves[view.slot] = wave
+
+
+DeviceView.siggen_wave = property(get_siggen_wave, set_siggen_wave)
+
+
+class PortView(collections.abc.MutableMapping):
+
+    """Read and change the inputs or outputs of a device as a dictionary.
+
+    The inputs map each input ID to the (device ID, output ID) pair of the
+    output connected to it, or None, and the outputs map each output ID to
+    its signal. Setting a new key adds a port.
+
+    Parameters
+    ----------
+    table: instance of the DeviceTable() class.
+    slot: slot of the device in the table.
+    outputs: True for the outputs of the device, False for its inputs.
+
+    Public methods
+    --------------
+    No public methods other than those of a dictionary.
+    """
+
+    __slots__ = ("table", "slot", "is_outputs")
+
+    def __init__(self, table, slot, outputs):
+        """Initialise the ports viewed."""
+        self.table = table
+        self.slot = slot
+        self.is_outputs = outputs
+
+    def __getitem__(self, port_id):
+        """Return the connected output of an input, or an output signal."""
+        table = self.table
+        position = table.find_port(self.slot, self.is_outputs, port_id)
+        if position is None:
+            raise KeyError(port_id)
+        if self.is_outputs:
+            return table.signals[position]
+        device_id = table.input_devices[position]
+        if device_id < 0:
+            return None
+        output_id = table.input_outputs[position]
+        return (device_id, None if output_id < 0 else output_id)
+
+    def __setitem__(self, port_id, value):
+        """Set the connected output of an input, or an output signal."""
+        table = self.table
+        position = table.find_port(self.slot, self.is_outputs, port_id)
+        if position is None:
+            position = table.add_port(self.slot, self.is_outputs, port_id)
+        if self.is_outputs:
+            table.signals[position] = value
+        elif value is None:
+            table.input_devices[position] = -1
+            table.input_outputs[position] = -1
+        else:
+            device_id, output_id = value
+            table.input_devices[position] = device_id
+            table.input_outputs[position] = \
+                -1 if output_id is None else output_id
+
+    def __delitem__(self, port_id):
+        """Remove the port."""
+        if not self.table.remove_port(self.slot, self.is_outputs, port_id):
+            raise KeyError(port_id)
+
+    def __iter__(self):
+        """Iterate over the port IDs in the order they were added."""
+        table = self.table
+        start, count = table.get_ports(self.slot, self.is_outputs)
+        port_ids = table.output_ids if self.is_outputs else table.input_ids
+        for port_id in port_ids[start:start + count]:
+            yield None if port_id < 0 else port_id
+
+    def __len__(self):
+        """Return the number of ports."""
+        return self.table.get_ports(self.slot, self.is_outputs)[1]
+
+    def __repr__(self):
+        """Return the ports as a dictionary."""
+        return repr(dict(self.items()))
+
+
+class DeviceSequence(collections.abc.Sequence):
+
+    """List the devices of the table in the order they were made.
+
+    Parameters
+    ----------
+    table: instance of the DeviceTable() class.
+
+    Public methods
+    --------------
+    No public methods other than those of a list.
+    """
+
+    def __init__(self, table):
+        """Initialise the table listed."""
+        self.table = table
+
+    def __iter__(self):
+        """Iterate over views of the devices."""
+        table = self.table
+        for slot, kind in enumerate(table.kinds):
+            if kind >= 0:
+                yield DeviceView(table, slot)
+
+    def __len__(self):
+        """Return the number of devices."""
+        return self.table.no_of_devices
+
+    def __getitem__(self, index):
+        """Return a view of the device at the index."""
+        devices = list(self)
+        return devices[index]
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Generate synthetic definition files of any size.
+
+This script writes definition files, in the syntax of EBNF.txt, for a few
+parameterised circuits: ripple-carry adders, D-type shift registers, clock
+dividers made of toggling D-types and random acyclic networks of gates. The
+netlists can also be built directly into the devices and network, which the
+benchmarks use to time building separately from parsing.
+
+A netlist is a tuple (device_list, connection_list, monitor_list), where
+device_list holds (kind, name, property) tuples using the keywords of the
+definition file and the property as in the file (a waveform string for a
+SIGGEN), connection_list holds (output, input) signal name pairs and
+monitor_list holds output signal names.
+
+Usage
+-----
+Show help: generate.py -h
+Ripple-carry adder of about 1000 devices: generate.py -t adder -n 1000 <path>
+Random network with a chosen seed: generate.py -t random -n 500 -s 7 <path>
+"""
+import collections
+import getopt
+import random
+import sys
+
+
+def make_adder(bits):
+    """Return the netlist of a ripple-carry adder of the given bits.
+
+    Each bit is a full adder of two XORs, two ANDs and an OR, fed by
+    switches for the two operands and the carry in.
+    """
+    device_list = [("SWITCH", "CIN", 1)]
+    connection_list = []
+    monitor_list = []
+    carry = "CIN"
+    for bit in range(bits):
+        a, b = "A" + str(bit), "B" + str(bit)
+        half, total = "H" + str(bit), "S" + str(bit)
+        first, second = "P" + str(bit), "G" + str(bit)
+        carry_out = "C" + str(bit)
+        device_list += [("SWITCH", a, bit % 2), ("SWITCH", b, 1),
+                        ("XOR", half, None), ("XOR", total, None),
+                        ("AND", first, 2), ("AND", second, 2),
+                        ("OR", carry_out, 2)]
+        connection_list += [(a, half + ".I1"), (b, half + ".I2"),
+                            (half, total + ".I1"), (carry, total + ".I2"),
+                            (a, first + ".I1"), (b, first + ".I2"),
+                            (half, second + ".I1"), (carry, second + ".I2"),
+                            (first, carry_out + ".I1"),
+                            (second, carry_out + ".I2")]
+        monitor_list.append(total)
+        carry = carry_out
+    monitor_list.append(carry)
+    return device_list, connection_list, monitor_list
+
+
+def make_shift_register(size):
+    """Return the netlist of a shift register of size D-types."""
+    device_list = [("CLOCK", "CK", 1), ("SWITCH", "DIN", 1),
+                   ("SWITCH", "ZERO", 0)]
+    connection_list = []
+    data = "DIN"
+    for number in range(size):
+        d_type = "D" + str(number)
+        device_list.append(("DTYPE", d_type, None))
+        connection_list += [("CK", d_type + ".CLK"),
+                            (data, d_type + ".DATA"),
+                            ("ZERO", d_type + ".SET"),
+                            ("ZERO", d_type + ".CLEAR")]
+        data = d_type + ".Q"
+    return device_list, connection_list, [data]
+
+
+def make_clock_divider(stages):
+    """Return the netlist of a chain of D-types each halving its clock.
+
+    Every D-type feeds its QBAR back to its DATA input, so it toggles at
+    each rising edge of the previous stage.
+    """
+    device_list = [("CLOCK", "CK", 1), ("SWITCH", "ZERO", 0)]
+    connection_list = []
+    monitor_list = []
+    clock = "CK"
+    for number in range(stages):
+        d_type = "D" + str(number)
+        device_list.append(("DTYPE", d_type, None))
+        connection_list += [(clock, d_type + ".CLK"),
+                            (d_type + ".QBAR", d_type + ".DATA"),
+                            ("ZERO", d_type + ".SET"),
+                            ("ZERO", d_type + ".CLEAR")]
+        clock = d_type + ".Q"
+        if number < 8:
+            monitor_list.append(clock)
+    return device_list, connection_list, monitor_list
+
+
+def make_random_network(size, seed=0, max_inputs=4):
+    """Return the netlist of a random acyclic network of size devices.
+
+    One device in ten is a switch, and every gate reads outputs of devices
+    made before it, so the network has no feedback and always settles.
+    Gates read the oldest unused outputs first, since the parser rejects
+    devices whose outputs are not used, and the outputs left unused at the
+    end are monitored.
+    """
+    rng = random.Random(seed)
+    device_list = []
+    connection_list = []
+    outputs = []
+    unused = collections.OrderedDict()  # outputs not read by any gate yet
+    no_of_switches = max(2, size // 10)
+    for number in range(no_of_switches):
+        switch = "SW" + str(number)
+        device_list.append(("SWITCH", switch, rng.randint(0, 1)))
+        outputs.append(switch)
+        unused[switch] = None
+    for number in range(size - no_of_switches):
+        gate = "G" + str(number)
+        kind = rng.choice(["AND", "OR", "NAND", "NOR", "XOR"])
+        if kind == "XOR":
+            no_of_inputs = 2
+            device_list.append((kind, gate, None))
+        else:
+            no_of_inputs = rng.randint(1, max_inputs)
+            device_list.append((kind, gate, no_of_inputs))
+        for input_number in range(1, no_of_inputs + 1):
+            if input_number == 1 or len(unused) > 4:
+                output, _ = unused.popitem(last=False)
+            else:
+                output = rng.choice(outputs)
+                unused.pop(output, None)
+            connection_list.append((output,
+                                    gate + ".I" + str(input_number)))
+        outputs.append(gate)
+        unused[gate] = None
+    return device_list, connection_list, list(unused)
+
+
+# topologies stores {name: (function of the size, devices per unit size)}
+topologies = {"adder": (make_adder, 7),
+              "shift": (make_shift_register, 1),
+              "divider": (make_clock_divider, 1),
+              "random": (make_random_network, 1)}
+
+
+def make_netlist(topology, size, seed=0):
+    """Return the netlist of the topology with about size devices."""
+    if topology not in topologies:
+        raise ValueError("Expected topology to be one of "
+                         + ", ".join(topologies) + ".")
+    function, devices_per_unit = topologies[topology]
+    units = max(1, size // devices_per_unit)
+    if topology == "random":
+        return function(max(units, 3), seed)
+    return function(units)
+
+
+def write_definition_file(netlist, file):
+    """Write the netlist to a text file as a definition file."""
+    device_list, connection_list, monitor_list = netlist
+    lines = ["DEVICE:"]
+    for kind, name, device_property in device_list:
+        if device_property is None:
+            lines.append("%s %s;" % (kind, name))
+        else:
+            lines.append("%s %s = %s;" % (kind, name, device_property))
+    lines.append("")
+    lines.append("CONNECTION:")
+    lines.extend("CON %s -> %s;" % connection for connection
+                 in connection_list)
+    lines.append("")
+    lines.append("MONITOR:")
+    lines.extend("MON %s;" % signal for signal in monitor_list)
+    lines.append("")
+    file.write("\n".join(lines))
+
+
+def build_netlist(netlist, names, devices, network, monitors):
+    """Make the devices, connections and monitors of the netlist.
+
+    Return True if successful.
+    """
+    device_list, connection_list, monitor_list = netlist
+    for kind, name, device_property in device_list:
+        [device_id, kind_id] = names.lookup([name, kind])
+        if devices.make_device(device_id, kind_id,
+                               device_property) != devices.NO_ERROR:
+            return False
+    for output, input_signal in connection_list:
+        if network.make_connection(
+                *devices.get_signal_ids(output),
+                *devices.get_signal_ids(input_signal)) != network.NO_ERROR:
+            return False
+    for signal in monitor_list:
+        if monitors.make_monitor(
+                *devices.get_signal_ids(signal)) != monitors.NO_ERROR:
+            return False
+    return True
+
+
+def main(arg_list):
+    """Parse the command line options and write the definition file."""
+    usage_message = ("Usage:\n"
+                     "Show help: generate.py -h\n"
+                     "Write a definition file: generate.py [-t topology] "
+                     "[-n devices] [-s seed] <file path>\n"
+                     "Topologies: " + ", ".join(topologies))
+    try:
+        options, arguments = getopt.getopt(arg_list, "ht:n:s:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit()
+
+    topology = "random"
+    size = 100
+    seed = 0
+    try:
+        for option, value in options:
+            if option == "-h":
+                print(usage_message)
+                sys.exit()
+            elif option == "-t":
+                topology = value
+            elif option == "-n":
+                size = int(value)
+            elif option == "-s":
+                seed = int(value)
+    except ValueError:
+        print("Error: expected an integer option value\n")
+        print(usage_message)
+        sys.exit()
+
+    if topology not in topologies:
+        print("Error: unknown topology\n")
+        print(usage_message)
+        sys.exit()
+    if len(arguments) != 1:  # wrong number of arguments
+        print("Error: one file path required\n")
+        print(usage_message)
+        sys.exit()
+
+    [path] = arguments
+    with open(path, "w") as file:
+        write_definition_file(make_netlist(topology, size, seed), file)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
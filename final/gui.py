@@ -19,6 +19,8 @@ from network import Network
 from monitors import Monitors
 from scanner import Scanner
 from parse import Parser
+from session import Session
+from traces import get_runs
 import gettext 
 gettext.bindtextdomain('base', 'locale/')
 gettext.textdomain('base')
@@ -63,6 +65,7 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         self.devices = devices
         self.help_text = []
         self.oscillating = False
+        self.oscillating_names = []  # devices found oscillating
         self.not_connected = False
 
 
@@ -133,16 +136,20 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         self.render_text(name, 10, y + 5)
         GL.glColor3f(self.line_colour[0], self.line_colour[1], self.line_colour[2])
         GL.glBegin(GL.GL_LINE_STRIP)
-        for i in range(len(values)):
+        # Draw each run of equal signals as one segment, so that the cost
+        # grows with the number of transitions rather than cycles
+        i = 0
+        for signal, run_length in get_runs(values):
             x0 = (i * 20) + x
-            x1 = (i * 20) + x + 20
-            if values[i]:
+            x1 = ((i + run_length) * 20) + x
+            if signal:
                 y0 = y + 25
             else:
                 y0 = y
 
             GL.glVertex2f(x0, y0)
             GL.glVertex2f(x1, y0)
+            i += run_length
         GL.glEnd()
         GL.glFlush()
      
@@ -174,6 +181,10 @@ class MyGLCanvas(wxcanvas.GLCanvas):
             self.render_text(_('Not all inputs connected...'), 10, self.canvas_size[1] - 60)
         elif self.oscillating:
             self.render_text(_('Network Oscillating...'), 10, self.canvas_size[1] - 60)
+            if self.oscillating_names:
+                self.render_text(_('Oscillating devices: ') +
+                                 ", ".join(self.oscillating_names), 10,
+                                 self.canvas_size[1] - 80)
         else:
             for j in range(signal_no):
                 self.render_trace(display_x, display_ys[j],
@@ -297,7 +308,7 @@ class Gui(wx.Frame):
 
     Public methods
     --------------
-    on_menu(self, event): Event handler for the file menu.
+    on_menu(self, event): Event handler for the file and profiling menus.
 
     on_spin(self, event): Event handler for when the user changes the spin
                            control value.
@@ -314,6 +325,8 @@ class Gui(wx.Frame):
         self.open_id = 99
         self.help_id = 98
         self.home_id = 97
+        self.profile_id = 96
+        self.stats_id = 95
         # Configure the file menu
         fileMenu = wx.Menu()
         menuBar = wx.MenuBar()
@@ -321,6 +334,11 @@ class Gui(wx.Frame):
         fileMenu.Append(wx.ID_EXIT, _("&Exit"))
         fileMenu.Append(self.open_id, _("Open File"))
         menuBar.Append(fileMenu, _("&File"))
+        # Configure the profiling menu
+        profileMenu = wx.Menu()
+        profileMenu.AppendCheckItem(self.profile_id, _("&Profile Simulation"))
+        profileMenu.Append(self.stats_id, _("Show &Statistics"))
+        menuBar.Append(profileMenu, _("&Profile"))
         self.SetMenuBar(menuBar)
 
         # Canvas for drawing signals
@@ -338,6 +356,8 @@ class Gui(wx.Frame):
         self.devices = devices
         self.network = network
         self.monitors = monitors
+        # session re-simulates only the cycles changed by a switch or monitor
+        self.session = Session(names, devices, network, monitors)
 
         self.switch_ids = self.devices.find_devices(self.devices.SWITCH)
         if len(self.switch_ids) == 0:
@@ -370,12 +390,19 @@ class Gui(wx.Frame):
         # Configure the widgets
         self.text = wx.StaticText(self, wx.ID_ANY, _("Cycles to Run"))
         self.spin = wx.SpinCtrl(self, wx.ID_ANY, "10")
+        self.text_seed = wx.StaticText(self, wx.ID_ANY, _("Seed (blank for random)"))
+        if self.devices.seed is None:
+            self.seed_text = wx.TextCtrl(self, wx.ID_ANY, "")
+        else:
+            self.seed_text = wx.TextCtrl(self, wx.ID_ANY, str(self.devices.seed))
         self.run_button = wx.Button(self, wx.ID_ANY, _("Run"))
         self.continue_button = wx.Button(self, wx.ID_ANY, _("Continue"))
         self.text_switch_control = wx.StaticText(self, wx.ID_ANY, _("Switch Input"))
         self.switch_choice = wx.ComboBox(self, wx.ID_ANY, "SWITCH", choices = self.switch_names)  
         self.switch_choice.SetValue(self.switch_names[0])
         self.switch_choice_value = wx.RadioBox(self,wx.ID_ANY,choices=["0","1"])
+        self.text_switch_cycle = wx.StaticText(self, wx.ID_ANY, _("From Cycle"))
+        self.switch_cycle = wx.SpinCtrl(self, wx.ID_ANY, "0")
         self.unmonitored_choice = wx.ComboBox(self, wx.ID_ANY, "UNMONITORED", choices=self.sig_n_mons) 
         self.monitored_choice = wx.ComboBox(self, wx.ID_ANY, "MONITORED", choices=self.sig_mons) 
         self.unmonitored_choice.SetValue(self.sig_n_mons[0])
@@ -407,12 +434,15 @@ class Gui(wx.Frame):
         side_sizer4 = wx.BoxSizer(wx.HORIZONTAL)
         side_sizer5 = wx.BoxSizer(wx.HORIZONTAL)
         side_sizer6 = wx.BoxSizer(wx.HORIZONTAL)
+        side_sizer7 = wx.BoxSizer(wx.HORIZONTAL)
 
         main_sizer.Add(self.canvas, 5, wx.EXPAND | wx.ALL, 5)
         main_sizer.Add(side_sizer, 1, wx.ALL, 5)
 
         side_sizer.Add(self.text, 1, wx.ALL, 10)
         side_sizer.Add(self.spin, 0, wx.EXPAND | wx.LEFT, 10)
+        side_sizer.Add(self.text_seed, 0, wx.ALL, 10)
+        side_sizer.Add(self.seed_text, 0, wx.EXPAND | wx.LEFT, 10)
         side_sizer.Add(side_sizer3, 0, wx.ALL, 5)
         side_sizer3.Add(self.run_button, 0, wx.EXPAND | wx.LEFT, 15)
         side_sizer3.Add(self.continue_button, 0, wx.EXPAND | wx.LEFT, 35) 
@@ -421,6 +451,9 @@ class Gui(wx.Frame):
         side_sizer.Add(side_sizer4, 0, wx.ALL, 0)
         side_sizer4.Add(self.switch_choice, 0, wx.ALL, 15)
         side_sizer4.Add(self.switch_choice_value,0, wx.EXPAND | wx.LEFT, 30)
+        side_sizer.Add(side_sizer7, 0, wx.ALL, 0)
+        side_sizer7.Add(self.text_switch_cycle, 0, wx.ALL, 10)
+        side_sizer7.Add(self.switch_cycle, 0, wx.EXPAND | wx.LEFT, 10)
 
         side_sizer.Add(self.text_add_monitor, 1, wx.ALL, 10)
         side_sizer.Add(side_sizer5, 1, wx.ALL, 5)
@@ -484,14 +517,26 @@ class Gui(wx.Frame):
 
             self.Close(True)
             names = Names()
-            devices = Devices(names)
-            network = Network(names, devices)
+            devices = Devices(names, self.devices.seed)
+            network = Network(names, devices, self.network.engine)
             monitors = Monitors(names, devices, network)
             scanner = Scanner(new_path, names)
             parser = Parser(names, devices, network, monitors, scanner)
             if parser.parse_network():
                 gui = Gui(_("Logic Simulator"), new_path, names, devices, network, monitors)
                 gui.Show(True)
+        if Id == self.profile_id:
+            if event.IsChecked():
+                self.network.enable_profiling(self.monitors)
+            else:
+                self.network.disable_profiling()
+        if Id == self.stats_id:
+            if self.network.stats is None:
+                text = _("Select Profile Simulation, then run the network.")
+            else:
+                text = "\n".join(self.network.stats.get_report())
+            wx.MessageBox(text, _("Profiling Statistics"),
+                          wx.ICON_INFORMATION | wx.OK)
  
                           
 
@@ -504,11 +549,21 @@ class Gui(wx.Frame):
     def on_run_button(self, event):
         """Handle the event when the user clicks the run button."""
         spin_value = self.spin.GetValue()
+        seed_value = self.seed_text.GetValue().strip()
+        if seed_value == "":
+            self.devices.set_seed(None)
+        else:
+            try:
+                self.devices.set_seed(int(seed_value))
+            except ValueError:
+                self.canvas.render(_("Seed must be an integer."))
+                return
 
         self.time_steps = spin_value
         self.run_network_and_get_values()
 
-        text = "Run button pressed. (self.time_steps=%d)" % self.time_steps
+        text = "Run button pressed. (self.time_steps=%d, seed=%s)" % (
+            self.time_steps, self.monitors.seed)
         self.canvas.render(text)
 
     def on_continue_button(self, event):
@@ -543,8 +598,10 @@ class Gui(wx.Frame):
              sw_no = self.switch_names.index(sw_name)
              self.switch_values[sw_no] = [0, 1][self.switch_choice_value.GetSelection()]
              sw_id = self.names.query(sw_name)
-             self.devices.set_switch(sw_id, self.switch_choice_value.GetSelection())
-             self.continue_network()
+             # Only the cycles from the chosen cycle on are simulated again
+             cycle = min(self.switch_cycle.GetValue(), self.session.cycles)
+             self.session.set_switch(sw_id, self.switch_choice_value.GetSelection(), cycle)
+             self.get_values()
              text = ""
              self.canvas.render(text)
         else:
@@ -567,8 +624,8 @@ class Gui(wx.Frame):
         self.canvas.render('Add: ' + str(mon_choice_name))
 
         device_id = self.names.query(mon_choice_name_strt)
-        self.monitors.make_monitor(device_id, output_id)
-        self.run_network_and_get_values()
+        self.session.add_monitor(device_id, output_id)
+        self.get_values()
 
         self.exam_sig_n_mons.remove(mon_choice_name)
         self.exam_sig_mons.append(mon_choice_name)
@@ -601,8 +658,8 @@ class Gui(wx.Frame):
         self.canvas.render('Remove: ' + str(mon_choice_name))
 
         device_id = self.names.query(mon_choice_name_strt)
-        self.monitors.remove_monitor(device_id, output_id)
-        self.run_network_and_get_values()
+        self.session.remove_monitor(device_id, output_id)
+        self.get_values()
 
         self.exam_sig_n_mons.append(mon_choice_name)
         self.exam_sig_mons.remove(mon_choice_name)
@@ -626,43 +683,26 @@ class Gui(wx.Frame):
         self.canvas.render(text)
     
     def continue_network(self):
-
+        """Continue the network and get the monitored signal values."""
         self.canvas.not_connected = not self.network.check_network()
         if self.canvas.not_connected:
             return ''
-        osc_here = False
-        for i in range(self.time_steps):
-            if not self.network.execute_network():
-                self.canvas.oscillating = True
-                osc_here = True
-            self.monitors.record_signals()
-        if not osc_here:
-            self.canvas.oscillating = False
-        self.values = []
-
-        monitor_dict = self.monitors.monitors_dictionary
-        for device_id, output_id in monitor_dict:
-
-            self.values.append(monitor_dict[(device_id, output_id)])
-        self.trace_names = self.monitors.get_signal_names()[0]
-
-
+        self.session.continue_run(self.time_steps)
+        self.get_values()
 
     def run_network_and_get_values(self):
         """Run the network and get the monitored signal values."""
         self.canvas.not_connected = not self.network.check_network()
         if self.canvas.not_connected:
             return ''
-        self.devices.cold_startup()
-        self.monitors.reset_monitors()
-        osc_here = False
-        for i in range(self.time_steps):
-            if not self.network.execute_network():
-                self.canvas.oscillating = True
-                osc_here = True
-            self.monitors.record_signals()
-        if not osc_here:
-            self.canvas.oscillating = False
+        self.session.run(self.time_steps)
+        self.get_values()
+
+    def get_values(self):
+        """Get the monitored signal values and oscillation of the session."""
+        self.canvas.oscillating = self.session.oscillating
+        self.canvas.oscillating_names = self.session.oscillating_names
+        self.switch_cycle.SetRange(0, self.session.cycles)
         self.values = []
 
         monitor_dict = self.monitors.monitors_dictionary
@@ -673,7 +713,7 @@ class Gui(wx.Frame):
 
     def on_help_box(self, evnet):
        """Handle the event when the user needs help.""" 
-       text_help = _("User Guidance\n -Run button runs the program for n cycles, and you can change n in the controller above.\n -Continue button extends the program for n cycles.\n -The state of each switch can be changed bewteen 0/1 after choosing corresponding switch\n -The monitored output can also be changed the Add/Remove Button")
+       text_help = _("User Guidance\n -Run button runs the program for n cycles, and you can change n in the controller above.\n -Continue button extends the program for n cycles.\n -The state of each switch can be changed bewteen 0/1 after choosing corresponding switch, from the cycle chosen below it\n -The monitored output can also be changed the Add/Remove Button")
        dlg_help = wx.MessageDialog(self,text_help,"Help", wx.OK)
        dlg_help.ShowModal()
        dlg_help.Destroy()
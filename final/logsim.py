@@ -2,18 +2,28 @@
 """Parse command line options and arguments for the Logic Simulator.
 
 This script parses options and arguments specified on the command line, and
-runs either the command line user interface or the graphical user interface.
+runs either the command line user interface, the graphical user interface or
+a non-interactive batch run. wx and the GUI are only imported when the
+graphical user interface is used, so the other modes work without a display.
 
 Usage
 -----
 Show help: logsim.py -h
 Command line user interface: logsim.py -c <file path>
 Graphical user interface: logsim.py <file path>
+Choose the simulation engine: logsim.py -e event [-c] <file path>
+Gates read edges as new levels: logsim.py --edge-levels [-c] <file path>
+Reproducible cold start-up: logsim.py --seed 42 [-c] <file path>
+Write the monitored signals to a VCD file: logsim.py --vcd out.vcd -c <path>
+Batch run: logsim.py --batch --cycles 100 --set SW1=1 --monitor G1 <path>
+Profile a batch run: logsim.py --batch --cycles 100 --profile <path>
+Simulate only the logic reaching a monitor: logsim.py --prune [-c] <path>
+Fold constants and remove dead logic: logsim.py --batch --optimise <path>
+Command script: logsim.py --script commands.txt [--traces out.txt] -c <path>
 """
 import getopt
 import sys
-
-import wx
+import time
 
 from names import Names
 from devices import Devices
@@ -22,7 +32,106 @@ from monitors import Monitors
 from scanner import Scanner
 from parse import Parser
 from userint import UserInterface
-from gui import Gui
+from optimise import Optimiser
+from vcd import VCDWriter
+
+
+def run_batch(names, devices, network, monitors, cycles, switches,
+              signal_names, vcd_path=None, stats=False, profile=False,
+              prune=False, optimise=False):
+    """Run the simulation without user interaction.
+
+    switches is a list of (switch name, signal) pairs to set and
+    signal_names a list of signals to monitor, besides those of the
+    definition file. The traces are printed, or streamed to vcd_path, in
+    which case only the last cycle of each monitor is kept in memory. If
+    stats is True, the time taken is printed too, and if profile is True,
+    the profiling statistics of the network. If prune is True, only the
+    devices whose outputs reach a monitor are simulated, and if optimise is
+    True, the network is optimised after its first cycle and the changes
+    made are printed. Return True if successful.
+    """
+    for switch_name, signal in switches:
+        switch_id = names.query(switch_name)
+        if switch_id is None or not devices.set_switch(switch_id, signal):
+            print("Error: invalid switch", switch_name)
+            return False
+    for signal_name in signal_names:
+        [device_id, output_id] = devices.get_signal_ids(signal_name)
+        if monitors.make_monitor(device_id, output_id) not in [
+                monitors.NO_ERROR, monitors.MONITOR_PRESENT]:
+            print("Error: invalid monitor", signal_name)
+            return False
+    if not network.check_network():
+        print("Error: network has unconnected inputs")
+        return False
+    if prune:
+        monitors.set_pruning(True)
+
+    vcd_writer = None
+    if vcd_path is not None:
+        vcd_writer = VCDWriter(names, devices, network, monitors,
+                               open(vcd_path, "w"))
+        monitors.set_vcd_writer(vcd_writer)
+        monitors.set_window(1)
+    if profile:
+        network.enable_profiling(monitors)
+
+    optimiser = None
+    try:
+        start = time.perf_counter()
+        if optimise and cycles:
+            # The first cycle settles the constant signals that are folded
+            cycles_completed = network.run_cycles(1, monitors)
+            if cycles_completed == 1:
+                optimiser = Optimiser(names, devices, network, monitors)
+                optimiser.optimise_network()
+                cycles_completed += network.run_cycles(cycles - 1, monitors)
+        else:
+            cycles_completed = network.run_cycles(cycles, monitors)
+        seconds = time.perf_counter() - start
+    finally:
+        # The VCD file is completed and closed even if the run fails
+        if vcd_writer is not None:
+            vcd_writer.close()
+    if cycles_completed < cycles:
+        print("Error: network oscillating at cycle", cycles_completed)
+        oscillating_names = network.get_oscillating_names()
+        if oscillating_names:
+            print("Oscillating devices:", ", ".join(oscillating_names))
+
+    if vcd_writer is None:
+        monitors.display_signals()
+    if stats:
+        print("Cycles: %d, time: %.3f ms, per cycle: %.3f us, devices: %d"
+              % (cycles_completed, seconds * 1e3,
+                 seconds * 1e6 / max(cycles_completed, 1),
+                 len(devices.devices_list)))
+    if optimiser is not None:
+        print("\n".join(optimiser.get_report()))
+    if profile:
+        print("\n".join(network.disable_profiling().get_report()))
+    return cycles_completed == cycles
+
+
+def run_script(userint, script_path, trace_path=None):
+    """Execute a command script with the user interface.
+
+    The script is read from standard input if script_path is '-'. The
+    traces are written to trace_path if given, or printed otherwise.
+    """
+    trace_file = None
+    if trace_path is not None:
+        trace_file = open(trace_path, "w")
+    try:
+        if script_path == "-":
+            userint.run_script(sys.stdin, trace_file)
+        else:
+            with open(script_path) as script:
+                userint.run_script(script, trace_file)
+    finally:
+        if trace_file is not None:
+            trace_file.close()
 
 
 def main(arg_list):
@@ -34,37 +143,156 @@ def main(arg_list):
     usage_message = ("Usage:\n"
                      "Show help: logsim.py -h\n"
                      "Command line user interface: logsim.py -c <file path>\n"
-                     "Graphical user interface: logsim.py <file path>")
+                     "Graphical user interface: logsim.py <file path>\n"
+                     "Choose the simulation engine (levelized, event, "
+                     "vector or compiled): logsim.py -e <engine> [-c] "
+                     "<file path>\n"
+                     "Gates read RISING and FALLING inputs as the level "
+                     "they are heading to: logsim.py --edge-levels [-c] "
+                     "<file path>\n"
+                     "Seed the random cold start-up: "
+                     "logsim.py --seed <integer> [-c] <file path>\n"
+                     "Write the monitored signals to a VCD file: "
+                     "logsim.py --vcd <vcd path> -c <file path>\n"
+                     "Batch run: logsim.py --batch [--cycles <cycles>] "
+                     "[--set <switch>=<0 or 1>] [--monitor <signal>] "
+                     "[--vcd <vcd path>] [--stats] [--profile] <file "
+                     "path>\n"
+                     "Simulate only the devices whose outputs reach a "
+                     "monitor: logsim.py --prune [-c] <file path>\n"
+                     "Fold constants and remove dead logic in a batch run: "
+                     "logsim.py --batch --optimise <file path>\n"
+                     "Execute a command script ('-' reads standard input): "
+                     "logsim.py --script <script path> [--traces <trace "
+                     "path>] -c <file path>")
     try:
-        options, arguments = getopt.getopt(arg_list, "hc:")
+        options, arguments = getopt.getopt(
+            arg_list, "hc:e:", ["seed=", "vcd=", "batch", "cycles=", "set=",
+                                "monitor=", "stats", "profile", "script=",
+                                "traces=", "prune", "optimise",
+                                "edge-levels"])
     except getopt.GetoptError:
         print("Error: invalid command line arguments\n")
         print(usage_message)
         sys.exit()
 
+    engine = "levelized"
+    edge_levels = False
+    seed = None
+    vcd_path = None
+    batch = False
+    cycles = 10
+    switches = []
+    signal_names = []
+    stats = False
+    profile = False
+    prune = False
+    optimise = False
+    script_path = None
+    trace_path = None
+    for option, value in options:
+        if option == "-e":  # choose the simulation engine
+            engine = value
+        elif option == "--edge-levels":  # gates read edges as new levels
+            edge_levels = True
+        elif option == "--seed":  # seed the random cold start-up
+            try:
+                seed = int(value)
+            except ValueError:
+                print("Error: seed must be an integer\n")
+                print(usage_message)
+                sys.exit()
+        elif option == "--vcd":  # stream the monitored signals to a file
+            vcd_path = value
+        elif option == "--batch":  # run without user interaction
+            batch = True
+        elif option == "--cycles":
+            if not value.isdigit():
+                print("Error: cycles must be a non-negative integer\n")
+                print(usage_message)
+                sys.exit()
+            cycles = int(value)
+        elif option == "--set":  # set a switch before a batch run
+            switch_name, equals, signal = value.partition("=")
+            if signal not in ["0", "1"]:
+                print("Error: expected --set <switch>=<0 or 1>\n")
+                print(usage_message)
+                sys.exit()
+            switches.append((switch_name, int(signal)))
+        elif option == "--monitor":  # monitor a signal in a batch run
+            signal_names.append(value)
+        elif option == "--stats":  # print the time taken by a batch run
+            stats = True
+        elif option == "--profile":  # print the profiling statistics
+            profile = True
+        elif option == "--prune":  # simulate only the fan-in of monitors
+            prune = True
+        elif option == "--optimise":  # simplify the network of a batch run
+            optimise = True
+        elif option == "--script":  # execute the commands in a file
+            script_path = value
+        elif option == "--traces":  # write the traces of a script to a file
+            trace_path = value
+    if engine not in Network.engine_types:
+        print("Error: unknown simulation engine\n")
+        print(usage_message)
+        sys.exit()
+
     # Initialise instances of the four inner simulator classes
     names = Names()
-    devices = Devices(names)
-    network = Network(names, devices)
+    devices = Devices(names, seed)
+    network = Network(names, devices, engine, edge_levels=edge_levels)
     monitors = Monitors(names, devices, network)
     #names = None
     #devices = None
     #network = None
     #monitors = None
 
+    command_line = False
     for option, path in options:
         if option == "-h":  # print the usage message
             print(usage_message)
             sys.exit()
         elif option == "-c":  # use the command line user interface
+            command_line = True
             scanner = Scanner(path, names)
             parser = Parser(names, devices, network, monitors, scanner)
             if parser.parse_network():
+                if prune:
+                    monitors.set_pruning(True)
                 # Initialise an instance of the userint.UserInterface() class
                 userint = UserInterface(names, devices, network, monitors)
-                userint.command_interface()
+                vcd_writer = None
+                if vcd_path is not None:
+                    vcd_writer = VCDWriter(names, devices, network, monitors,
+                                           open(vcd_path, "w"))
+                    monitors.set_vcd_writer(vcd_writer)
+                try:
+                    if script_path is None:
+                        userint.command_interface()
+                    else:
+                        run_script(userint, script_path, trace_path)
+                finally:
+                    # The VCD file is completed and closed even if the
+                    # interface is left by an error or an interrupt
+                    if vcd_writer is not None:
+                        vcd_writer.close()
 
-    if not options:  # no option given, use the graphical user interface
+    if batch and not command_line:  # run without user interaction
+        if len(arguments) != 1:  # wrong number of arguments
+            print("Error: one file path required\n")
+            print(usage_message)
+            sys.exit()
+
+        [path] = arguments
+        scanner = Scanner(path, names)
+        parser = Parser(names, devices, network, monitors, scanner)
+        if not parser.parse_network() or not run_batch(
+                names, devices, network, monitors, cycles, switches,
+                signal_names, vcd_path, stats, profile, prune, optimise):
+            sys.exit(1)
+
+    elif not command_line:  # use the graphical user interface
 
         if len(arguments) != 1:  # wrong number of arguments
             print("Error: one file path required\n")
@@ -75,6 +303,12 @@ def main(arg_list):
         scanner = Scanner(path, names)
         parser = Parser(names, devices, network, monitors, scanner)
         if parser.parse_network():
+            if prune:
+                monitors.set_pruning(True)
+            # Only import the GUI now, since it needs wx and a display
+            import wx
+            from gui import Gui
+
             # Initialise an instance of the gui.Gui() class
             app = wx.App()
             gui = Gui("Logic Simulator", path, names, devices, network,
@@ -9,6 +9,9 @@ Monitors - records and displays specified output signals.
 
 """
 import collections
+import os
+
+from traces import RLETrace, WindowTrace, get_runs
 
 
 class Monitors:
@@ -37,11 +40,29 @@ class Monitors:
 
     record_signals(self): Records the current signal level of all monitors.
 
+    record_idle_cycles(self, cycles): Records the current signal level of all
+                                      monitors for a number of cycles.
+
     get_signal_names(self): Returns two lists of signal names: monitored and
                             not monitored.
 
     reset_monitors(self): Clears the memory of all monitors.
 
+    truncate_monitors(self, cycles): Removes the signals recorded from the
+                                     cycle on.
+
+    set_window(self, window, spill_directory=None): Keeps only the signals of
+                                the last window cycles, optionally writing
+                                the older ones to files.
+
+    set_vcd_writer(self, vcd_writer): Streams the recorded signals to a VCD
+                                      writer.
+
+    set_pruning(self, pruning): Simulates only the devices whose outputs
+                                reach a monitor.
+
+    update_pruning(self): Simulates the fan-in of the current monitors.
+
     get_margin(self): Returns the length of the longest monitor's name.
 
     display_signals(self): Displays signal trace(s) in the text console.
@@ -54,8 +75,22 @@ class Monitors:
         self.devices = devices
 
         # monitors_dictionary stores
-        # {(device_id, output_id): [signal_list]}
+        # {(device_id, output_id): signal_trace}, where each trace is an
+        # RLETrace, or a WindowTrace if a window is set
         self.monitors_dictionary = collections.OrderedDict()
+        # window is the number of cycles kept by each monitor (None keeps
+        # every cycle), and spill_directory is where the older signals are
+        # written (None discards them)
+        self.window = None
+        self.spill_directory = None
+        # vcd_writer is told about every recorded cycle (None if no VCD file
+        # is being written)
+        self.vcd_writer = None
+        # seed of the cold start-up the recorded signals begin from, so that
+        # the traces can be reproduced (None if the devices are not seeded)
+        self.seed = devices.seed
+        # pruning is True if only the fan-in of the monitors is simulated
+        self.pruning = False
 
         [self.NO_ERROR, self.NOT_OUTPUT,
          self.MONITOR_PRESENT] = self.names.unique_error_codes(3)
@@ -74,13 +109,60 @@ class Monitors:
             return self.MONITOR_PRESENT
         else:
             # If n simulation cycles have been completed before making this
-            # monitor, then initialise the signal trace with an n-length list
-            # of BLANK signals. Otherwise, initialise the trace with an empty
-            # list.
-            self.monitors_dictionary[(device_id, output_id)] = [
-                self.devices.BLANK] * cycles_completed
+            # monitor, then initialise the signal trace with n BLANK signals.
+            # Otherwise, initialise the trace empty.
+            trace = self.make_trace(device_id, output_id)
+            if isinstance(trace, RLETrace):
+                trace.append_run(self.devices.BLANK, cycles_completed)
+            else:
+                trace.extend([self.devices.BLANK] * cycles_completed)
+            self.monitors_dictionary[(device_id, output_id)] = trace
+            if self.pruning:
+                self.update_pruning()
             return self.NO_ERROR
 
+    def make_trace(self, device_id, output_id):
+        """Return an empty signal trace for the specified monitor.
+
+        The trace is an RLETrace, or a WindowTrace if a window has been set.
+        """
+        if self.window is None:
+            return RLETrace()
+        spill_file = None
+        if self.spill_directory is not None:
+            monitor_name = self.devices.get_signal_name(device_id, output_id)
+            spill_file = open(os.path.join(self.spill_directory,
+                                           monitor_name + ".trace"), "wb")
+        return WindowTrace(self.window, spill_file)
+
+    def set_window(self, window, spill_directory=None):
+        """Keep only the signals of the last window cycles in each monitor.
+
+        The signals are stored in preallocated ring buffers. If a spill
+        directory is given, the older signals of each monitor are written to
+        a file there named after the monitor, one byte per cycle. If window
+        is None, every signal is kept in an RLETrace again. The signals already
+        recorded are kept, up to the window, and written to the spill files
+        again, so a spill directory can be given again or changed.
+        """
+        if window is not None:
+            if not isinstance(window, int) or isinstance(window, bool):
+                raise TypeError("Expected window to be an integer.")
+            if window < 1:
+                raise ValueError("Expected window to be a positive integer.")
+        self.window = window
+        self.spill_directory = spill_directory
+        for monitor, old_trace in self.monitors_dictionary.items():
+            signals = old_trace
+            if isinstance(old_trace, WindowTrace):
+                # The spilled signals are read before make_trace can
+                # truncate the same spill file
+                signals = old_trace.read_recorded()
+                old_trace.close()
+            trace = self.make_trace(*monitor)
+            trace.extend(signals)
+            self.monitors_dictionary[monitor] = trace
+
     def remove_monitor(self, device_id, output_id):
         """Remove the specified signal from the monitors dictionary.
 
@@ -89,7 +171,11 @@ class Monitors:
         if (device_id, output_id) not in self.monitors_dictionary:
             return False
         else:
-            del self.monitors_dictionary[(device_id, output_id)]
+            trace = self.monitors_dictionary.pop((device_id, output_id))
+            if isinstance(trace, WindowTrace):
+                trace.close()
+            if self.pruning:
+                self.update_pruning()
             return True
 
     def get_monitor_signal(self, device_id, output_id):
@@ -111,6 +197,48 @@ class Monitors:
             signal_level = self.get_monitor_signal(device_id, output_id)
             self.monitors_dictionary[(device_id,
                                       output_id)].append(signal_level)
+        if self.vcd_writer is not None:
+            self.vcd_writer.write_cycle()
+
+    def record_idle_cycles(self, cycles):
+        """Record the current level of every monitor for a number of cycles.
+
+        Used for cycles in which the network does not change.
+        """
+        for (device_id, output_id), trace in \
+                self.monitors_dictionary.items():
+            trace.append_run(self.get_monitor_signal(device_id, output_id),
+                             cycles)
+        if self.vcd_writer is not None:
+            self.vcd_writer.skip_cycles(cycles)
+
+    def set_vcd_writer(self, vcd_writer):
+        """Stream the recorded signals to a vcd.VCDWriter() instance.
+
+        The changes of the monitored signals are written at every call of
+        record_signals. Set vcd_writer to None to stop.
+        """
+        self.vcd_writer = vcd_writer
+
+    def set_pruning(self, pruning):
+        """Simulate only the devices whose outputs reach a monitor.
+
+        The devices simulated are the transitive fan-in of the monitored
+        outputs, recomputed whenever a monitor is made or removed. A device
+        that enters the fan-in continues from the state it was left in, so
+        monitors should be made before running. Set pruning to False to
+        simulate every device again.
+        """
+        self.pruning = pruning
+        if pruning:
+            self.update_pruning()
+        else:
+            self.network.set_simulated_devices(None)
+
+    def update_pruning(self):
+        """Simulate only the fan-in of the current monitors."""
+        self.network.set_simulated_devices(
+            self.network.get_fan_in(list(self.monitors_dictionary)))
 
     def get_signal_names(self):
         """Return two signal name lists: monitored and not monitored."""
@@ -133,10 +261,26 @@ class Monitors:
     def reset_monitors(self):
         """Clear the memory of all the monitors.
 
-        The list of stored signal levels for each monitor is deleted.
+        The list of stored signal levels for each monitor is deleted, and the
+        current seed of the devices is recorded with the new traces.
         """
-        for device_id, output_id in self.monitors_dictionary:
-            self.monitors_dictionary[(device_id, output_id)] = []
+        self.seed = self.devices.seed
+        if self.vcd_writer is not None:
+            self.vcd_writer.restart()
+        for monitor, trace in self.monitors_dictionary.items():
+            if isinstance(trace, WindowTrace):
+                trace.clear()  # keeps its buffer and spill file
+            else:
+                self.monitors_dictionary[monitor] = RLETrace()
+
+    def truncate_monitors(self, cycles):
+        """Remove the signals recorded from the given cycle on.
+
+        This is used to record the cycles again after a change to the past
+        of the simulation. A VCD file being written is not truncated.
+        """
+        for trace in self.monitors_dictionary.values():
+            trace.truncate(cycles)
 
     def get_margin(self):
         """Return the length of the longest monitor's name.
@@ -156,22 +300,30 @@ class Monitors:
             return None
 
     def display_signals(self):
-        """Display the signal trace(s) in the text console."""
+        """Display the signal trace(s) in the text console.
+
+        The seed of the cold start-up is displayed first, if the devices are
+        seeded, so that the traces can be reproduced.
+        """
+        if self.seed is not None:
+            print("Seed:", self.seed)
         margin = self.get_margin()
         for device_id, output_id in self.monitors_dictionary:
             monitor_name = self.devices.get_signal_name(device_id, output_id)
             name_length = len(monitor_name)
             signal_list = self.monitors_dictionary[(device_id, output_id)]
             print(monitor_name + (margin - name_length) * " ", end=": ")
-            for signal in signal_list:
+            # Print a run of equal signals at once, so that the cost grows
+            # with the number of transitions rather than cycles
+            for signal, run_length in get_runs(signal_list):
                 if signal == self.devices.HIGH:
-                    print("-", end="")
+                    print("-" * run_length, end="")
                 if signal == self.devices.LOW:
-                    print("_", end="")
+                    print("_" * run_length, end="")
                 if signal == self.devices.RISING:
-                    print("/", end="")
+                    print("/" * run_length, end="")
                 if signal == self.devices.FALLING:
-                    print("\\", end="")
+                    print("\\" * run_length, end="")
                 if signal == self.devices.BLANK:
-                    print(" ", end="")
+                    print(" " * run_length, end="")
             print("\n", end="")
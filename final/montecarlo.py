@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Run a definition file from many random cold starts in parallel.
+
+This script parses a definition file once and simulates it from a cold start
+for every seed in a range, spread over a pool of processes. Each process
+simulates its seeds in bit-parallel chunks (see bitparallel.py) and returns
+only the number of runs in which every monitored signal was LOW, HIGH,
+RISING or FALLING in each cycle, so the traces themselves are never sent
+between processes.
+
+Usage
+-----
+Show help: montecarlo.py -h
+Run 1000 cold starts for 20 cycles: montecarlo.py -n 1000 -c 20 <file path>
+Choose the first seed and processes: montecarlo.py -s 5000 -p 4 <file path>
+"""
+import getopt
+import multiprocessing
+import sys
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from bitparallel import BitParallelSimulator
+
+# The network simulated by each worker process, set by init_worker
+worker_network = None
+
+
+def init_worker(names, devices, network, monitors):
+    """Store the network shipped to a worker process."""
+    global worker_network
+    worker_network = (names, devices, network, monitors)
+
+
+def count_bits(word):
+    """Return the number of bits set in a non-negative integer."""
+    return bin(word).count("1")
+
+
+def simulate_seeds(seeds, cycles, network_objects=None):
+    """Simulate a cold start for every seed.
+
+    Return (histograms, oscillating_seeds), where histograms stores
+    {(device_id, output_id): [[runs per signal] for each cycle]} for the
+    monitors, the signals being LOW, HIGH, RISING and FALLING in that order.
+    The network is the one stored by init_worker unless network_objects is
+    given as (names, devices, network, monitors).
+    """
+    if network_objects is None:
+        network_objects = worker_network
+    names, devices, network, monitors = network_objects
+    simulator = BitParallelSimulator(names, devices, network, monitors, seeds)
+    if not simulator.run_network(cycles):
+        return None
+
+    histograms = {}
+    for monitor, words in simulator.traces.items():
+        histogram = []
+        for level, pending in words:
+            histogram.append([count_bits(simulator.mask & ~level & ~pending),
+                              count_bits(level & ~pending),
+                              count_bits(level & pending),
+                              count_bits(~level & pending)])
+        histograms[monitor] = histogram
+    oscillating_seeds = [simulator.seeds[instance] for instance
+                         in simulator.get_unsteady_instances()]
+    return histograms, oscillating_seeds
+
+
+def simulate_chunk(arguments):
+    """Call simulate_seeds with a (seeds, cycles) pair, for Pool.imap."""
+    seeds, cycles = arguments
+    return simulate_seeds(seeds, cycles)
+
+
+def merge_histograms(total, histograms):
+    """Add the counts of histograms into total."""
+    for monitor, histogram in histograms.items():
+        if monitor not in total:
+            total[monitor] = [[0, 0, 0, 0] for _ in histogram]
+        for total_counts, counts in zip(total[monitor], histogram):
+            for signal, count in enumerate(counts):
+                total_counts[signal] += count
+
+
+def run_monte_carlo(names, devices, network, monitors, seeds, cycles,
+                    processes=None, chunk_size=64):
+    """Simulate a cold start for every seed, using a pool of processes.
+
+    The seeds are split into chunks of chunk_size which are simulated
+    bit-parallel, so the results do not depend on the number of processes.
+    If processes is 1, the chunks are simulated in this process. Return
+    (histograms, oscillating_seeds) as simulate_seeds does, or None if the
+    network has an unconnected input.
+    """
+    if cycles < 0:
+        raise ValueError("Expected cycles to be a non-negative integer.")
+    if chunk_size < 1:
+        raise ValueError("Expected chunk_size to be a positive integer.")
+    seeds = list(seeds)
+    tasks = [(seeds[start:start + chunk_size], cycles)
+             for start in range(0, len(seeds), chunk_size)]
+    network_objects = (names, devices, network, monitors)
+
+    if processes == 1:
+        results = [simulate_seeds(chunk, chunk_cycles, network_objects)
+                   for chunk, chunk_cycles in tasks]
+    else:
+        with multiprocessing.Pool(processes, init_worker,
+                                  network_objects) as pool:
+            results = pool.map(simulate_chunk, tasks)
+
+    histograms = {}
+    oscillating_seeds = []
+    for result in results:
+        if result is None:
+            return None
+        merge_histograms(histograms, result[0])
+        oscillating_seeds.extend(result[1])
+    return histograms, oscillating_seeds
+
+
+def display_histograms(devices, histograms, oscillating_seeds, runs):
+    """Print the number of runs with each signal for every monitor."""
+    print(runs, "runs,", len(oscillating_seeds), "oscillating")
+    if oscillating_seeds:
+        print("Oscillating seeds:", ", ".join(str(seed)
+                                              for seed in oscillating_seeds))
+    for (device_id, output_id), histogram in histograms.items():
+        print(devices.get_signal_name(device_id, output_id))
+        print("  cycle      LOW     HIGH   RISING  FALLING")
+        for cycle, counts in enumerate(histogram):
+            print("%7d %8d %8d %8d %8d" % tuple([cycle] + counts))
+
+
+def main(arg_list):
+    """Parse the command line options and run the Monte Carlo simulation."""
+    usage_message = ("Usage:\n"
+                     "Show help: montecarlo.py -h\n"
+                     "Run cold starts: montecarlo.py [-n runs] [-c cycles] "
+                     "[-s first seed] [-p processes] <file path>")
+    try:
+        options, arguments = getopt.getopt(arg_list, "hn:c:s:p:")
+    except getopt.GetoptError:
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit()
+
+    runs = 1000
+    cycles = 20
+    first_seed = 0
+    processes = None
+    try:
+        for option, value in options:
+            if option == "-h":
+                print(usage_message)
+                sys.exit()
+            elif option == "-n":
+                runs = int(value)
+            elif option == "-c":
+                cycles = int(value)
+            elif option == "-s":
+                first_seed = int(value)
+            elif option == "-p":
+                processes = int(value)
+    except ValueError:
+        print("Error: expected an integer option value\n")
+        print(usage_message)
+        sys.exit()
+
+    if len(arguments) != 1:  # wrong number of arguments
+        print("Error: one file path required\n")
+        print(usage_message)
+        sys.exit()
+
+    [path] = arguments
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    scanner = Scanner(path, names)
+    parser = Parser(names, devices, network, monitors, scanner)
+    if parser.parse_network():
+        seeds = range(first_seed, first_seed + runs)
+        result = run_monte_carlo(names, devices, network, monitors, seeds,
+                                 cycles, processes)
+        if result is None:
+            print("Error: network has unconnected inputs")
+        else:
+            display_histograms(devices, result[0], result[1], runs)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -17,7 +17,9 @@ class Names:
     and their corresponding name IDs, which are internal indexing integers. It
     provides functions for looking up either the name ID or the name string.
     It also keeps track of the number of error codes defined by other classes,
-    and allocates new, unique error codes on demand.
+    and allocates new, unique error codes on demand. The name IDs are kept in
+    a dictionary alongside the list of names, so that both directions of the
+    lookup take constant time.
 
     Parameters
     ----------
@@ -42,7 +44,8 @@ class Names:
         """Initialise names list."""
         self.error_code_count = 0  # how many error codes have been declared
         self.names = []
-        
+        self.name_ids = {}  # name string -> name ID, the inverse of names
+
     def unique_error_codes(self, num_error_codes):
         """Return a list of unique integer error codes."""
         if not isinstance(num_error_codes, int):
@@ -61,32 +64,36 @@ class Names:
             raise TypeError("Expected type for a name_string should be a string!")       
             
         else:
-            if name_string in self.names:
-                return self.names.index(name_string)
-            else:
-                return None           
+            return self.name_ids.get(name_string)
 
     def lookup(self, name_string_list):
         """Return a list of name IDs for each name string in name_string_list.
 
-        If the name string is not present in the names list, add it.
+        If the name string is not present in the names list, add it. A batch
+        of names which are all present is looked up in a single pass.
         """
         
         if not isinstance(name_string_list, list):
             raise TypeError("Expected type for a name_string_list should be a list!")
         
         else:
-            name_ids = []
-            
+            name_ids = self.name_ids
+            try:
+                # Fast path: every name in the batch is already present
+                return [name_ids[name] for name in name_string_list]
+            except KeyError:
+                pass
+
+            id_list = []
             for name in name_string_list:
-                if name in self.names:
-                    name_ids.append(self.names.index(name))
-                else:
+                name_id = name_ids.get(name)
+                if name_id is None:
+                    name_id = len(self.names)
+                    name_ids[name] = name_id
                     self.names.append(name)
-                    name_ids.append(self.names.index(name))
-                    
-            return name_ids
-        
+                id_list.append(name_id)
+            return id_list
+
     def get_name_string(self, name_id):
         """Return the corresponding name string for name_id.
 
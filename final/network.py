@@ -6,6 +6,11 @@ Classes
 --------
 Network - builds and executes the network.
 """
+import array
+import heapq
+import time
+
+from profiling import NetworkStats
 
 
 class Network:
@@ -18,7 +23,19 @@ class Network:
 
     Parameters
     ----------
+    names - instance of the names.Names() class.
     devices - instance of the devices.Devices() class.
+    engine - simulation engine used by execute_network: "levelized" (the
+             default) executes every device in every iteration, "event" only
+             executes the devices whose inputs have changed, "vector" uses
+             NumPy arrays and "compiled" calls Python code generated for the
+             netlist.
+    iteration_limit - largest number of iterations a simulation cycle may
+                      take to settle (optional). By default, it is derived
+                      from the logic depth of the network.
+    edge_levels - if True, gates read a RISING or FALLING input as the level
+                  it is heading to (optional). By default they compare
+                  signal codes.
 
     Public methods
     --------------
@@ -68,20 +85,178 @@ class Network:
 
     update_rc(self): If it is time to do so, sets RC signals to FALLING
 
+    get_fan_in(self, signals): Returns the devices whose outputs reach the
+                               signals.
+
+    set_simulated_devices(self, device_ids): Simulates only the given
+                                             devices, or all if None.
+
+    find_simulated_devices(self, device_kind): Returns the simulated devices
+                                               of the given kind.
+
+    compile_network(self): Builds the levelized evaluation schedule of the
+                           logic gates from the connection graph.
+
+    execute_loop(self, loop): Executes a feedback loop of gates until it
+                              settles.
+
+    execute_events(self): Executes the devices whose inputs have changed for
+                          one simulation cycle.
+
+    set_iteration_limit(self, iteration_limit): Sets the largest number of
+                             iterations to settle, or None to derive it.
+
+    get_network_state(self): Returns the signals and D-type memories of the
+                             network as a hashable state.
+
+    get_state_devices(self): Returns the device ID of each item of the
+                             network state.
+
+    record_state(self, states, state): Records a state reached while
+                                       settling, and spots a repeat.
+
+    find_last_changing_devices(self, states): Returns the devices changed in
+                                              the last recorded state.
+
+    get_oscillating_names(self): Returns the names of the devices found
+                                 oscillating in the last cycle.
+
+    get_snapshot_parts(self): Returns the device kind, attribute and array
+                              type of each device state in a snapshot.
+
+    snapshot(self): Returns the signals and device states of the network as
+                    an immutable bytes object.
+
+    restore(self, snapshot, device_ids=None): Restores the signals and
+                                device states of a snapshot.
+
     execute_network(self): Executes all the devices in the network for one
                            simulation cycle.
+
+    get_siggen_idle_cycles(self, wave, counter, level): Returns the number
+                             of cycles before a siggen leaves the level.
+
+    get_idle_cycles(self): Returns the number of cycles for which a settled
+                           network stays unchanged.
+
+    skip_idle_cycles(self, cycles): Advances the clocks, siggens and RCs
+                                    over cycles in which nothing changes.
+
+    run_cycles(self, cycles, monitors=None): Executes the network for a
+                                number of cycles, skipping idle stretches.
+
+    enable_profiling(self, monitors=None): Starts counting and timing the
+                                           simulation cycles.
+
+    disable_profiling(self): Stops profiling and returns the statistics.
     """
 
-    def __init__(self, names, devices):
+    engine_types = ["levelized", "event", "vector", "compiled"]
+
+    # Smallest iteration limit derived from the logic depth
+    minimum_iteration_limit = 20
+
+    def __init__(self, names, devices, engine="levelized",
+                 iteration_limit=None, edge_levels=False):
         """Initialise network errors and the steady_state variable."""
+        if engine not in self.engine_types:
+            raise ValueError("Expected engine to be one of " +
+                             ", ".join(self.engine_types) + ".")
         self.names = names
         self.devices = devices
+        self.engine = engine
 
         [self.NO_ERROR, self.INPUT_TO_INPUT, self.OUTPUT_TO_OUTPUT,
          self.INPUT_CONNECTED, self.PORT_ABSENT,
          self.DEVICE_ABSENT] = self.names.unique_error_codes(6)
         self.steady_state = True  # for checking if signals have settled
 
+        # Number of iterations to wait for the signals to settle before
+        # declaring the network unstable. Oscillations are normally found
+        # sooner, when the network returns to a state it has been in during
+        # the same cycle. fixed_iteration_limit is None when the limit is
+        # derived from the logic depth by compile_network.
+        self.fixed_iteration_limit = None
+        self.iteration_limit = self.minimum_iteration_limit
+        self.logic_depth = 0
+        self.set_iteration_limit(iteration_limit)
+        # Devices whose outputs changed in the repeating states of the last
+        # cycle that oscillated
+        self.oscillating_devices = []
+        # The last state recorded by record_state
+        self.last_state = None
+
+        # signal_levels stores the level each signal is at or heading to
+        self.signal_levels = {self.devices.LOW: self.devices.LOW,
+                              self.devices.HIGH: self.devices.HIGH,
+                              self.devices.RISING: self.devices.HIGH,
+                              self.devices.FALLING: self.devices.LOW}
+        # gate_signals stores the signal a gate reads for each input signal.
+        # Gates compare signal codes, so an AND or NAND gate reads RISING and
+        # FALLING as not HIGH, and an OR or NOR gate as not LOW. With
+        # edge_levels they read the level a signal is heading to, so a chain
+        # of gates settles in one pass, but a clock derived through gates can
+        # then reach a D-type an iteration earlier and capture different data.
+        self.edge_levels = edge_levels
+        if edge_levels:
+            self.gate_signals = dict(self.signal_levels)
+        else:
+            self.gate_signals = {signal: signal for signal in
+                                 self.signal_levels}
+        # (x, y) arguments of execute_gate for each gate kind
+        self.gate_rules = {
+            self.devices.AND: (self.devices.HIGH, self.devices.HIGH),
+            self.devices.OR: (self.devices.LOW, self.devices.LOW),
+            self.devices.NAND: (self.devices.HIGH, self.devices.LOW),
+            self.devices.NOR: (self.devices.LOW, self.devices.HIGH),
+            self.devices.XOR: (None, None)}
+
+        # schedule stores one (gate_ids, loops) pair per logic level, see
+        # compile_network. It is rebuilt whenever the network changes.
+        self.schedule = None
+        self.schedule_revision = None
+        self.gate_arguments = {}
+
+        # fanout stores {(device_id, output_id): [(device_id, input_id)]}.
+        # The event engine executes the devices of the schedule as a list of
+        # elements, in the same order as the levelized engine, and keeps the
+        # elements that still have to be executed in pending_elements.
+        self.fanout = {}
+        self.elements = []
+        self.element_index = {}
+        self.element_fanout = []
+        self.pending_elements = set()
+        self.startup_count = None
+
+        # simulated_devices is the set of the IDs of the devices executed, or
+        # None to execute every device
+        self.simulated_devices = None
+
+        # run_cycles skips the cycles in which a settled network would not
+        # change if fast_forward is True
+        self.fast_forward = True
+
+        # Number of settle iterations of the last simulation cycle
+        self.settle_iterations = 0
+        # stats stores the profiling.NetworkStats() of the last profiled run.
+        # While profiling is enabled, profiled_methods maps every instance
+        # attribute that shadows a method with a profiled version to its
+        # owner, see enable_profiling.
+        self.stats = None
+        self.profiled_methods = []
+
+        # The vector engine keeps the signals in its own arrays. NumPy is only
+        # needed when it is used.
+        self.vector_engine = None
+        if engine == "vector":
+            from vector import VectorEngine
+            self.vector_engine = VectorEngine(self)
+        # The compiled engine keeps the signals in the devices between cycles
+        self.compiled_engine = None
+        if engine == "compiled":
+            from codegen import CompiledEngine
+            self.compiled_engine = CompiledEngine(self)
+
     def get_connected_output(self, device_id, input_id):
         """Return the output connected to the given input.
 
@@ -113,6 +288,8 @@ class Network:
 
         Return None if either of the specified IDs is invalid.
         """
+        if self.vector_engine is not None and self.vector_engine.is_loaded():
+            return self.vector_engine.get_output_signal(device_id, output_id)
         device = self.devices.get_device(device_id)
         if device is not None:
             if output_id in device.outputs:
@@ -142,6 +319,7 @@ class Network:
                 # Make connection
                 first_device.inputs[first_port_id] = (second_device_id,
                                                       second_port_id)
+                self.schedule = None
                 error_type = self.NO_ERROR
             else:  # second_port_id is not a valid input or output port
                 error_type = self.PORT_ABSENT
@@ -157,6 +335,7 @@ class Network:
                 else:
                     second_device.inputs[second_port_id] = (first_device_id,
                                                             first_port_id)
+                    self.schedule = None
                     error_type = self.NO_ERROR
             else:
                 error_type = self.PORT_ABSENT
@@ -230,7 +409,9 @@ class Network:
         """Simulate a logic gate and update its output signal value.
 
         The rule is: if all its inputs are x, then its output is y, else its
-        output is the inverse of y.
+        output is the inverse of y. Inputs are read through gate_signals, so
+        RISING and FALLING are only read as the level they are heading to
+        with edge_levels.
         Note: (x,y) pairs for AND, OR, NOR, NAND, XOR are: (HIGH, HIGH), (LOW,
         LOW), (LOW, HIGH), (HIGH, LOW), (None, None).
         Return True if successful.
@@ -241,6 +422,7 @@ class Network:
             input_signal = self.get_input_signal(device_id, input_id)
             if input_signal is None:  # this input is unconnected
                 return False
+            input_signal = self.gate_signals.get(input_signal, input_signal)
             input_signal_list.append(input_signal)
 
             if device.device_kind != self.devices.XOR:
@@ -343,7 +525,7 @@ class Network:
 
     def update_clocks(self):
         """If it is time to do so, set clock signals to RISING or FALLING."""
-        clock_devices = self.devices.find_devices(self.devices.CLOCK)
+        clock_devices = self.find_simulated_devices(self.devices.CLOCK)
         for device_id in clock_devices:
             device = self.devices.get_device(device_id)
             if device.clock_counter == device.clock_half_period:
@@ -385,7 +567,7 @@ class Network:
     
     def update_siggen(self):
         """If it is time to do so, set siggen signals to RISING or FALLING."""
-        siggen_devices = self.devices.find_devices(self.devices.SIGGEN)
+        siggen_devices = self.find_simulated_devices(self.devices.SIGGEN)
         for device_id in siggen_devices:
             device = self.devices.get_device(device_id)
             output_signal = self.get_output_signal(device_id,
@@ -427,7 +609,7 @@ class Network:
     
     def update_rc(self):
         """If time is the time constant, set rc signal to FALLING."""
-        rc_devices = self.devices.find_devices(self.devices.RC)
+        rc_devices = self.find_simulated_devices(self.devices.RC)
         for device_id in rc_devices:
             device = self.devices.get_device(device_id)
             if device.rc_counter == device.time_constant:
@@ -435,33 +617,565 @@ class Network:
 
             device.rc_counter += 1
 
+    def get_fan_in(self, signals):
+        """Return the set of device IDs whose outputs reach the signals.
+
+        signals is a list of (device ID, output ID) pairs. The devices
+        driving the signals are included, together with every device they
+        depend on through their inputs.
+        """
+        fan_in = set()
+        stack = [device_id for device_id, output_id in signals]
+        while stack:
+            device_id = stack.pop()
+            if device_id in fan_in:
+                continue
+            device = self.devices.get_device(device_id)
+            if device is None:
+                continue
+            fan_in.add(device_id)
+            for connected_output in device.inputs.values():
+                if connected_output is not None:
+                    stack.append(connected_output[0])
+        return fan_in
+
+    def set_simulated_devices(self, device_ids):
+        """Simulate only the given devices, or every device if None.
+
+        The devices must include their whole fan-in, as returned by
+        get_fan_in, for their signals to be correct. The other devices keep
+        their signals and states until they are simulated again.
+        """
+        if device_ids is None:
+            self.simulated_devices = None
+        else:
+            self.simulated_devices = set(device_ids)
+        self.schedule = None  # rebuilt for the new devices
+
+    def find_simulated_devices(self, device_kind):
+        """Return the IDs of the simulated devices of the given kind."""
+        device_ids = self.devices.find_devices(device_kind)
+        if self.simulated_devices is None:
+            return device_ids
+        return [device_id for device_id in device_ids
+                if device_id in self.simulated_devices]
+
+    def compile_network(self):
+        """Build the levelized evaluation schedule of the logic gates.
+
+        Gates that depend on each other through a feedback path (such as an
+        SR latch made from NANDs) are grouped into a loop. Every gate or loop
+        is given the level one above the highest level among the gates that
+        drive it, so evaluating the levels in order visits every gate after
+        its inputs. The schedule is a list with one (gate_ids, loops) pair
+        per level, where gate_ids are the gates outside feedback loops.
+
+        Without edge_levels, a gate reads a changing input one iteration
+        before the level it is heading to, so the order of the gates changes
+        the signals. The gates are then swept in kind order and order of
+        creation instead, with no loops, and a new level is started at each
+        gate that reads a gate of the current level.
+        """
+        gate_ids = []
+        for device_kind in self.devices.gate_types:
+            gate_ids.extend(self.find_simulated_devices(device_kind))
+        self.gate_arguments = {}
+        for device_id in gate_ids:
+            device = self.devices.get_device(device_id)
+            self.gate_arguments[device_id] = self.gate_rules[
+                device.device_kind]
+
+        # Connection graph between the gates: driver -> driven gates
+        successors = {device_id: [] for device_id in gate_ids}
+        for device_id in gate_ids:
+            device = self.devices.get_device(device_id)
+            for connected_output in device.inputs.values():
+                if connected_output is not None and \
+                        connected_output[0] in successors:
+                    successors[connected_output[0]].append(device_id)
+
+        # Tarjan's algorithm, iterative to cope with long chains of gates.
+        # Components are found sinks first.
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        components = []
+        for root_id in gate_ids:
+            if root_id in index:
+                continue
+            index[root_id] = lowlink[root_id] = len(index)
+            stack.append(root_id)
+            on_stack.add(root_id)
+            work = [(root_id, iter(successors[root_id]))]
+            while work:
+                device_id, children = work[-1]
+                for child_id in children:
+                    if child_id not in index:
+                        index[child_id] = lowlink[child_id] = len(index)
+                        stack.append(child_id)
+                        on_stack.add(child_id)
+                        work.append((child_id, iter(successors[child_id])))
+                        break
+                    elif child_id in on_stack:
+                        lowlink[device_id] = min(lowlink[device_id],
+                                                 index[child_id])
+                else:
+                    work.pop()
+                    if work:
+                        parent_id = work[-1][0]
+                        lowlink[parent_id] = min(lowlink[parent_id],
+                                                 lowlink[device_id])
+                    if lowlink[device_id] == index[device_id]:
+                        component = []
+                        while True:
+                            member_id = stack.pop()
+                            on_stack.discard(member_id)
+                            component.append(member_id)
+                            if member_id == device_id:
+                                break
+                        components.append(component)
+
+        # Assign levels, visiting components sources first
+        order = {device_id: number for number, device_id
+                 in enumerate(gate_ids)}
+        level_of = {}
+        self.schedule = []
+        for component in reversed(components):
+            members = set(component)
+            level = 0
+            is_loop = len(component) > 1
+            for device_id in component:
+                device = self.devices.get_device(device_id)
+                for connected_output in device.inputs.values():
+                    if connected_output is None:
+                        continue
+                    driver_id = connected_output[0]
+                    if driver_id in members:
+                        is_loop = True
+                    elif driver_id in level_of:
+                        level = max(level, level_of[driver_id] + 1)
+            for device_id in component:
+                level_of[device_id] = level
+            while len(self.schedule) <= level:
+                self.schedule.append(([], []))
+            if is_loop:
+                # Keep the gates of a loop in their order of creation
+                component.sort(key=order.get)
+                self.schedule[level][1].append(component)
+            else:
+                self.schedule[level][0].append(component[0])
+
+        largest_loop = max([len(loop) for gate_ids, loops in self.schedule
+                            for loop in loops] or [0])
+        gate_depth = len(self.schedule)
+        if not self.edge_levels:
+            # A gate reads a change of its input once it has settled, which
+            # takes two sweeps, or three if the gate is swept first
+            gate_depth *= 3
+            self.schedule = []
+            level_ids = set()
+            for device_id in gate_ids:
+                device = self.devices.get_device(device_id)
+                if not self.schedule or any(
+                        connected_output is not None and
+                        connected_output[0] in level_ids
+                        for connected_output in device.inputs.values()):
+                    self.schedule.append(([], []))
+                    level_ids = set()
+                self.schedule[-1][0].append(device_id)
+                level_ids.add(device_id)
+
+        # A change can pass through every gate level, and every D-type, in
+        # turn before the network settles
+        self.logic_depth = (gate_depth + largest_loop +
+                            len(self.find_simulated_devices(
+                                self.devices.D_TYPE)))
+        if self.fixed_iteration_limit is None:
+            self.iteration_limit = max(self.minimum_iteration_limit,
+                                       2 * self.logic_depth)
+        self.schedule_revision = self.devices.revision
+        self.compile_events()
+
+    def compile_events(self):
+        """Build the fan-out lists and the element list of the event engine.
+
+        Each element is a device, or a whole feedback loop, together with the
+        function that executes it. Elements are numbered in the order that
+        execute_network executes them, and element_fanout lists the elements
+        driven by each element.
+        """
+        self.fanout = {}
+        for device in self.devices.devices_list:
+            for output_id in device.outputs:
+                self.fanout[(device.device_id, output_id)] = []
+        for device in self.devices.devices_list:
+            for input_id, connected_output in device.inputs.items():
+                if connected_output in self.fanout:
+                    self.fanout[connected_output].append((device.device_id,
+                                                          input_id))
+
+        self.elements = []
+        self.element_index = {}
+        source_functions = [(self.devices.SWITCH, self.execute_switch),
+                            (self.devices.D_TYPE, self.execute_d_type),
+                            (self.devices.CLOCK, self.execute_clock),
+                            (self.devices.SIGGEN, self.execute_siggen),
+                            (self.devices.RC, self.execute_rc)]
+        for device_kind, function in source_functions:
+            for device_id in self.find_simulated_devices(device_kind):
+                self.element_index[device_id] = len(self.elements)
+                self.elements.append((function, (device_id,)))
+        for gate_ids, loops in self.schedule:
+            for device_id in gate_ids:
+                x, y = self.gate_arguments[device_id]
+                self.element_index[device_id] = len(self.elements)
+                self.elements.append((self.execute_gate, (device_id, x, y)))
+            for loop in loops:
+                for device_id in loop:
+                    self.element_index[device_id] = len(self.elements)
+                self.elements.append((self.execute_loop, (loop,)))
+
+        driven_elements = [set() for _ in self.elements]
+        for (device_id, output_id), pins in self.fanout.items():
+            if device_id not in self.element_index:
+                continue
+            element = self.element_index[device_id]
+            for driven_id, input_id in pins:
+                if driven_id in self.element_index:
+                    driven_elements[element].add(
+                        self.element_index[driven_id])
+        self.element_fanout = []
+        for element, driven in enumerate(driven_elements):
+            driven.discard(element)
+            self.element_fanout.append(sorted(driven))
+
+        # Every element has to be executed in the next cycle
+        self.pending_elements = set(range(len(self.elements)))
+        self.startup_count = self.devices.startup_count
+
+    def execute_loop(self, loop):
+        """Execute a feedback loop of gates until it settles.
+
+        The gates are executed in turn until none of their outputs change,
+        until their outputs repeat an earlier pass, which means the loop
+        oscillates, or until iteration_limit passes have been made. Return
+        True if successful, and set steady_state to False if any signal
+        changed.
+        """
+        sweep_steady_state = self.steady_state
+        changed = False
+        loop_states = set()
+        for _ in range(self.iteration_limit):
+            self.steady_state = True
+            for device_id in loop:
+                x, y = self.gate_arguments[device_id]
+                if not self.execute_gate(device_id, x, y):
+                    return False
+            if self.steady_state:
+                break
+            changed = True
+            loop_state = tuple(self.devices.get_device(device_id).outputs[None]
+                               for device_id in loop)
+            if loop_state in loop_states:
+                break
+            loop_states.add(loop_state)
+        self.steady_state = sweep_steady_state and not changed
+        return True
+
+    def execute_events(self):
+        """Execute the devices whose inputs have changed for one cycle.
+
+        Elements are executed in the same order as in execute_network, but an
+        element is only executed if one of its inputs, or its own output,
+        changed since it was last executed. Executing any other element would
+        leave its signals unchanged, so the result is identical to
+        execute_network. Return True if successful and the network does not
+        oscillate.
+        """
+        elements = self.elements
+        element_fanout = self.element_fanout
+        pending = self.pending_elements
+        if self.startup_count != self.devices.startup_count:
+            # Device states have been reset, so execute everything
+            pending.update(range(len(elements)))
+            self.startup_count = self.devices.startup_count
+        # Switches may have been set since the last cycle
+        for device_id in self.find_simulated_devices(self.devices.SWITCH):
+            pending.add(self.element_index[device_id])
+
+        # This sets clock, rc and siggen signals to RISING or FALLING, where
+        # necessary. The devices that change, and the devices they drive, are
+        # executed.
+        source_devices = []
+        for device_kind in [self.devices.CLOCK, self.devices.SIGGEN,
+                            self.devices.RC]:
+            for device_id in self.find_simulated_devices(device_kind):
+                device = self.devices.get_device(device_id)
+                source_devices.append((device, device.outputs[None]))
+        self.update_clocks()
+        self.update_siggen()
+        self.update_rc()
+        for device, signal in source_devices:
+            if device.outputs[None] != signal:
+                element = self.element_index[device.device_id]
+                pending.add(element)
+                pending.update(element_fanout[element])
+
+        self.oscillating_devices = []
+        states = {}  # states reached while settling, see record_state
+        iterations = 0
+        while iterations < self.iteration_limit:
+            iterations += 1
+            sweep_steady_state = True
+            queue = sorted(pending)
+            queued = set(pending)
+            pending = set()
+            while queue:
+                element = heapq.heappop(queue)
+                function, arguments = elements[element]
+                self.steady_state = True
+                if not function(*arguments):
+                    self.pending_elements = set(range(len(elements)))
+                    return False
+                if self.steady_state:
+                    continue
+                sweep_steady_state = False
+                pending.add(element)
+                for driven in element_fanout[element]:
+                    if driven < element:  # executed again next iteration
+                        pending.add(driven)
+                    elif driven not in queued:  # executed in this iteration
+                        queued.add(driven)
+                        heapq.heappush(queue, driven)
+            if sweep_steady_state:
+                break
+            if iterations > 2 and not self.record_state(
+                    states, self.get_network_state()):
+                break
+        if not sweep_steady_state and not self.oscillating_devices:
+            self.oscillating_devices = self.find_last_changing_devices(
+                states)
+        self.settle_iterations = iterations
+        self.pending_elements = pending
+        self.steady_state = sweep_steady_state
+        return self.steady_state
+
+    def set_iteration_limit(self, iteration_limit):
+        """Set the largest number of iterations a cycle may take to settle.
+
+        If iteration_limit is None, the limit is derived from the logic depth
+        of the network each time it is compiled.
+        """
+        if iteration_limit is not None:
+            if not isinstance(iteration_limit, int) or \
+                    isinstance(iteration_limit, bool):
+                raise TypeError("Expected iteration_limit to be an integer.")
+            if iteration_limit < 1:
+                raise ValueError("Expected iteration_limit to be a positive "
+                                 "integer.")
+            self.iteration_limit = iteration_limit
+        else:
+            self.iteration_limit = max(self.minimum_iteration_limit,
+                                       2 * self.logic_depth)
+        self.fixed_iteration_limit = iteration_limit
+
+    def get_network_state(self):
+        """Return the signals and D-type memories as a hashable state.
+
+        These determine the next settle iteration of a cycle completely, so
+        the network oscillates if it reaches the same state twice in a cycle.
+        """
+        if self.vector_engine is not None and self.vector_engine.is_loaded():
+            return self.vector_engine.get_network_state()
+        state = [signal for device in self.devices.devices_list
+                 for signal in device.outputs.values()]
+        state.extend(self.devices.get_device(device_id).dtype_memory
+                     for device_id in self.devices.find_devices(
+                         self.devices.D_TYPE))
+        return tuple(state)
+
+    def get_state_devices(self):
+        """Return the device ID of each item of the network state."""
+        device_ids = [device.device_id for device in self.devices.devices_list
+                      for _ in device.outputs]
+        device_ids.extend(self.devices.find_devices(self.devices.D_TYPE))
+        return device_ids
+
+    def find_changing_devices(self, changes):
+        """Return the IDs of the devices of the state items at the indices
+        in changes, in the order of the network state."""
+        state_devices = self.get_state_devices()
+        device_ids = []
+        for index in sorted(set(changes)):
+            if state_devices[index] not in device_ids:
+                device_ids.append(state_devices[index])
+        return device_ids
+
+    def find_last_changing_devices(self, states):
+        """Return the IDs of the devices changed in the last state recorded
+        in states, see record_state."""
+        if not states:
+            return []
+        order, changes = states[next(reversed(states))]
+        return self.find_changing_devices(changes)
+
+    def record_state(self, states, state):
+        """Record a state reached at the end of a settle iteration.
+
+        states maps each state reached so far in this cycle to its order and
+        the indices of the items that changed since the state before it.
+        Return False if the state has been reached before, in which case the
+        network repeats the same states forever, and set oscillating_devices
+        to the devices that change in the repeating states.
+        """
+        changes = []
+        if states:
+            changes = [index for index, (item, last_item)
+                       in enumerate(zip(state, self.last_state))
+                       if item != last_item]
+        self.last_state = state
+        if state in states:
+            # The repeating states are those recorded after the first visit
+            first_order = states[state][0]
+            for order, earlier_changes in states.values():
+                if order > first_order:
+                    changes.extend(earlier_changes)
+            self.oscillating_devices = self.find_changing_devices(changes)
+            return False
+        states[state] = (len(states), changes)
+        return True
+
+    def get_oscillating_names(self):
+        """Return the names of the devices found oscillating."""
+        return [self.names.get_name_string(device_id)
+                for device_id in self.oscillating_devices]
+
+    def get_snapshot_parts(self):
+        """Return the kind, attribute and type code of each snapshot state.
+
+        These are the device states stored in a snapshot after the output
+        signals, each in an array of the given type code.
+        """
+        devices = self.devices
+        return [(devices.SWITCH, "switch_state", "b"),
+                (devices.D_TYPE, "dtype_memory", "b"),
+                (devices.CLOCK, "clock_counter", "q"),
+                (devices.SIGGEN, "siggen_counter", "q"),
+                (devices.RC, "rc_counter", "q")]
+
+    def snapshot(self):
+        """Return the signals and device states as an immutable bytes object.
+
+        The snapshot holds the signal of every output, the switch states, the
+        D-type memories and the clock, siggen and RC counters, each packed in
+        an array in the order of the devices, after a header of the array
+        lengths. It can be written to a file and restored in another process
+        into a network built from the same definition file.
+        """
+        if self.vector_engine is not None and self.vector_engine.is_loaded():
+            self.vector_engine.store_state()
+        devices = self.devices
+        arrays = [array.array("b", [signal for device in devices.devices_list
+                                    for signal in device.outputs.values()])]
+        for device_kind, attribute, typecode in self.get_snapshot_parts():
+            arrays.append(array.array(typecode, [
+                getattr(devices.get_device(device_id), attribute)
+                for device_id in devices.find_devices(device_kind)]))
+        header = array.array("q", [len(values) for values in arrays])
+        return b"".join([header.tobytes()] +
+                        [values.tobytes() for values in arrays])
+
+    def restore(self, snapshot, device_ids=None):
+        """Restore the signals and device states of a snapshot.
+
+        If device_ids is given, only the devices with those IDs are restored
+        and the others keep their current state. Raise TypeError if snapshot
+        is not a bytes-like object, and ValueError if it was not taken from
+        a network with the same devices.
+        """
+        if not isinstance(snapshot, (bytes, bytearray, memoryview)):
+            raise TypeError("Expected snapshot to be a bytes object.")
+        devices = self.devices
+        parts = [(None, None, "b")] + self.get_snapshot_parts()
+        device_lists = [devices.devices_list] + [
+            [devices.get_device(device_id)
+             for device_id in devices.find_devices(device_kind)]
+            for device_kind, attribute, typecode in parts[1:]]
+        lengths = [sum(len(device.outputs) for device in devices.devices_list)]
+        lengths.extend(len(device_list) for device_list in device_lists[1:])
+        header = array.array("q", lengths).tobytes()
+        size = len(header) + sum(
+            length * array.array(typecode).itemsize
+            for length, (_, _, typecode) in zip(lengths, parts))
+        snapshot = memoryview(snapshot).cast("B")
+        if len(snapshot) != size or snapshot[:len(header)] != header:
+            raise ValueError("Expected a snapshot of a network with the same "
+                             "devices.")
+
+        if device_ids is not None:
+            if self.vector_engine is not None and \
+                    self.vector_engine.is_loaded():
+                self.vector_engine.store_state()  # the devices kept
+            device_ids = set(device_ids)
+
+        offset = len(header)
+        for (_, attribute, typecode), device_list, length in zip(
+                parts, device_lists, lengths):
+            values = array.array(typecode)
+            values.frombytes(snapshot[offset:offset + length *
+                                      values.itemsize])
+            offset += length * values.itemsize
+            if attribute is None:  # the output signals
+                values = iter(values)
+                for device in device_list:
+                    for output_id in device.outputs:
+                        signal = next(values)
+                        if device_ids is None or \
+                                device.device_id in device_ids:
+                            device.outputs[output_id] = signal
+            else:
+                for device, value in zip(device_list, values):
+                    if device_ids is None or device.device_id in device_ids:
+                        setattr(device, attribute, value)
+        # The engines reload the restored state as after a cold start-up
+        devices.startup_count += 1
+
     def execute_network(self):
         """Execute all the devices in the network for one simulation cycle.
 
+        The logic gates are executed level by level in the order given by the
+        compiled schedule, which is rebuilt first if the network has changed.
+        With the event engine, only devices whose inputs changed are executed.
         Return True if successful and the network does not oscillate.
         """
-        clock_devices = self.devices.find_devices(self.devices.CLOCK)
-        switch_devices = self.devices.find_devices(self.devices.SWITCH)
-        d_type_devices = self.devices.find_devices(self.devices.D_TYPE)
-        siggen_devices = self.devices.find_devices(self.devices.SIGGEN)
-        rc_devices = self.devices.find_devices(self.devices.RC)
-        and_devices = self.devices.find_devices(self.devices.AND)
-        or_devices = self.devices.find_devices(self.devices.OR)
-        nand_devices = self.devices.find_devices(self.devices.NAND)
-        nor_devices = self.devices.find_devices(self.devices.NOR)
-        xor_devices = self.devices.find_devices(self.devices.XOR)
+        if self.schedule is None or \
+                self.schedule_revision != self.devices.revision:
+            self.compile_network()
+        if self.engine == "event":
+            return self.execute_events()
+        if self.engine == "vector":
+            return self.vector_engine.execute_network()
+        if self.engine == "compiled":
+            return self.compiled_engine.execute_network()
+
+        clock_devices = self.find_simulated_devices(self.devices.CLOCK)
+        switch_devices = self.find_simulated_devices(self.devices.SWITCH)
+        d_type_devices = self.find_simulated_devices(self.devices.D_TYPE)
+        siggen_devices = self.find_simulated_devices(self.devices.SIGGEN)
+        rc_devices = self.find_simulated_devices(self.devices.RC)
+        gate_arguments = self.gate_arguments
 
         # This sets clock, rc and siggen signals to RISING or 
         # FALLING, where necessary
         self.update_clocks()
         self.update_siggen()
         self.update_rc()
-        # Number of iterations to wait for the signals to settle before
-        # declaring the network unstable
-        iteration_limit = 20
 
+        self.oscillating_devices = []
+        states = {}  # states reached while settling, see record_state
         iterations = 0
-        while iterations < iteration_limit:
+        while iterations < self.iteration_limit:
             iterations += 1
             self.steady_state = True
 
@@ -482,25 +1196,207 @@ class Network:
             for device_id in rc_devices:    # execute RC devices
                 if not self.execute_rc(device_id):
                     return False
-            for device_id in and_devices:  # execute AND gate devices
-                if not self.execute_gate(device_id, self.devices.HIGH,
-                                         self.devices.HIGH):
-                    return False
-            for device_id in or_devices:  # execute OR gate devices
-                if not self.execute_gate(device_id, self.devices.LOW,
-                                         self.devices.LOW):
-                    return False
-            for device_id in nand_devices:  # execute NAND gate devices
-                if not self.execute_gate(device_id, self.devices.HIGH,
-                                         self.devices.LOW):
-                    return False
-            for device_id in nor_devices:  # execute NOR gate devices
-                if not self.execute_gate(device_id, self.devices.LOW,
-                                         self.devices.HIGH):
-                    return False
-            for device_id in xor_devices:  # execute XOR devices
-                if not self.execute_gate(device_id, None, None):
-                    return False
+            for gate_ids, loops in self.schedule:  # execute gates by level
+                for device_id in gate_ids:
+                    x, y = gate_arguments[device_id]
+                    if not self.execute_gate(device_id, x, y):
+                        return False
+                for loop in loops:
+                    if not self.execute_loop(loop):
+                        return False
             if self.steady_state:
                 break
+            # Most cycles settle within a few iterations, so states are only
+            # recorded after that
+            if iterations > 2 and not self.record_state(
+                    states, self.get_network_state()):
+                break
+        if not self.steady_state and not self.oscillating_devices:
+            # The limit was reached, so report the devices still changing
+            self.oscillating_devices = self.find_last_changing_devices(
+                states)
+        self.settle_iterations = iterations
         return self.steady_state
+
+    def get_siggen_idle_cycles(self, wave, counter, level):
+        """Return the number of cycles before a siggen leaves the level.
+
+        counter is the index of the last step of the wave. Return None if
+        the wave never leaves the level.
+        """
+        length = len(wave)
+        for step in range(1, length + 1):
+            if wave[(counter + step) % length] != level:
+                return step - 1
+        return None
+
+    def get_idle_cycles(self):
+        """Return the number of cycles for which the network stays unchanged.
+
+        If the last cycle settled, executing the network again changes
+        nothing until a clock, siggen or RC changes its output, so the
+        coming cycles before the first such change are idle. Return 0 if the
+        last cycle did not settle, or None if no source will ever change.
+        """
+        if not self.steady_state:
+            return 0
+        if self.vector_engine is not None and self.vector_engine.is_loaded():
+            return self.vector_engine.get_idle_cycles()
+        idle_cycles = []
+        for device_id in self.find_simulated_devices(self.devices.CLOCK):
+            device = self.devices.get_device(device_id)
+            if device.clock_counter <= device.clock_half_period:
+                idle_cycles.append(device.clock_half_period -
+                                   device.clock_counter)
+        for device_id in self.find_simulated_devices(self.devices.RC):
+            device = self.devices.get_device(device_id)
+            if device.rc_counter <= device.time_constant:
+                idle_cycles.append(device.time_constant - device.rc_counter)
+        for device_id in self.find_simulated_devices(self.devices.SIGGEN):
+            device = self.devices.get_device(device_id)
+            siggen_idle_cycles = self.get_siggen_idle_cycles(
+                device.siggen_wave, device.siggen_counter,
+                device.outputs[None])
+            if siggen_idle_cycles is not None:
+                idle_cycles.append(siggen_idle_cycles)
+        if not idle_cycles:
+            return None
+        return min(idle_cycles)
+
+    def skip_idle_cycles(self, cycles):
+        """Advance the clocks, siggens and RCs over idle cycles.
+
+        This leaves the network as executing it for the cycles would, as
+        long as they are no more than get_idle_cycles returned.
+        """
+        if self.vector_engine is not None and self.vector_engine.is_loaded():
+            self.vector_engine.skip_idle_cycles(cycles)
+            return
+        for device_id in self.find_simulated_devices(self.devices.CLOCK):
+            self.devices.get_device(device_id).clock_counter += cycles
+        for device_id in self.find_simulated_devices(self.devices.RC):
+            self.devices.get_device(device_id).rc_counter += cycles
+        for device_id in self.find_simulated_devices(self.devices.SIGGEN):
+            device = self.devices.get_device(device_id)
+            device.siggen_counter = ((device.siggen_counter + cycles) %
+                                     len(device.siggen_wave))
+
+    def run_cycles(self, cycles, monitors=None):
+        """Execute the network for the given number of cycles.
+
+        If monitors is given, the signals are recorded after every cycle.
+        With fast_forward set, once a cycle settles, the idle cycles that
+        follow are skipped in one step, and the monitors record the settled
+        signals for all of them at once. Return the number of cycles
+        completed, which is less than cycles if the network oscillates.
+        """
+        cycles_completed = 0
+        while cycles_completed < cycles:
+            if not self.execute_network():
+                return cycles_completed
+            if monitors is not None:
+                monitors.record_signals()
+            cycles_completed += 1
+            if not self.fast_forward or cycles_completed == cycles:
+                continue
+            idle_cycles = self.get_idle_cycles()
+            if idle_cycles is None or \
+                    idle_cycles > cycles - cycles_completed:
+                idle_cycles = cycles - cycles_completed
+            if idle_cycles:
+                self.skip_idle_cycles(idle_cycles)
+                if monitors is not None:
+                    monitors.record_idle_cycles(idle_cycles)
+                if self.profiled_methods:
+                    self.stats.idle_cycles += idle_cycles
+                cycles_completed += idle_cycles
+        return cycles_completed
+
+    def enable_profiling(self, monitors=None):
+        """Start collecting profiling statistics and return them.
+
+        The methods that execute and update devices are shadowed by instance
+        attributes that count and time them, so the network runs at full
+        speed when profiling is disabled. If monitors is given, the time
+        spent in its record_signals is measured too. Enabling profiling
+        again starts a new NetworkStats() instance.
+        """
+        if self.profiled_methods:
+            self.disable_profiling()
+        stats = NetworkStats(self)
+        self.stats = stats
+        devices = self.devices
+        clock = time.perf_counter
+
+        def counted(function, device_kind):
+            def profiled_function(*arguments):
+                stats.evaluations[device_kind] += 1
+                return function(*arguments)
+            return profiled_function
+
+        def counted_gate(device_id, x=None, y=None):
+            stats.evaluations[devices.get_device(device_id).device_kind] += 1
+            return execute_gate(device_id, x, y)
+
+        def timed(function, phase):
+            def profiled_function():
+                start = clock()
+                result = function()
+                stats.add_time(phase, clock() - start)
+                return result
+            return profiled_function
+
+        def profiled_network():
+            phase_seconds = stats.phase_seconds
+            update_seconds = sum(phase_seconds.values())
+            start = clock()
+            result = execute_network()
+            seconds = clock() - start
+            # Leave out the time of the update phases, measured separately
+            seconds -= sum(phase_seconds.values()) - update_seconds
+            stats.add_time("evaluate", seconds)
+            if self.engine in ["vector", "compiled"]:
+                # Every device is executed in every settle iteration
+                for device_kind in devices.device_types + devices.gate_types:
+                    count = len(self.find_simulated_devices(device_kind))
+                    if count:
+                        stats.add_evaluation(
+                            device_kind, self.settle_iterations * count)
+            stats.record_cycle(self.settle_iterations)
+            return result
+
+        execute_gate = self.execute_gate
+        execute_network = self.execute_network
+        profiled = [(self, "execute_gate", counted_gate),
+                    (self, "execute_network", profiled_network)]
+        for name, device_kind in [("execute_switch", devices.SWITCH),
+                                  ("execute_d_type", devices.D_TYPE),
+                                  ("execute_clock", devices.CLOCK),
+                                  ("execute_siggen", devices.SIGGEN),
+                                  ("execute_rc", devices.RC)]:
+            profiled.append((self, name, counted(getattr(self, name),
+                                                 device_kind)))
+        for name in ["update_clocks", "update_siggen", "update_rc"]:
+            profiled.append((self, name, timed(getattr(self, name), name)))
+        if self.vector_engine is not None:
+            profiled.append((self.vector_engine, "update_sources",
+                             timed(self.vector_engine.update_sources,
+                                   "update_sources")))
+        if monitors is not None:
+            profiled.append((monitors, "record_signals",
+                             timed(monitors.record_signals,
+                                   "record_signals")))
+        for owner, name, function in profiled:
+            setattr(owner, name, function)
+            self.profiled_methods.append((owner, name))
+        # The event engine stores the methods of its elements
+        self.schedule = None
+        return stats
+
+    def disable_profiling(self):
+        """Stop collecting profiling statistics and return them."""
+        for owner, name in self.profiled_methods:
+            delattr(owner, name)
+        self.profiled_methods = []
+        self.schedule = None
+        return self.stats
@@ -0,0 +1,271 @@
+"""Simplify a network without changing the monitored signals.
+
+Used in the Logic Simulator project before a batch run, so that logic whose
+outputs cannot change, or cannot reach a monitor, is not executed in every
+cycle.
+
+Classes
+-------
+Optimiser - folds constants and removes dead logic from a network.
+"""
+import collections
+
+
+class Optimiser:
+
+    """Fold constants through the gates and remove dead logic.
+
+    A source is constant if its output has settled at a level it will keep:
+    a switch at its state, an RC after its time constant and a siggen whose
+    waveform has a single level. Constants are folded through the gates:
+    a gate with a controlling constant input, or only constant inputs, is
+    replaced by a switch at its settled output. The constant inputs of the
+    other gates are disconnected, so a gate left with one input is a buffer
+    or an inverter, and an XOR with a constant input becomes a one-input
+    AND or NAND. Finally the devices with no path to a monitor are removed.
+
+    Only outputs that have already settled are folded, so every gate that is
+    kept sees the same input levels as before, in every iteration, and the
+    monitored signals are unchanged. Dead feedback loops are kept, so a
+    network that oscillates is still found oscillating. The switches must
+    not be set after the network is optimised, since they may have been
+    folded away.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+
+    Public methods
+    --------------
+    find_constant_sources(self): Returns the settled level of every constant
+                                 switch, RC and siggen.
+
+    get_fan_out(self): Returns the devices reading the output of each device.
+
+    fold_gate(self, device_id): Returns the constant level of a gate, or None.
+
+    collapse_gate(self, device_id): Disconnects the constant inputs of a gate.
+
+    remove_dead_devices(self): Removes the devices with no path to a monitor,
+                               except those in feedback loops.
+
+    optimise_network(self): Simplifies the network and returns the number of
+                            devices eliminated.
+
+    get_report(self): Returns the changes made as lines of text.
+    """
+
+    def __init__(self, names, devices, network, monitors):
+        """Initialise the counters of the changes made."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+        # constants stores {device_id: level} for the single output devices
+        # whose outputs are constant
+        self.constants = {}
+        self.devices_before = 0  # number of devices before optimising
+        self.folded = 0  # gates replaced by constant switches
+        self.collapsed = 0  # gates with constant inputs disconnected
+        self.inputs_removed = 0
+        self.eliminated = 0  # devices removed
+
+    def find_constant_sources(self):
+        """Return {device_id: level} for the sources with constant outputs."""
+        devices = self.devices
+        constants = {}
+        for device_id in devices.find_devices(devices.SWITCH):
+            device = devices.get_device(device_id)
+            if device.outputs[None] == device.switch_state:
+                constants[device_id] = device.switch_state
+        for device_id in devices.find_devices(devices.RC):
+            device = devices.get_device(device_id)
+            if device.outputs[None] == devices.LOW and \
+                    device.rc_counter > device.time_constant:
+                constants[device_id] = devices.LOW
+        for device_id in devices.find_devices(devices.SIGGEN):
+            device = devices.get_device(device_id)
+            if set(device.siggen_wave) == {device.outputs[None]}:
+                constants[device_id] = device.outputs[None]
+        return constants
+
+    def get_fan_out(self):
+        """Return {device_id: [IDs of the devices reading its outputs]}."""
+        fan_out = collections.defaultdict(list)
+        for device in self.devices.devices_list:
+            for connected_output in device.inputs.values():
+                if connected_output is not None:
+                    fan_out[connected_output[0]].append(device.device_id)
+        return fan_out
+
+    def get_input_levels(self, device):
+        """Return the constant level of each input of the device, or None
+        for the inputs that are not constant."""
+        return [self.constants.get(connected_output[0])
+                if connected_output[1] is None else None
+                for connected_output in device.inputs.values()]
+
+    def fold_gate(self, device_id):
+        """Return the constant level of the gate's output, or None.
+
+        The output is constant if its inputs fix it and it has settled at
+        that level.
+        """
+        devices = self.devices
+        device = devices.get_device(device_id)
+        levels = self.get_input_levels(device)
+        if device.device_kind == devices.XOR:
+            if None in levels:
+                return None
+            level = devices.LOW if levels[0] == levels[1] else devices.HIGH
+        else:
+            x, y = self.network.gate_rules[device.device_kind]
+            if any(level is not None and level != x for level in levels):
+                level = self.network.invert_signal(y)
+            elif None not in levels:
+                level = y
+            else:
+                return None
+        if device.outputs[None] != level:
+            return None
+        return level
+
+    def collapse_gate(self, device_id):
+        """Disconnect the constant inputs of a gate that is not constant.
+
+        The constant inputs of an AND, OR, NAND or NOR gate do not change its
+        output, since they are not controlling, and are removed. An XOR with
+        one constant input becomes a one-input AND, or a NAND if the
+        constant is HIGH. Return True if the gate was changed.
+        """
+        devices = self.devices
+        device = devices.get_device(device_id)
+        levels = self.get_input_levels(device)
+        constant_inputs = [input_id for input_id, level
+                           in zip(list(device.inputs), levels)
+                           if level is not None]
+        if not constant_inputs or len(constant_inputs) == len(levels):
+            return False
+        if device.device_kind == devices.XOR:
+            [constant_input] = constant_inputs
+            [other_input] = [input_id for input_id in device.inputs
+                             if input_id != constant_input]
+            connected_output = device.inputs[other_input]
+            if self.constants[device.inputs[constant_input][0]] == \
+                    devices.LOW:
+                device_kind = devices.AND
+            else:
+                device_kind = devices.NAND
+            devices.replace_device(device_id, device_kind)
+            [input_id] = self.names.lookup(["I1"])
+            devices.add_input(device_id, input_id)
+            devices.get_device(device_id).inputs[input_id] = connected_output
+        else:
+            x, y = self.network.gate_rules[device.device_kind]
+            if any(self.constants[device.inputs[input_id][0]] != x
+                   for input_id in constant_inputs):
+                return False  # controlled, but not settled yet
+            for input_id in constant_inputs:
+                del device.inputs[input_id]
+        self.inputs_removed += len(constant_inputs)
+        return True
+
+    def remove_dead_devices(self):
+        """Remove the devices with no path to a monitor.
+
+        Dead devices in a feedback loop, and the dead devices they read, are
+        kept, since the loop may oscillate and the network must still be
+        found oscillating. The other dead devices are removed readers first.
+        Return the number of devices removed.
+        """
+        live_devices = self.network.get_fan_in(
+            list(self.monitors.monitors_dictionary))
+        dead_devices = set(self.devices.find_devices()) - live_devices
+
+        # dead_readers stores {device_id: set of the dead devices reading it}
+        dead_readers = {device_id: set() for device_id in dead_devices}
+        for device_id in dead_devices:
+            device = self.devices.get_device(device_id)
+            for connected_output in device.inputs.values():
+                if connected_output is not None and \
+                        connected_output[0] in dead_readers:
+                    dead_readers[connected_output[0]].add(device_id)
+        pending = [device_id for device_id in dead_devices
+                   if not dead_readers[device_id]]
+        removed = 0
+        while pending:
+            device_id = pending.pop()
+            device = self.devices.get_device(device_id)
+            for connected_output in device.inputs.values():
+                if connected_output is None or \
+                        connected_output[0] not in dead_readers:
+                    continue
+                readers = dead_readers[connected_output[0]]
+                if device_id in readers:
+                    readers.discard(device_id)
+                    if not readers:
+                        pending.append(connected_output[0])
+            self.devices.remove_device(device_id)
+            removed += 1
+        return removed
+
+    def optimise_network(self):
+        """Fold constants, collapse gates and remove dead logic.
+
+        Return the number of devices eliminated.
+        """
+        devices = self.devices
+        network = self.network
+        if network.vector_engine is not None and \
+                network.vector_engine.is_loaded():
+            network.vector_engine.store_state()
+        self.devices_before = len(devices.devices_list)
+        self.constants = self.find_constant_sources()
+
+        # Fold the constants forward from the sources
+        gate_ids = [device_id for device_kind in devices.gate_types
+                    for device_id in devices.find_devices(device_kind)]
+        fan_out = self.get_fan_out()
+        gates = set(gate_ids)
+        pending = collections.deque(gate_ids)
+        queued = set(gate_ids)
+        folded_ids = []
+        while pending:
+            device_id = pending.popleft()
+            queued.discard(device_id)
+            if device_id in self.constants:
+                continue
+            level = self.fold_gate(device_id)
+            if level is None:
+                continue
+            self.constants[device_id] = level
+            folded_ids.append(device_id)
+            for reader_id in fan_out[device_id]:
+                if reader_id in gates and reader_id not in queued:
+                    pending.append(reader_id)
+                    queued.add(reader_id)
+
+        for device_id in gate_ids:
+            if device_id not in self.constants and \
+                    self.collapse_gate(device_id):
+                self.collapsed += 1
+        for device_id in folded_ids:
+            switch = devices.replace_device(device_id, devices.SWITCH)
+            switch.switch_state = self.constants[device_id]
+        self.folded += len(folded_ids)
+
+        self.eliminated += self.remove_dead_devices()
+        network.schedule = None  # inputs have been disconnected
+        return self.eliminated
+
+    def get_report(self):
+        """Return the changes made as a list of lines of text."""
+        return ["Devices eliminated: %d of %d" % (self.eliminated,
+                                                 self.devices_before),
+                "Gates folded to constants: %d" % self.folded,
+                "Gates collapsed: %d, inputs removed: %d"
+                % (self.collapsed, self.inputs_removed)]
@@ -121,6 +121,11 @@ class Parser:
                 if len(self.devices_list)>0:
                     self.global_error("Exist devices that are not used")
 
+                """Cold start all devices once and build the evaluation schedule once the network is complete"""
+                if not self.scanner.error_count:
+                    self.devices.cold_startup()
+                    self.network.compile_network()
+
                 """Return boolean value: if no error -> True; else -> False"""
                 return not self.scanner.error_count
 
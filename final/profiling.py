@@ -0,0 +1,126 @@
+"""Collect profiling statistics of a simulation.
+
+Used in the Logic Simulator project to find where the time of a slow run
+goes: into the settle iterations, into a particular kind of device or into
+recording the monitors. The statistics are collected by the network once
+network.Network.enable_profiling() has been called.
+
+Classes
+-------
+NetworkStats - counters and phase times of the simulation cycles.
+"""
+import collections
+
+
+class NetworkStats:
+
+    """Store the counters and phase times of the simulation cycles.
+
+    The counters are the number of settle iterations of each cycle, the
+    number of device evaluations of each device kind and the number of signal
+    transitions, counted as the outputs whose level at the end of a cycle
+    differs from their level at the end of the previous cycle (RISING is
+    read as HIGH and FALLING as LOW). The wall time is summed for every
+    phase of a cycle: updating the clocks, siggens and RCs, the evaluation
+    loop and recording the monitors. Idle cycles skipped by
+    network.Network.run_cycles are only counted in idle_cycles.
+
+    Parameters
+    ----------
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    reset(self): Sets every counter and time to zero.
+
+    add_time(self, phase, seconds): Adds the wall time spent in the phase.
+
+    add_evaluation(self, device_kind, count=1): Counts evaluations of devices
+                                                of the kind.
+
+    record_cycle(self, iterations): Counts a completed simulation cycle, its
+                                    settle iterations and transitions.
+
+    get_report(self): Returns the statistics as lines of text.
+    """
+
+    def __init__(self, network):
+        """Initialise the counters."""
+        self.network = network
+        self.names = network.names
+        self.devices = network.devices
+        self.reset()
+
+    def reset(self):
+        """Set every counter and time to zero."""
+        self.cycles = 0
+        self.idle_cycles = 0  # cycles skipped by network.run_cycles
+        # iterations stores {settle iterations: number of cycles}
+        self.iterations = collections.Counter()
+        self.evaluations = collections.Counter()  # {device_kind: count}
+        self.transitions = 0
+        self.phase_seconds = collections.OrderedDict()
+        self.levels = None  # output levels at the end of the last cycle
+
+    def add_time(self, phase, seconds):
+        """Add the wall time, in seconds, spent in the phase."""
+        self.phase_seconds[phase] = self.phase_seconds.get(phase, 0) + seconds
+
+    def add_evaluation(self, device_kind, count=1):
+        """Count evaluations of devices of the given kind."""
+        self.evaluations[device_kind] += count
+
+    def get_levels(self):
+        """Return the list of output levels of every device."""
+        get_output_signal = self.network.get_output_signal
+        signal_levels = self.network.signal_levels
+        levels = []
+        for device in self.devices.devices_list:
+            for output_id in device.outputs:
+                signal = get_output_signal(device.device_id, output_id)
+                levels.append(signal_levels.get(signal, signal))
+        return levels
+
+    def record_cycle(self, iterations):
+        """Count a completed simulation cycle and its settle iterations.
+
+        The signal transitions are counted against the levels of the previous
+        cycle, so none are counted in the first cycle recorded, or after
+        devices have been added.
+        """
+        self.cycles += 1
+        self.iterations[iterations] += 1
+        levels = self.get_levels()
+        if self.levels is not None and len(levels) == len(self.levels):
+            self.transitions += sum(1 for level, previous_level
+                                    in zip(levels, self.levels)
+                                    if level != previous_level)
+        self.levels = levels
+
+    def get_report(self):
+        """Return the statistics as a list of lines of text."""
+        total_iterations = sum(iterations * cycles for iterations, cycles
+                               in self.iterations.items())
+        lines = ["Cycles: %d" % self.cycles]
+        if self.idle_cycles:
+            lines.append("Idle cycles skipped: %d" % self.idle_cycles)
+        if self.cycles:
+            lines.append("Settle iterations: %d, per cycle: mean %.2f, "
+                         "max %d" % (total_iterations,
+                                     total_iterations / self.cycles,
+                                     max(self.iterations)))
+            lines.append("Cycles by settle iterations: " + ", ".join(
+                "%d: %d" % item for item in sorted(self.iterations.items())))
+        lines.append("Device evaluations: " + (", ".join(
+            "%s %d" % (self.names.get_name_string(device_kind), count)
+            for device_kind, count in sorted(self.evaluations.items()))
+            or "none"))
+        lines.append("Signal transitions: %d" % self.transitions)
+        total_seconds = sum(self.phase_seconds.values())
+        lines.append("Time: %.3f ms" % (total_seconds * 1e3))
+        for phase, seconds in self.phase_seconds.items():
+            lines.append("  %-15s %10.3f ms %5.1f%%"
+                         % (phase, seconds * 1e3,
+                            100 * seconds / total_seconds
+                            if total_seconds else 0))
+        return lines
@@ -8,9 +8,11 @@ Classes
 Scanner - reads definition file and translates characters into symbols.
 Symbol - encapsulates a symbol and stores its properties.
 """
-from names import Names
+import re
 import sys
 
+from names import Names
+
 class Symbol:
 
     """Encapsulate a symbol and store its properties.
@@ -55,6 +57,9 @@ class Scanner:
                             Without skipping any spaces. So a SPACE type symbol is
                             possible.
 
+    symbols(self): Yields the symbols of the file one by one, up to and including
+                   the EOF symbol.
+
     display_error(self, error_message, error_symbol): Prints out the error_message when 
                     an error occurs, along with the text line and the exact position of 
                     the symbol that causes the error.
@@ -63,6 +68,20 @@ class Scanner:
                     error occurs, usually for the logic error of the whole circuit.
     """
 
+    # Number of characters read from the file at a time
+    chunk_size = 1 << 16
+
+    # Runs of characters that are skipped or collected together
+    name_characters = re.compile(r"[^\W_]*")  # same as str.isalnum
+    digit_characters = re.compile(r"\d*")
+    space_characters = re.compile(r"\s*")  # same as str.isspace
+    comment_characters = re.compile(r"[^\n]*")
+
+    # Spaces and comments followed by an ASCII name, number, arrow or other
+    # ASCII character except #, matched from cur_character by get_symbol
+    next_symbol = re.compile(r"(?:\s|#[^\n]*\n)*(?:([A-Za-z][^\W_]*)|([0-9]+)|"
+                             r"(->)|([!-\"$-/:-@\[-`{-~]))")
+
     def __init__(self, path, names):
         """Open specified file and initialize reserved words and IDs."""
         if not isinstance(names, Names):
@@ -77,9 +96,14 @@ class Scanner:
             print("The path provided is not found.")
             sys.exit()
         else:
-            self.file_lines = file.readlines()  # Stores all the lines of the text file
-            file.seek(0,0)
+            self.path = path
             self.file = file
+        # The file is read in chunks into buffer, and buffer_index is the
+        # position of the next character to read. The lines of the file are
+        # only read again if an error has to be displayed.
+        self.buffer = ""
+        self.buffer_index = 0
+        self.file_lines = None
 
         self.symbol_type_list = [
             self.KEYWORD, self.NUMBER, self.HEADING, self.NAME, self.ARROW,
@@ -113,6 +137,16 @@ class Scanner:
             self.SET_ID, self.CLEAR_ID
         ] = self.names.lookup(self.pin_list)
 
+        # Symbol types of names and single characters, used by match_symbol
+        self.name_types = {}
+        for string_list, symbol_type in [(self.keyword_list, self.KEYWORD),
+                                         (self.heading_list, self.HEADING),
+                                         (self.pin_list, self.PIN)]:
+            for string in string_list:
+                self.name_types.setdefault(string, symbol_type)
+        self.character_types = {":": self.COLON, ".": self.DOT,
+                                "=": self.EQUAL}
+
         self.cur_character = " "
         self.cur_line = 1
         self.cur_pos = 0
@@ -122,32 +156,77 @@ class Scanner:
 
     def skip_comments(self):
         """Skip through all the comments following the sign # until a new line is reached."""
-        while self.cur_character != "\n":
+        while self.cur_character not in ["\n", ""]:
+            self.skip_run(self.comment_characters)
             self.advance()
         self.advance()
 
     def skip_spaces(self):
         """Skip through all the spaces and newlines until reaching a non-space character."""
-        # print("current cha skip_space:")
         while self.cur_character.isspace():
+            self.skip_run(self.space_characters)
             self.advance()
 
+    def read_chunk(self):
+        """Read the next chunk of the file into the buffer.
+
+        Return False if the end of the file has been reached.
+        """
+        if self.file.closed:
+            return False
+        self.buffer = self.file.read(self.chunk_size)
+        self.buffer_index = 0
+        if not self.buffer:
+            self.file.close()
+            return False
+        return True
+
     def advance(self):
         """Read the next character from the definition file and place it in cur_character."""
-        # print("ADVANCING:",self.cur_character)
         self.prev_pos = self.cur_pos
         self.cur_pos += 1
-        self.cur_character = self.file.read(1)
-        # print("AFTER ADVANCING:",self.cur_character)
+        if self.buffer_index == len(self.buffer) and not self.read_chunk():
+            self.cur_character = ""
+            return
+        self.cur_character = self.buffer[self.buffer_index]
+        self.buffer_index += 1
         if self.cur_character == "\n":
             self.cur_line += 1
             self.cur_pos = 0
 
+    def read_run(self, pattern):
+        """Return the run of characters after cur_character matching pattern.
+
+        The characters are consumed as if advance had been called for each
+        of them, except that cur_character is left unchanged.
+        """
+        run = []
+        while True:
+            end = pattern.match(self.buffer, self.buffer_index).end()
+            run.append(self.buffer[self.buffer_index:end])
+            self.buffer_index = end
+            if end < len(self.buffer) or not self.read_chunk():
+                break
+        run = "".join(run)
+        if run:
+            newlines = run.count("\n")
+            if newlines:
+                self.cur_line += newlines
+                self.cur_pos = len(run) - 1 - run.rfind("\n")
+            else:
+                self.cur_pos += len(run)
+        return run
+
+    def skip_run(self, pattern):
+        """Skip the run of characters after cur_character matching pattern."""
+        self.read_run(pattern)
+
     def get_name(self):
         """Return the name string (or None)."""
         name = self.cur_character  # By default, self.cur_character must be a letter initially
 
         while True:
+            name += self.read_run(self.name_characters)
             self.advance()
             if self.cur_character.isalnum():
                 name += self.cur_character
@@ -159,14 +238,89 @@ class Scanner:
         number = self.cur_character  # By default, self.cur_character must be a digit initially
 
         while True:
+            number += self.read_run(self.digit_characters)
             self.advance()
             if self.cur_character.isdigit():
                 number = number + self.cur_character
             else:
                 return number
 
+    def match_symbol(self):
+        """Translate the next symbol with a single regular expression match.
+
+        This gives the same symbol and scanner state as the character by
+        character code of get_symbol. Return None, without changing the
+        state, if the symbol or the character after it are not in the buffer
+        or need that code (such as non-ASCII names).
+        """
+        buffer = self.buffer
+        start = self.buffer_index - 1  # index of cur_character
+        if start < 0 or self.cur_character == "":
+            return None
+        match = self.next_symbol.match(buffer, start)
+        if match is None:
+            return None
+        kind = match.lastindex  # 1 name, 2 number, 3 arrow, 4 other
+        symbol_start, end = match.span(kind)  # end is the next cur_character
+        if kind == 4:
+            character = buffer[symbol_start]
+            if character == "-":  # a minus sign without ">" skips a character
+                end += 1
+        if end >= len(buffer) or (kind == 2 and buffer[end].isdigit()):
+            return None
+
+        # Only the spaces before the symbol and the character after it can be
+        # newlines, except after a minus sign
+        line = self.cur_line
+        newlines = buffer.count("\n", start + 1, symbol_start)
+        if newlines:
+            line += newlines
+            column = symbol_start - buffer.rfind("\n", start + 1,
+                                                 symbol_start)
+        else:
+            column = self.cur_pos + symbol_start - start
+
+        symbol = Symbol()
+        symbol.pos = column
+        if kind == 1:
+            name_string = buffer[symbol_start:end]
+            symbol.type = self.name_types.get(name_string, self.NAME)
+            symbol.line_num = line
+            [symbol.id] = self.names.lookup([name_string])
+        elif kind == 2:
+            [symbol.id] = self.names.lookup([buffer[symbol_start:end]])
+            symbol.type = self.NUMBER
+        elif kind == 3:
+            symbol.type = self.ARROW
+            symbol.line_num = line
+        elif character == ";":
+            symbol.type = self.SEMICOLON
+        else:
+            symbol.type = self.character_types.get(character)
+            symbol.line_num = line
+            if character == "-" and buffer[symbol_start + 1] == "\n":
+                line += 1
+                column = -1
+                symbol.line_num = line
+
+        self.prev_pos = column + end - 1 - symbol_start
+        if buffer[end] == "\n":
+            line += 1
+            self.cur_pos = 0
+        else:
+            self.cur_pos = self.prev_pos + 1
+        if kind == 2:
+            symbol.line_num = line
+        self.cur_line = line
+        self.cur_character = buffer[end]
+        self.buffer_index = end + 1
+        return symbol
+
     def get_symbol(self):
         """Translate the next sequence of characters into a symbol."""
+        symbol = self.match_symbol()
+        if symbol is not None:
+            return symbol
         symbol = Symbol()
         self.skip_spaces()
         while self.cur_character == "#":
@@ -345,6 +499,21 @@ class Scanner:
 
         return symbol
 
+    def symbols(self):
+        """Yield the symbols of the file one by one, up to and including EOF."""
+        while True:
+            symbol = self.get_symbol()
+            yield symbol
+            if symbol.type == self.EOF:
+                return
+
+    def get_file_lines(self):
+        """Return all the lines of the text file, reading them on first use."""
+        if self.file_lines is None:
+            with open(self.path, "r") as file:
+                self.file_lines = file.readlines()
+        return self.file_lines
+
     def display_error(self, error_message, error_symbol):
         """Display an error message whenever the parser encounters an error."""
         self.error_count += 1
@@ -354,22 +523,23 @@ class Scanner:
         
         if not isinstance(error_symbol, Symbol):
             raise TypeError("error_symbol must be a Symbol!")
-        
+
+        file_lines = self.get_file_lines()
         if error_symbol.type == self.EOF:
             i = -1
-            while self.file_lines[i] == "\n":
+            while file_lines[i] == "\n":
                 i -= 1
-            line_of_text = self.file_lines[i]
+            line_of_text = file_lines[i]
             error_line_num = str(self.cur_line + i)
-            error_pos = len(self.file_lines[int(error_line_num)-1])
+            error_pos = len(file_lines[int(error_line_num)-1])
 
         elif self.cur_pos == 0:
-            line_of_text = self.file_lines[self.cur_line - 2]
+            line_of_text = file_lines[self.cur_line - 2]
             error_line_num = str(self.cur_line - 1)
             error_pos = error_symbol.pos - 1
 
         else:
-            line_of_text = self.file_lines[self.cur_line - 1]
+            line_of_text = file_lines[self.cur_line - 1]
             error_line_num = str(self.cur_line)
             error_pos = error_symbol.pos - 1
 
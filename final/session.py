@@ -0,0 +1,253 @@
+"""Re-simulate a network incrementally after interactive changes.
+
+Used in the Logic Simulator project by the graphical user interface, so that
+changing a switch or adding a monitor does not simulate every cycle again
+from a cold start-up. The state of the network is saved at regular cycles,
+and a change is simulated from the nearest saved state.
+
+Classes
+-------
+Session - runs a network and replays it from checkpoints.
+"""
+from monitors import Monitors
+
+
+class Session:
+
+    """Run a network and replay it from checkpoints after changes.
+
+    A snapshot of the network is taken before every checkpoint_interval-th
+    cycle is simulated, and every switch change is stored with the cycle it
+    applies from. Setting a switch from an earlier cycle restores the last
+    checkpoint before that cycle, simulates up to it without recording,
+    and records the cycles from there again. Adding a monitor simulates only
+    the devices whose outputs reach the monitored output, from the first
+    checkpoint, unless the network has oscillated, since the cycle an
+    oscillation is left in depends on every device. The traces are the same
+    as simulating every cycle again. Cycles recorded again are not written
+    to a VCD file, which cannot go back in time.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    checkpoint_interval: number of cycles between checkpoints (optional).
+
+    Public methods
+    --------------
+    run(self, cycles): Runs the network from a cold start-up.
+
+    continue_run(self, cycles): Continues the simulation for more cycles.
+
+    set_switch(self, switch_id, signal, cycle=None): Sets a switch from the
+                                        given cycle and simulates again.
+
+    add_monitor(self, device_id, output_id): Makes a monitor and records its
+                                             signals for the cycles run.
+
+    remove_monitor(self, device_id, output_id): Removes a monitor.
+    """
+
+    def __init__(self, names, devices, network, monitors,
+                 checkpoint_interval=100):
+        """Initialise the checkpoints and switch changes."""
+        if not isinstance(checkpoint_interval, int) or \
+                isinstance(checkpoint_interval, bool):
+            raise TypeError("Expected checkpoint_interval to be an integer.")
+        if checkpoint_interval < 1:
+            raise ValueError("Expected checkpoint_interval to be a positive "
+                             "integer.")
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+        self.checkpoint_interval = checkpoint_interval
+
+        self.cycles = 0  # number of cycles recorded by the monitors
+        # checkpoints stores {cycle: network snapshot}, taken before the
+        # switch changes of the cycle are applied and the cycle is simulated
+        self.checkpoints = {}
+        # switch_events lists (cycle, switch_id, signal) in order of cycle
+        self.switch_events = []
+        # oscillating_names lists the devices found oscillating by the last
+        # run, continue or switch change
+        self.oscillating = False
+        self.oscillating_names = []
+        # oscillating_cycles stores the cycles in which the network oscillated
+        self.oscillating_cycles = set()
+
+    def run_cycles(self, start, cycles, monitors):
+        """Simulate the cycles from cycle start, recording them in monitors
+        if not None.
+
+        An oscillating cycle is recorded as it is left and the simulation
+        continues, so that the number of cycles is always the same.
+        """
+        cycles_completed = 0
+        while cycles_completed < cycles:
+            cycles_completed += self.network.run_cycles(
+                cycles - cycles_completed, monitors)
+            if cycles_completed < cycles:  # oscillating cycle
+                self.oscillating = True
+                self.oscillating_names = self.network.get_oscillating_names()
+                self.oscillating_cycles.add(start + cycles_completed)
+                if monitors is not None:
+                    monitors.record_signals()
+                cycles_completed += 1
+
+    def simulate(self, start, end, monitors, save_checkpoints=True):
+        """Simulate from cycle start to cycle end, applying switch changes.
+
+        The network must be in its state at cycle start. Checkpoints are
+        saved on the way unless save_checkpoints is False.
+        """
+        interval = self.checkpoint_interval
+        cycle = start
+        while True:
+            if save_checkpoints and cycle % interval == 0 and \
+                    cycle not in self.checkpoints:
+                self.checkpoints[cycle] = self.network.snapshot()
+            next_cycle = min(end, (cycle // interval + 1) * interval)
+            for event_cycle, switch_id, signal in self.switch_events:
+                if event_cycle == cycle:
+                    self.devices.set_switch(switch_id, signal)
+                elif cycle < event_cycle < next_cycle:
+                    next_cycle = event_cycle
+            if cycle >= end:
+                return
+            self.run_cycles(cycle, next_cycle - cycle, monitors)
+            cycle = next_cycle
+
+    def replay(self, start, cycle):
+        """Simulate again from the checkpoint at cycle start, recording the
+        cycles from the given cycle on.
+
+        The VCD writer of the monitors is detached while the cycles are
+        recorded again, since the file cannot go back in time.
+        """
+        self.oscillating_cycles = {oscillating_cycle for oscillating_cycle
+                                   in self.oscillating_cycles
+                                   if oscillating_cycle < start}
+        self.network.restore(self.checkpoints[start])
+        self.simulate(start, cycle, None)
+        vcd_writer = self.monitors.vcd_writer
+        self.monitors.set_vcd_writer(None)
+        try:
+            self.monitors.truncate_monitors(cycle)
+            self.simulate(cycle, self.cycles, self.monitors)
+        finally:
+            self.monitors.set_vcd_writer(vcd_writer)
+
+    def run(self, cycles):
+        """Run the network for the cycles from a cold start-up.
+
+        The switch changes and checkpoints of the previous run are
+        discarded, and the switches start in their current states.
+        """
+        self.devices.cold_startup()
+        self.monitors.reset_monitors()
+        self.checkpoints = {}
+        self.switch_events = []
+        self.oscillating = False
+        self.oscillating_names = []
+        self.oscillating_cycles = set()
+        self.simulate(0, cycles, self.monitors)
+        self.cycles = cycles
+
+    def continue_run(self, cycles):
+        """Continue the simulation for the cycles."""
+        self.oscillating = False
+        self.oscillating_names = []
+        self.simulate(self.cycles, self.cycles + cycles, self.monitors)
+        self.cycles += cycles
+
+    def set_switch(self, switch_id, signal, cycle=None):
+        """Set the switch to signal from the cycle on.
+
+        If cycle is None, the switch is set from the next cycle to be run.
+        Otherwise the cycles recorded from the given cycle on are simulated
+        again. Return True if successful.
+        """
+        if cycle is None:
+            cycle = self.cycles
+        elif not isinstance(cycle, int) or isinstance(cycle, bool):
+            raise TypeError("Expected cycle to be an integer.")
+        elif not 0 <= cycle <= self.cycles:
+            raise ValueError("Expected cycle to be within the cycles run.")
+        switch = self.devices.get_device(switch_id)
+        if switch is None or switch.device_kind != self.devices.SWITCH or \
+                signal not in [self.devices.LOW, self.devices.HIGH]:
+            return False
+
+        # Later changes of the switch are overridden
+        self.switch_events = [event for event in self.switch_events
+                              if event[1] != switch_id or event[0] < cycle]
+        self.switch_events.append((cycle, switch_id, signal))
+        self.switch_events.sort(key=lambda event: event[0])
+        if cycle == self.cycles:
+            self.devices.set_switch(switch_id, signal)
+            return True
+
+        self.oscillating = False
+        self.oscillating_names = []
+        for checkpoint in list(self.checkpoints):
+            if checkpoint > cycle:
+                del self.checkpoints[checkpoint]
+        self.replay(max(self.checkpoints), cycle)
+        return True
+
+    def add_monitor(self, device_id, output_id):
+        """Make a monitor and record its signals for the cycles run.
+
+        Only the devices whose outputs reach the monitored output are
+        simulated again, from the first checkpoint, and the other devices
+        are restored afterwards. If the network has oscillated, every cycle
+        is simulated and recorded again instead. Return NO_ERROR if
+        successful, or the error of monitors.make_monitor if not.
+        """
+        pruned_devices = self.network.simulated_devices
+        error_type = self.monitors.make_monitor(device_id, output_id)
+        if error_type != self.monitors.NO_ERROR or not self.cycles:
+            return error_type
+
+        saved_oscillation = (self.oscillating, self.oscillating_names)
+        if self.oscillating_cycles:
+            # The cycle an oscillation is left in depends on every device, so
+            # every cycle is simulated again, saving the checkpoints again
+            # in case the monitor adds devices to a pruned network
+            self.checkpoints = {0: self.checkpoints[0]}
+            self.replay(0, 0)
+            self.oscillating, self.oscillating_names = saved_oscillation
+            return error_type
+
+        saved_state = self.network.snapshot()
+        simulated_devices = self.network.simulated_devices
+        fan_in = self.network.get_fan_in([(device_id, output_id)])
+        if pruned_devices is not None and not fan_in <= pruned_devices:
+            # The later checkpoints hold stale states of the devices the
+            # monitor adds to a pruned network
+            self.checkpoints = {0: self.checkpoints[0]}
+        self.network.restore(self.checkpoints[0])
+        self.network.set_simulated_devices(fan_in)
+        cone_monitors = Monitors(self.names, self.devices, self.network)
+        cone_monitors.make_monitor(device_id, output_id)
+        try:
+            self.simulate(0, self.cycles, cone_monitors,
+                          save_checkpoints=False)
+        finally:
+            # The fan-in keeps the state the replay reached, which is correct
+            # even for devices that monitors.set_pruning had left out
+            self.network.restore(saved_state, [
+                other_id for other_id in self.devices.find_devices()
+                if other_id not in fan_in])
+            self.network.set_simulated_devices(simulated_devices)
+            self.oscillating, self.oscillating_names = saved_oscillation
+        self.monitors.monitors_dictionary[(device_id, output_id)].extend(
+            cone_monitors.monitors_dictionary[(device_id, output_id)])
+        return error_type
+
+    def remove_monitor(self, device_id, output_id):
+        """Remove the monitor. Return True if successful."""
+        return self.monitors.remove_monitor(device_id, output_id)
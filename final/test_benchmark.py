@@ -0,0 +1,164 @@
+"""Test the benchmark module."""
+import json
+
+import pytest
+
+import benchmark
+from benchmark import (build_network, build_shift_register, run_benchmark,
+                       run_build_benchmark, run_names_benchmark,
+                       run_memory_benchmark, run_suite,
+                       write_definition_file)
+from names import Names
+from devices import Devices
+from network import Network
+from scanner import Scanner
+
+
+def test_build_network():
+    """Test if build_network makes a fully connected network of given size."""
+    names, devices, network = build_network(50)
+
+    assert len(devices.find_devices()) == 50
+    assert len(devices.find_devices(devices.SWITCH)) == 5
+    assert network.check_network()
+
+
+class CountingList(list):
+
+    """A list that counts the items visited by iterating and searching it."""
+
+    def __init__(self, items):
+        """Initialise the items and the count."""
+        super().__init__(items)
+        self.visits = 0
+
+    def __iter__(self):
+        """Count every item as it is iterated over."""
+        for item in super().__iter__():
+            self.visits += 1
+            yield item
+
+    def __contains__(self, item):
+        """Count a search as a visit of every item."""
+        self.visits += len(self)
+        return super().__contains__(item)
+
+    def index(self, *args):
+        """Count a search as a visit of every item."""
+        self.visits += len(self)
+        return super().index(*args)
+
+
+def count_device_operations(devices):
+    """Count the device lookups and the devices visited in devices_list.
+
+    Return a function returning the operations counted so far.
+    """
+    devices.devices_list = CountingList(devices.devices_list)
+    lookups = []
+    get_device = devices.get_device
+
+    def counted_get_device(device_id):
+        lookups.append(device_id)
+        return get_device(device_id)
+    devices.get_device = counted_get_device
+    return lambda: len(lookups) + devices.devices_list.visits
+
+
+def test_cycle_cost_scales_linearly():
+    """Test if the operations per device of a cycle do not grow with size."""
+    operations = []
+    for size in [200, 2000]:
+        names, devices, network = build_network(size)
+        network.execute_network()  # let the network settle first
+        count = count_device_operations(devices)
+        for _ in range(5):
+            assert network.execute_network()
+        operations.append(count() / size)
+
+    # A quadratic cost would make each device ten times more expensive
+    assert 0 < operations[1] < 2 * operations[0]
+    assert all(seconds > 0 for size, seconds in run_benchmark([50], 2))
+
+
+def test_build_cost_scales_linearly():
+    """Test if the operations per device of building D-types do not grow."""
+    operations = []
+    for size in [500, 5000]:
+        names = Names()
+        devices = Devices(names)
+        network = Network(names, devices)
+        count = count_device_operations(devices)
+        cold_starts = []
+        cold_start_device = devices.cold_start_device
+        devices.cold_start_device = lambda device: (
+            cold_starts.append(device), cold_start_device(device))
+        build_shift_register(names, devices, network, size)
+        operations.append((count() + len(cold_starts)) / size)
+
+    # Cold starting every device whenever a D-type is made is quadratic
+    assert 0 < operations[1] < 2 * operations[0]
+    assert all(seconds > 0 for size, seconds in run_build_benchmark([50]))
+
+
+def test_scan_cost_scales_linearly(tmp_path):
+    """Test if the names searched per name scanned do not grow with size."""
+    operations = []
+    for size in [1000, 10000]:
+        path = tmp_path / ("names%d.txt" % size)
+        with open(str(path), "w") as file:
+            write_definition_file(file, size)
+        names = Names()
+        names.names = CountingList(names.names)
+        for symbol in Scanner(str(path), names).symbols():
+            pass
+        assert len(names.names) > size
+        operations.append(names.names.visits / size)
+
+    # Searching the names list for every name is quadratic
+    assert operations[1] <= 2 * operations[0] + 1
+    assert all(seconds > 0 for size, seconds in run_names_benchmark([50]))
+
+
+def test_memory_benchmark():
+    """Test if the memory per device does not grow with size."""
+    [(small_size, small_memory, _),
+     (large_size, large_memory, large_devices)] = run_memory_benchmark(
+         [1000, 10000])
+
+    assert 0 < large_devices < large_memory < 2 * small_memory
+    # The compact table takes a tenth of the memory of Device objects
+    [(_, _, compact_devices)] = run_memory_benchmark([10000], compact=True)
+    assert 0 < compact_devices < large_devices / 8
+
+
+def test_suite():
+    """Test if the suite reports every cost for each topology and size."""
+    suite = run_suite(["adder", "shift"], [10, 50], 2)
+    assert [(result["topology"], result["size"])
+            for result in suite["results"]] == [("adder", 10), ("adder", 50),
+                                                 ("shift", 10), ("shift", 50)]
+    for result in suite["results"]:
+        for key in ["scan_seconds", "parse_seconds", "build_seconds",
+                    "cycle_seconds", "peak_bytes"]:
+            assert result[key] > 0
+    json.dumps(suite)
+
+
+def test_main_options(monkeypatch, capsys):
+    """Test if the default sizes are used by every mode and an unknown
+    engine gives a usage error."""
+    used_sizes = []
+
+    def record_sizes(sizes):
+        used_sizes.append(sizes)
+        return []
+    monkeypatch.setattr(benchmark, "run_build_benchmark", record_sizes)
+    monkeypatch.setattr(benchmark, "run_names_benchmark", record_sizes)
+    benchmark.main(["-b"])
+    benchmark.main(["-n"])
+    assert used_sizes == [[100, 1000, 10000, 100000]] * 2
+
+    with pytest.raises(SystemExit):
+        benchmark.main(["-e", "fast"])
+    assert "Error: unknown engine fast" in capsys.readouterr().out
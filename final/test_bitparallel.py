@@ -0,0 +1,165 @@
+"""Test the bitparallel module."""
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from bitparallel import BitParallelSimulator
+
+
+def make_circuit():
+    """Return a circuit whose traces depend on the cold start state.
+
+    A clock drives a D-type which toggles, an XOR of the clock and the D-type
+    output and a siggen feeds an SR latch made from NANDs.
+    """
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [SW1_ID, CL_ID, SG_ID, D1_ID, XOR1_ID, NAND1_ID, NAND2_ID,
+     I1, I2] = names.lookup(["Sw1", "Clock1", "Sig1", "D1", "Xor1", "Nand1",
+                             "Nand2", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(CL_ID, devices.CLOCK, 3)
+    devices.make_device(SG_ID, devices.SIGGEN, "0110")
+    devices.make_device(D1_ID, devices.D_TYPE)
+    devices.make_device(XOR1_ID, devices.XOR)
+    devices.make_device(NAND1_ID, devices.NAND, 2)
+    devices.make_device(NAND2_ID, devices.NAND, 2)
+
+    connections = [(CL_ID, None, D1_ID, devices.CLK_ID),
+                   (D1_ID, devices.QBAR_ID, D1_ID, devices.DATA_ID),
+                   (SW1_ID, None, D1_ID, devices.SET_ID),
+                   (SW1_ID, None, D1_ID, devices.CLEAR_ID),
+                   (CL_ID, None, XOR1_ID, I1),
+                   (D1_ID, devices.Q_ID, XOR1_ID, I2),
+                   (SG_ID, None, NAND1_ID, I1),
+                   (NAND2_ID, None, NAND1_ID, I2),
+                   (XOR1_ID, None, NAND2_ID, I1),
+                   (NAND1_ID, None, NAND2_ID, I2)]
+    for connection in connections:
+        assert network.make_connection(*connection) == network.NO_ERROR
+    for device_id, output_id in [(D1_ID, devices.Q_ID), (XOR1_ID, None),
+                                 (NAND1_ID, None), (SG_ID, None)]:
+        monitors.make_monitor(device_id, output_id)
+    return names, devices, network, monitors
+
+
+def make_oscillator():
+    """Return a circuit with a loop that oscillates in some cycles.
+
+    A NAND gate reads an AND gate that buffers its own output, so the loop
+    oscillates whenever its other input, a toggling D-type output, is HIGH.
+    """
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [SW1_ID, CL_ID, D1_ID, NAND1_ID, AND1_ID, I1, I2] = names.lookup(
+        ["Sw1", "Clock1", "D1", "Nand1", "And1", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(CL_ID, devices.CLOCK, 2)
+    devices.make_device(D1_ID, devices.D_TYPE)
+    devices.make_device(NAND1_ID, devices.NAND, 2)
+    devices.make_device(AND1_ID, devices.AND, 1)
+
+    connections = [(CL_ID, None, D1_ID, devices.CLK_ID),
+                   (D1_ID, devices.QBAR_ID, D1_ID, devices.DATA_ID),
+                   (SW1_ID, None, D1_ID, devices.SET_ID),
+                   (SW1_ID, None, D1_ID, devices.CLEAR_ID),
+                   (D1_ID, devices.Q_ID, NAND1_ID, I1),
+                   (AND1_ID, None, NAND1_ID, I2),
+                   (NAND1_ID, None, AND1_ID, I1)]
+    for connection in connections:
+        assert network.make_connection(*connection) == network.NO_ERROR
+    for device_id in [NAND1_ID, AND1_ID]:
+        monitors.make_monitor(device_id, None)
+    return names, devices, network, monitors
+
+
+@pytest.mark.parametrize("make_network", [make_circuit, make_oscillator])
+def test_instances_match_single_runs(make_network):
+    """Test if every instance gives the traces of a run with its seed."""
+    seeds = list(range(20))
+    names, devices, network, monitors = make_network()
+    simulator = BitParallelSimulator(names, devices, network, monitors, seeds)
+    settled = []
+    for _ in range(30):
+        settled.append(simulator.execute_network())
+        simulator.record_signals()
+
+    for instance, seed in enumerate(seeds):
+        names, devices, network, monitors = make_network()
+        devices.set_seed(seed)
+        devices.cold_startup()
+        steady = []
+        for _ in range(30):
+            steady.append(network.execute_network())
+            monitors.record_signals()
+        assert [bool(mask >> instance & 1) for mask in settled] == steady
+        assert simulator.get_monitor_traces(instance) == \
+            dict(monitors.monitors_dictionary)
+
+
+def test_divergence():
+    """Test if the instances that differ from the first are reported."""
+    names, devices, network, monitors = make_circuit()
+    simulator = BitParallelSimulator(names, devices, network, monitors,
+                                     range(10))
+    assert simulator.run_network(10)
+    divergence = simulator.get_divergence()
+    diverging = simulator.get_diverging_instances()
+    assert diverging
+    assert 0 not in diverging
+    for monitor, (first_cycle, instances) in divergence.items():
+        traces = [simulator.get_monitor_traces(instance)[monitor]
+                  for instance in range(10)]
+        assert instances == [instance for instance in range(10)
+                             if traces[instance] != traces[0]]
+        assert all(trace[:first_cycle] == traces[0][:first_cycle]
+                   for trace in traces)
+        assert any(trace[first_cycle] != traces[0][first_cycle]
+                   for trace in traces)
+    assert simulator.get_unsteady_instances() == []
+
+    # Instances with the same seed never diverge
+    names, devices, network, monitors = make_circuit()
+    simulator = BitParallelSimulator(names, devices, network, monitors,
+                                     [4, 4, 4])
+    simulator.run_network(10)
+    assert simulator.get_diverging_instances() == []
+
+
+def test_cold_startup_restores_devices():
+    """Test if the devices and their random generator are left unchanged."""
+    names, devices, network, monitors = make_circuit()
+    [D1_ID] = names.lookup(["D1"])
+    memory = devices.get_device(D1_ID).dtype_memory
+    random.seed(99)
+    BitParallelSimulator(names, devices, network, monitors, [1, 2, 3])
+    assert devices.get_device(D1_ID).dtype_memory == memory
+    assert devices.random is random and devices.seed is None
+    value = random.random()
+    random.seed(99)
+    assert random.random() == value
+
+    devices.set_seed(5)
+    BitParallelSimulator(names, devices, network, monitors, [1, 2, 3])
+    assert devices.seed == 5
+
+
+def test_invalid_arguments():
+    """Test if invalid seeds and unconnected inputs are handled."""
+    names, devices, network, monitors = make_circuit()
+    with pytest.raises(ValueError):
+        BitParallelSimulator(names, devices, network, monitors, [])
+
+    [AND1_ID] = names.lookup(["And1"])
+    devices.make_device(AND1_ID, devices.AND, 2)
+    simulator = BitParallelSimulator(names, devices, network, monitors, [1])
+    assert simulator.execute_network() is None
+    assert not simulator.run_network(5)
@@ -0,0 +1,170 @@
+"""Test the codegen module."""
+import os
+
+import pytest
+
+import codegen
+import generate
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+
+
+def make_network(engine, cache_dir=None, size=200, seed=3):
+    """Return the network and monitors of a random netlist."""
+    names = Names()
+    devices = Devices(names, seed=1)
+    network = Network(names, devices, engine)
+    if engine == "compiled":
+        network.compiled_engine.cache_dir = cache_dir
+    monitors = Monitors(names, devices, network)
+    device_list, connection_list, monitor_list = \
+        generate.make_random_network(size, seed)
+    assert generate.build_netlist((device_list, connection_list,
+                                   monitor_list), names, devices, network,
+                                  monitors)
+    return network, monitors
+
+
+def run(network, monitors, cycles):
+    """Run the network from a cold start-up, setting switches on the way.
+
+    Return the traces and the settle iterations of every cycle.
+    """
+    devices = network.devices
+    switch_ids = devices.find_devices(devices.SWITCH)
+    devices.cold_startup()
+    iterations = []
+    for cycle in range(cycles):
+        devices.set_switch(switch_ids[cycle % len(switch_ids)], cycle % 2)
+        assert network.execute_network()
+        monitors.record_signals()
+        iterations.append(network.settle_iterations)
+    traces = {monitor: list(trace)
+              for monitor, trace in monitors.monitors_dictionary.items()}
+    return traces, iterations
+
+
+@pytest.mark.parametrize("size, seed", [(50, 1), (200, 3), (500, 4)])
+def test_compiled_engine_matches_levelized_engine(size, seed):
+    """Test if the generated code gives the same traces and iterations."""
+    assert run(*make_network("compiled", size=size, seed=seed), 30) == \
+        run(*make_network("levelized", size=size, seed=seed), 30)
+
+
+def test_generate_source():
+    """Test if the source has one local per signal and bitwise gates."""
+    network, monitors = make_network("compiled")
+    network.compile_network()
+    engine = network.compiled_engine
+    plan = engine.get_plan()
+    source = engine.generate_source(plan)
+    assert "def execute_cycle(" in source
+    no_of_signals = sum(len(device.outputs)
+                        for device in network.devices.devices_list)
+    assert "n%d, = signals" % (no_of_signals - 1) in source
+    assert "n%d " % no_of_signals not in source
+    for operator in [" & ", " | ", " ^ ", ") ^ 1]"]:
+        assert operator in source
+    # Equal netlists give the same key, so they share their cached code
+    other_network, _ = make_network("compiled")
+    other_network.compile_network()
+    assert engine.get_key(other_network.compiled_engine.get_plan()) == \
+        engine.get_key(plan)
+
+
+def test_code_is_cached(tmp_path):
+    """Test if a netlist loaded again reads its code from the cache."""
+    network, monitors = make_network("compiled", str(tmp_path))
+    expected = run(network, monitors, 20)
+    assert not network.compiled_engine.from_cache
+    assert len(os.listdir(str(tmp_path))) == 1
+
+    network, monitors = make_network("compiled", str(tmp_path))
+    assert run(network, monitors, 20) == expected
+    assert network.compiled_engine.from_cache
+
+    # A different netlist has its own code
+    network, monitors = make_network("compiled", str(tmp_path), seed=4)
+    run(network, monitors, 1)
+    assert not network.compiled_engine.from_cache
+    assert len(os.listdir(str(tmp_path))) == 2
+
+
+def test_cache_dir(tmp_path, monkeypatch):
+    """Test if the cache is in $XDG_CACHE_HOME, or else in ~/.cache."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert codegen.get_cache_dir() == str(tmp_path / "logsim")
+    network, monitors = make_network("compiled")
+    assert network.compiled_engine.cache_dir is None
+    network = Network(network.names, network.devices, "compiled")
+    assert network.compiled_engine.cache_dir == str(tmp_path / "logsim")
+
+    monkeypatch.setenv("XDG_CACHE_HOME", "relative")
+    monkeypatch.setenv("HOME", str(tmp_path))
+    assert codegen.get_cache_dir() == str(tmp_path / ".cache" / "logsim")
+
+
+def test_cache_is_bounded(tmp_path, monkeypatch):
+    """Test if the least recently used code is removed from the cache."""
+    monkeypatch.setattr(codegen.CompiledEngine, "max_cache_files", 2)
+    file_names = set()
+    for seed in [1, 2, 3]:
+        network, monitors = make_network("compiled", str(tmp_path), 50, seed)
+        run(network, monitors, 1)
+        # Each file is made to look older than the next one
+        [file_name] = set(os.listdir(str(tmp_path))) - file_names
+        os.utime(os.path.join(str(tmp_path), file_name), (seed, seed))
+        file_names.add(file_name)
+    assert len(os.listdir(str(tmp_path))) == 2
+    # The code of the first netlist was the least recently used
+    network, monitors = make_network("compiled", str(tmp_path), 50, 1)
+    run(network, monitors, 1)
+    assert not network.compiled_engine.from_cache
+
+
+def test_unusable_cache_is_ignored(tmp_path):
+    """Test if a damaged or unwritable cache falls back to generating."""
+    network, monitors = make_network("compiled", str(tmp_path))
+    expected = run(network, monitors, 10)
+    [file_name] = os.listdir(str(tmp_path))
+    with open(os.path.join(str(tmp_path), file_name), "wb") as file:
+        file.write(b"damaged")
+    network, monitors = make_network("compiled", str(tmp_path))
+    assert run(network, monitors, 10) == expected
+    assert not network.compiled_engine.from_cache
+
+    # The cache directory is a file, so nothing can be written to it
+    path = tmp_path / "file"
+    path.write_text("")
+    network, monitors = make_network("compiled", str(path))
+    assert run(network, monitors, 10) == expected
+
+
+def test_functions_are_reused():
+    """Test if simulating other devices and back reuses the function."""
+    network, monitors = make_network("compiled")
+    run(network, monitors, 2)
+    engine = network.compiled_engine
+    function = engine.function
+    network.set_simulated_devices(network.get_fan_in(
+        list(monitors.monitors_dictionary)[:1]))
+    assert network.execute_network()
+    assert engine.function is not function
+    network.set_simulated_devices(None)
+    assert network.execute_network()
+    assert engine.function is function
+    assert len(engine.functions) == 2
+
+
+def test_unconnected_input():
+    """Test if a network with an unconnected input is not executed."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, "compiled")
+    network.compiled_engine.cache_dir = None
+    [AND1_ID] = names.lookup(["And1"])
+    devices.make_device(AND1_ID, devices.AND, 2)
+    assert not network.execute_network()
@@ -1,22 +1,25 @@
 """Test the devices module."""
+import random
+
 import pytest
 
 from names import Names
 from devices import Devices
 
 
-@pytest.fixture
-def new_devices():
-    """Return a new instance of the Devices class."""
+@pytest.fixture(params=[False, True], ids=["objects", "compact"])
+def new_devices(request):
+    """Return a new instance of the Devices class, storing the devices as
+    objects or in a compact table."""
     new_names = Names()
-    return Devices(new_names)
+    return Devices(new_names, compact=request.param)
 
 
-@pytest.fixture
-def devices_with_items():
+@pytest.fixture(params=[False, True], ids=["objects", "compact"])
+def devices_with_items(request):
     """Return a Devices class instance with three devices in the network."""
     new_names = Names()
-    new_devices = Devices(new_names)
+    new_devices = Devices(new_names, compact=request.param)
 
     [AND1_ID, NOR1_ID, SW1_ID] = new_names.lookup(["And1", "Nor1", "Sw1"])
 
@@ -162,3 +165,119 @@ def test_set_switch(new_devices):
     # Set switch Sw1 to LOW
     new_devices.set_switch(SW1_ID, new_devices.LOW)
     assert switch_object.switch_state == new_devices.LOW
+
+
+def test_remove_device(devices_with_items):
+    """Test if remove_device keeps the device lookups consistent."""
+    devices = devices_with_items
+    names = devices.names
+    [AND1_ID, NOR1_ID, SW1_ID, X_ID] = names.lookup(["And1", "Nor1", "Sw1",
+                                                     "Random_non_device"])
+
+    assert devices.remove_device(NOR1_ID)
+    assert devices.get_device(NOR1_ID) is None
+    assert devices.find_devices() == [AND1_ID, SW1_ID]
+    assert devices.find_devices(devices.NOR) == []
+    assert [device.device_id for device in devices.devices_list] == [
+        AND1_ID, SW1_ID]
+
+    # Removing an absent device fails
+    assert not devices.remove_device(NOR1_ID)
+    assert not devices.remove_device(X_ID)
+
+    # The ID can be used again
+    assert devices.make_device(NOR1_ID, devices.NOR, 2) == devices.NO_ERROR
+    assert devices.find_devices(devices.NOR) == [NOR1_ID]
+
+
+def test_replace_device(devices_with_items):
+    """Test if replace_device keeps the ID, place and outputs of a device."""
+    devices = devices_with_items
+    names = devices.names
+    [AND1_ID, NOR1_ID, SW1_ID, X_ID] = names.lookup(["And1", "Nor1", "Sw1",
+                                                     "Random_non_device"])
+    devices.get_device(AND1_ID).outputs[None] = devices.HIGH
+    revision = devices.revision
+
+    switch = devices.replace_device(AND1_ID, devices.SWITCH)
+    assert devices.get_device(AND1_ID) == switch
+    assert devices.revision == revision + 1
+    assert switch.device_kind == devices.SWITCH and switch.inputs == {}
+    assert switch.outputs == {None: devices.HIGH}
+    assert devices.find_devices() == [AND1_ID, NOR1_ID, SW1_ID]
+    assert devices.devices_list[0] == switch
+    assert devices.find_devices(devices.AND) == []
+    assert devices.find_devices(devices.SWITCH) == [SW1_ID, AND1_ID]
+    assert devices.set_switch(AND1_ID, devices.HIGH)
+    assert devices.replace_device(X_ID, devices.AND) is None
+
+
+def test_set_seed(new_devices):
+    """Test if seeded cold start-ups are reproducible."""
+    devices = new_devices
+    names = devices.names
+    device_ids = names.lookup(["Clock1", "D1", "D2", "Sig1"])
+    devices.make_device(device_ids[0], devices.CLOCK, 50)
+    devices.make_device(device_ids[1], devices.D_TYPE)
+    devices.make_device(device_ids[2], devices.D_TYPE)
+    devices.make_device(device_ids[3], devices.SIGGEN, "0010110")
+
+    def start_state():
+        devices.cold_startup()
+        return [(device.clock_counter, device.dtype_memory,
+                 device.siggen_counter, dict(device.outputs))
+                for device in devices.devices_list]
+
+    devices.set_seed(3)
+    first_state = start_state()
+    assert start_state() == first_state
+    assert Devices(names, 3).seed == 3
+
+    # A generator is used as it is, without restarting it
+    devices.set_seed(random.Random(3))
+    assert devices.seed is None
+    assert start_state() == first_state
+    assert start_state() != first_state
+
+    devices.set_seed(None)
+    assert devices.random is random
+
+    with pytest.raises(TypeError):
+        devices.set_seed("3")
+    with pytest.raises(TypeError):
+        Devices(names, 1.5)
+
+
+def test_make_device_starts_only_new_device(new_devices):
+    """Test if making a device cold starts only that device."""
+    devices = new_devices
+    [CL_ID, D1_ID, D2_ID] = devices.names.lookup(["Clock1", "D1", "D2"])
+    devices.make_device(CL_ID, devices.CLOCK, 5)
+    devices.make_device(D1_ID, devices.D_TYPE)
+    clock = devices.get_device(CL_ID)
+    clock.clock_counter = 100
+    devices.make_device(D2_ID, devices.D_TYPE)
+
+    assert devices.startup_count == 0
+    assert clock.clock_counter == 100
+    assert devices.get_device(D2_ID).dtype_memory in [devices.LOW,
+                                                      devices.HIGH]
+    devices.cold_startup()
+    assert 0 <= clock.clock_counter < 5
+
+
+def test_devices_have_no_attribute_dictionary(devices_with_items):
+    """Test if devices use slots and read other kinds' properties as None."""
+    names = devices_with_items.names
+    [AND1_ID, SW1_ID] = names.lookup(["And1", "Sw1"])
+    gate = devices_with_items.get_device(AND1_ID)
+    switch = devices_with_items.get_device(SW1_ID)
+
+    for device in [gate, switch]:
+        assert not hasattr(device, "__dict__")
+        assert device.dtype_memory is None
+        assert device.clock_half_period is None
+    assert switch.switch_state == 0
+    assert gate.switch_state is None
+    with pytest.raises(AttributeError):
+        gate.dtype_memory = 0
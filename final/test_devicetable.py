@@ -0,0 +1,102 @@
+"""Test the devicetable module."""
+import pytest
+
+import generate
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+
+
+@pytest.fixture
+def compact_devices():
+    """Return a compact Devices instance with two gates and a D-type."""
+    names = Names()
+    devices = Devices(names, compact=True)
+    [AND1_ID, OR1_ID, D1_ID] = names.lookup(["And1", "Or1", "D1"])
+    devices.make_device(AND1_ID, devices.AND, 2)
+    devices.make_device(OR1_ID, devices.OR, 3)
+    devices.make_device(D1_ID, devices.D_TYPE)
+    return devices
+
+
+def run(engine, compact, seed):
+    """Run a random network and return its traces and final snapshot."""
+    names = Names()
+    devices = Devices(names, seed=1, compact=compact)
+    network = Network(names, devices, engine)
+    if engine == "compiled":
+        network.compiled_engine.cache_dir = None
+    monitors = Monitors(names, devices, network)
+    assert generate.build_netlist(generate.make_random_network(200, seed),
+                                  names, devices, network, monitors)
+    switch_ids = devices.find_devices(devices.SWITCH)
+    devices.cold_startup()
+    for cycle in range(30):
+        devices.set_switch(switch_ids[cycle % len(switch_ids)], cycle % 2)
+        assert network.execute_network()
+        monitors.record_signals()
+    traces = {monitor: list(trace)
+              for monitor, trace in monitors.monitors_dictionary.items()}
+    return traces, network.snapshot()
+
+
+def test_ports_read_as_dictionaries(compact_devices):
+    """Test if the inputs and outputs views behave like dictionaries."""
+    devices = compact_devices
+    [AND1_ID, OR1_ID, D1_ID, I1_ID, I2_ID, I3_ID] = devices.names.lookup(
+        ["And1", "Or1", "D1", "I1", "I2", "I3"])
+    gate = devices.get_device(AND1_ID)
+    assert gate.inputs == {I1_ID: None, I2_ID: None}
+    assert gate.outputs == {None: devices.LOW}
+
+    gate.inputs[I1_ID] = (D1_ID, devices.QBAR_ID)
+    gate.inputs[I2_ID] = (OR1_ID, None)
+    gate.outputs[None] = devices.HIGH
+    assert gate.inputs == {I1_ID: (D1_ID, devices.QBAR_ID),
+                           I2_ID: (OR1_ID, None)}
+    assert devices.get_device(AND1_ID).outputs[None] == devices.HIGH
+
+    # A new input moves the gate's inputs after the other devices' ports
+    assert devices.add_input(AND1_ID, I3_ID)
+    assert list(gate.inputs) == [I1_ID, I2_ID, I3_ID]
+    assert gate.inputs[I2_ID] == (OR1_ID, None)
+    assert list(devices.get_device(OR1_ID).inputs) == [I1_ID, I2_ID, I3_ID]
+    del gate.inputs[I1_ID]
+    assert gate.inputs == {I2_ID: (OR1_ID, None), I3_ID: None}
+    with pytest.raises(KeyError):
+        gate.inputs[I1_ID]
+
+
+def test_properties(compact_devices):
+    """Test if each kind has its own properties and the others are None."""
+    devices = compact_devices
+    [CL1_ID, SIG1_ID, RC1_ID, D1_ID] = devices.names.lookup(
+        ["Clock1", "Sig1", "RC1", "D1"])
+    devices.make_device(CL1_ID, devices.CLOCK, 3)
+    devices.make_device(SIG1_ID, devices.SIGGEN, 110)
+    devices.make_device(RC1_ID, devices.RC, 4)
+    clock = devices.get_device(CL1_ID)
+    siggen = devices.get_device(SIG1_ID)
+    assert clock.clock_half_period == 3
+    assert 0 <= clock.clock_counter < 3
+    assert clock.time_constant is None
+    assert clock.state_attributes == ("clock_counter",)
+    assert siggen.siggen_wave == [devices.HIGH, devices.HIGH, devices.LOW]
+    assert devices.get_device(RC1_ID).time_constant == 4
+    assert devices.get_device(D1_ID).siggen_wave is None
+    with pytest.raises(AttributeError):
+        clock.rc_counter = 1
+
+    assert devices.remove_device(SIG1_ID)
+    assert devices.get_device(SIG1_ID) is None
+    assert len(devices.devices_list) == 5
+    assert devices.find_devices(devices.SIGGEN) == []
+
+
+@pytest.mark.parametrize("engine", Network.engine_types)
+@pytest.mark.parametrize("seed", [1, 4])
+def test_compact_devices_simulate_the_same(engine, seed):
+    """Test if every engine gives the same traces with the compact table."""
+    assert run(engine, True, seed) == run(engine, False, seed)
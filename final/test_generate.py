@@ -0,0 +1,72 @@
+"""Test the generate module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from generate import (make_netlist, write_definition_file, build_netlist,
+                      topologies)
+
+
+def make_network():
+    """Return new names, devices, network and monitors with a fixed seed."""
+    names = Names()
+    devices = Devices(names, seed=5)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    return names, devices, network, monitors
+
+
+def run_traces(network, monitors, cycles):
+    """Run the network and return {signal name: trace} for the monitors."""
+    for _ in range(cycles):
+        assert network.execute_network()
+        monitors.record_signals()
+    return {monitors.devices.get_signal_name(*monitor): list(trace)
+            for monitor, trace in monitors.monitors_dictionary.items()}
+
+
+@pytest.mark.parametrize("topology", list(topologies))
+def test_generated_files_parse_and_match_built_netlist(tmp_path, topology):
+    """Test if generated files parse and simulate like the built netlist."""
+    netlist = make_netlist(topology, 60, seed=2)
+    path = tmp_path / "netlist.txt"
+    with open(path, "w") as file:
+        write_definition_file(netlist, file)
+
+    names, devices, network, monitors = make_network()
+    scanner = Scanner(str(path), names)
+    parser = Parser(names, devices, network, monitors, scanner)
+    assert parser.parse_network()
+    parsed_traces = run_traces(network, monitors, 20)
+
+    names, devices, network, monitors = make_network()
+    assert build_netlist(netlist, names, devices, network, monitors)
+    devices.cold_startup()
+    assert network.check_network()
+    assert run_traces(network, monitors, 20) == parsed_traces
+    assert len(devices.devices_list) == len(netlist[0])
+
+
+def test_adder_adds():
+    """Test if the ripple-carry adder sums its operands."""
+    netlist = make_netlist("adder", 7 * 6)
+    names, devices, network, monitors = make_network()
+    assert build_netlist(netlist, names, devices, network, monitors)
+    run_traces(network, monitors, 1)
+    # A is 101010 (bit i is i % 2), B is 111111 and the carry in is 1
+    total = sum(network.get_output_signal(names.query("S" + str(bit)),
+                                          None) << bit for bit in range(6))
+    total += network.get_output_signal(names.query("C5"), None) << 6
+    assert total == 0b101010 + 0b111111 + 1
+
+
+def test_sizes():
+    """Test if the netlists have about the requested number of devices."""
+    for topology in topologies:
+        assert 990 <= len(make_netlist(topology, 1000)[0]) <= 1010
+    with pytest.raises(ValueError):
+        make_netlist("ring", 10)
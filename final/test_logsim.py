@@ -0,0 +1,124 @@
+"""Test the logsim module."""
+import sys
+
+import pytest
+
+import logsim
+
+from logsim import main
+from network import Network
+from userint import UserInterface
+
+
+def test_batch_run(capsys):
+    """Test if a batch run sets switches, adds monitors and prints traces."""
+    main(["--batch", "--cycles", "12", "--set", "SW1=0", "--monitor", "G1",
+          "--monitor", "G3.Q", "--stats", "definition_file_1.txt"])
+    out, _ = capsys.readouterr()
+    lines = out.splitlines()
+    assert lines[0] == "G4  : ____________"
+    assert lines[1] == "G5  : ____________"
+    assert lines[2].startswith("G1  : ") and len(lines[2]) == 18
+    assert lines[4].startswith("Cycles: 12,")
+
+
+def test_batch_run_profile(capsys):
+    """Test if a batch run prints the profiling statistics."""
+    main(["--batch", "--cycles", "8", "--profile", "definition_file_1.txt"])
+    out, _ = capsys.readouterr()
+    counts = {}
+    for line in out.splitlines():
+        if line.startswith(("Cycles: ", "Idle cycles skipped: ")):
+            name, _, count = line.rpartition(": ")
+            counts[name] = int(count)
+    # Idle cycles are skipped, not executed
+    assert counts["Cycles"] + counts.get("Idle cycles skipped", 0) == 8
+    assert "Signal transitions: " in out
+    assert "record_signals" in out
+
+
+def test_batch_run_to_vcd(tmp_path, capsys):
+    """Test if a batch run streams the monitors to a VCD file."""
+    vcd_path = tmp_path / "out.vcd"
+    main(["--batch", "--cycles", "50", "--vcd", str(vcd_path),
+          "definition_file_1.txt"])
+    out, _ = capsys.readouterr()
+    assert out == ""
+    text = vcd_path.read_text()
+    assert "$var wire 1 ! G4 $end" in text
+    assert text.endswith("#50\n")
+
+
+
+def test_interrupted_command_line_closes_vcd(tmp_path, monkeypatch):
+    """Test if the VCD file is completed when the interface is interrupted."""
+    def interrupt(userint):
+        userint.network.run_cycles(3, userint.monitors)
+        raise KeyboardInterrupt
+    monkeypatch.setattr(UserInterface, "command_interface", interrupt)
+    vcd_path = tmp_path / "out.vcd"
+    with pytest.raises(KeyboardInterrupt):
+        main(["--vcd", str(vcd_path), "-c", "definition_file_1.txt"])
+    assert vcd_path.read_text().endswith("#3\n")
+
+@pytest.mark.parametrize("arguments", [
+    ["--set", "SW9=1"],
+    ["--set", "G1=1"],
+    ["--monitor", "G9"],
+])
+def test_batch_run_errors(capsys, arguments):
+    """Test if invalid switches and monitors stop a batch run."""
+    with pytest.raises(SystemExit):
+        main(["--batch"] + arguments + ["definition_file_1.txt"])
+    out, _ = capsys.readouterr()
+    assert out.startswith("Error: invalid")
+
+
+def test_batch_run_does_not_import_gui():
+    """Test if the GUI modules are not imported outside the GUI."""
+    main(["--batch", "--cycles", "1", "definition_file_1.txt"])
+    assert "gui" not in sys.modules
+    assert "wx" not in sys.modules
+
+
+def test_batch_run_prune(capsys):
+    """Test if pruning the unmonitored devices leaves the traces unchanged."""
+    outputs = []
+    for arguments in [[], ["--prune"]]:
+        main(["--batch", "--cycles", "20", "--seed", "4", "--monitor", "G1"]
+             + arguments + ["definition_file_1.txt"])
+        out, _ = capsys.readouterr()
+        outputs.append(out)
+    assert outputs[0] == outputs[1]
+    assert outputs[0].startswith("Seed: 4\n")
+
+
+def test_batch_run_edge_levels(capsys, monkeypatch):
+    """Test if gates read edges as new levels only when asked to."""
+    networks = []
+
+    class RecordedNetwork(Network):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            networks.append(self)
+
+    monkeypatch.setattr(logsim, "Network", RecordedNetwork)
+    for arguments in [[], ["--edge-levels"]]:
+        main(["--batch", "--cycles", "5"] + arguments +
+             ["definition_file_1.txt"])
+    capsys.readouterr()
+    assert [network.edge_levels for network in networks] == [False, True]
+
+
+def test_batch_run_optimise(capsys):
+    """Test if optimising a batch run leaves the traces unchanged."""
+    outputs = []
+    for arguments in [[], ["--optimise"]]:
+        main(["--batch", "--cycles", "20", "--seed", "4", "--set", "SW1=0",
+              "--monitor", "G1"] + arguments + ["definition_file_1.txt"])
+        out, _ = capsys.readouterr()
+        outputs.append(out.splitlines())
+    assert outputs[1][:len(outputs[0])] == outputs[0]
+    assert outputs[1][len(outputs[0]):] == [
+        "Devices eliminated: 0 of 9", "Gates folded to constants: 1",
+        "Gates collapsed: 2, inputs removed: 2"]
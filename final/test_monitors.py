@@ -5,6 +5,7 @@ from names import Names
 from network import Network
 from devices import Devices
 from monitors import Monitors
+from traces import get_runs
 
 
 @pytest.fixture
@@ -120,6 +121,27 @@ def test_record_signals(new_monitors):
         (OR1_ID, None): [LOW, HIGH, HIGH]}
 
 
+def test_record_idle_cycles(new_monitors):
+    """Test if record_idle_cycles records the signals for many cycles."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+
+    devices.set_switch(SW1_ID, HIGH)
+    assert network.run_cycles(1000000, new_monitors) == 1000000
+    assert network.get_idle_cycles() is None  # no clocks, siggens or RCs
+    new_monitors.record_idle_cycles(2)
+    for (device_id, output_id), signal in [((SW1_ID, None), HIGH),
+                                           ((SW2_ID, None), LOW),
+                                           ((OR1_ID, None), HIGH)]:
+        trace = new_monitors.monitors_dictionary[(device_id, output_id)]
+        assert len(trace) == 1000002
+        assert list(get_runs(trace)) == [(signal, 1000002)]
+
+
 def test_get_margin(new_monitors):
     """Test if get_margin returns the length of the longest monitor name."""
     names = new_monitors.names
@@ -136,7 +158,7 @@ def test_get_margin(new_monitors):
     assert new_monitors.get_margin() == 11
 
 
-def test_reset_monitors(new_monitors):
+def test_reset_monitors(new_monitors, capsys):
     """Test if reset_monitors clears the signal lists of all the monitors."""
     names = new_monitors.names
     devices = new_monitors.devices
@@ -153,6 +175,15 @@ def test_reset_monitors(new_monitors):
                                                 (SW2_ID, None): [],
                                                 (OR1_ID, None): []}
 
+    # The seed of the devices is recorded with the new traces
+    assert new_monitors.seed is None
+    devices.set_seed(12)
+    new_monitors.reset_monitors()
+    assert new_monitors.seed == 12
+    new_monitors.display_signals()
+    out, _ = capsys.readouterr()
+    assert out.startswith("Seed: 12\n")
+
 
 def test_display_signals(capsys, new_monitors):
     """Test if signal traces are displayed correctly on the console."""
@@ -197,3 +228,69 @@ def test_display_signals(capsys, new_monitors):
             "Clock1: -__--__--__--__--__-" in traces)
 
     assert "" in traces  # additional empty line at the end
+
+
+def test_set_window(new_monitors, tmp_path):
+    """Test if monitors keep only their window and spill older signals."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID, OR1_ID] = names.lookup(["Sw1", "Or1"])
+    LOW, HIGH = devices.LOW, devices.HIGH
+
+    new_monitors.record_signals()
+    new_monitors.set_window(3, str(tmp_path))
+    devices.set_switch(SW1_ID, HIGH)
+    for _ in range(4):
+        network.execute_network()
+        new_monitors.record_signals()
+
+    assert new_monitors.monitors_dictionary[(SW1_ID, None)] == [HIGH] * 3
+    trace = new_monitors.monitors_dictionary[(OR1_ID, None)]
+    assert trace.read_spilled() == [LOW, HIGH, HIGH]
+    assert (tmp_path / "Or1.trace").exists()
+
+    # Setting the window again keeps the signals already spilled
+    for window, spilled in [(4, 4), (3, 3)]:
+        new_monitors.set_window(window, str(tmp_path))
+        trace = new_monitors.monitors_dictionary[(OR1_ID, None)]
+        assert trace.read_recorded() == [LOW] + [HIGH] * 4
+        assert len(trace.read_spilled()) == spilled
+    assert trace == [HIGH] * 3
+
+    # A monitor made later starts with BLANK signals within its window
+    devices.make_device(names.lookup(["Sw3"])[0], devices.SWITCH, 0)
+    new_monitors.make_monitor(names.query("Sw3"), None, 5)
+    assert new_monitors.monitors_dictionary[
+        (names.query("Sw3"), None)] == [devices.BLANK] * 3
+
+    new_monitors.reset_monitors()
+    assert new_monitors.monitors_dictionary[(OR1_ID, None)] == []
+    new_monitors.set_window(None)
+    assert new_monitors.monitors_dictionary[(OR1_ID, None)] == []
+    with pytest.raises(ValueError):
+        new_monitors.set_window(0)
+
+
+def test_set_pruning(new_monitors):
+    """Test if only the fan-in of the monitors is simulated when pruning."""
+    monitors = new_monitors
+    network = monitors.network
+    names = monitors.names
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+    monitors.remove_monitor(OR1_ID, None)
+    monitors.remove_monitor(SW2_ID, None)
+    assert network.simulated_devices is None
+
+    monitors.set_pruning(True)
+    assert network.simulated_devices == {SW1_ID}
+    monitors.make_monitor(OR1_ID, None)
+    assert network.simulated_devices == {SW1_ID, SW2_ID, OR1_ID}
+    monitors.remove_monitor(OR1_ID, None)
+    assert network.simulated_devices == {SW1_ID}
+    assert network.execute_network()
+
+    monitors.set_pruning(False)
+    assert network.simulated_devices is None
+    monitors.make_monitor(SW2_ID, None)
+    assert network.simulated_devices is None
@@ -0,0 +1,53 @@
+"""Test the montecarlo module."""
+import pytest
+
+from montecarlo import run_monte_carlo, merge_histograms
+from test_bitparallel import make_circuit
+
+
+def test_run_monte_carlo():
+    """Test if the histograms count the signals of every single run."""
+    names, devices, network, monitors = make_circuit()
+    seeds = range(40)
+    histograms, oscillating_seeds = run_monte_carlo(
+        names, devices, network, monitors, seeds, 12, processes=1,
+        chunk_size=16)
+    assert oscillating_seeds == []
+
+    expected = {}
+    for seed in seeds:
+        names, devices, network, monitors = make_circuit()
+        devices.set_seed(seed)
+        devices.cold_startup()
+        for _ in range(12):
+            network.execute_network()
+            monitors.record_signals()
+        merge_histograms(expected, {
+            monitor: [[int(signal == code) for code in range(4)]
+                      for signal in signal_list]
+            for monitor, signal_list in monitors.monitors_dictionary.items()})
+    assert histograms == expected
+
+
+def test_results_do_not_depend_on_processes():
+    """Test if the pool gives the same results for any split of the seeds."""
+    names, devices, network, monitors = make_circuit()
+    results = [run_monte_carlo(names, devices, network, monitors, range(100),
+                               8, processes, chunk_size)
+               for processes, chunk_size in [(1, 64), (1, 7), (2, 13)]]
+    assert results[0] == results[1] == results[2]
+
+
+def test_invalid_arguments():
+    """Test if invalid arguments and unconnected inputs are handled."""
+    names, devices, network, monitors = make_circuit()
+    with pytest.raises(ValueError):
+        run_monte_carlo(names, devices, network, monitors, [1], -1)
+    with pytest.raises(ValueError):
+        run_monte_carlo(names, devices, network, monitors, [1], 5,
+                        chunk_size=0)
+
+    [AND1_ID] = names.lookup(["And1"])
+    devices.make_device(AND1_ID, devices.AND, 2)
+    assert run_monte_carlo(names, devices, network, monitors, [1, 2], 5,
+                           processes=1) is None
@@ -88,4 +88,13 @@ def test_query(used_names, new_names, expected_id, name_string):
 
 
 
-    
\ No newline at end of file
+    
+
+
+def test_lookup_batch(used_names):
+    """Test if a batch of new and repeated names is given consistent IDs."""
+    assert used_names.lookup(["Dave", "Bob", "Dave", "Fay"]) == [3, 1, 3, 4]
+    assert used_names.lookup([]) == []
+    for name_id, name_string in enumerate(used_names.names):
+        assert used_names.query(name_string) == name_id
+        assert used_names.get_name_string(name_id) == name_string
@@ -1,9 +1,15 @@
 """Test the network module."""
+import os
+import random
+
 import pytest
 
 from names import Names
 from devices import Devices
 from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
 
 
 @pytest.fixture
@@ -415,3 +421,489 @@ def test_oscillating_network(new_network):
     network.make_connection(NOR1, None, NOR1, I1)
 
     assert not network.execute_network()
+
+
+def test_compile_network(new_network):
+    """Test if compile_network sweeps gates in kind and creation order, or
+    levelizes them and isolates feedback loops with edge_levels."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1_ID, SW2_ID, AND1_ID, NAND1_ID, NAND2_ID, OR1_ID, I1,
+     I2] = names.lookup(["Sw1", "Sw2", "And1", "Nand1", "Nand2", "Or1", "I1",
+                         "I2"])
+    devices.make_device(OR1_ID, devices.OR, 2)
+    devices.make_device(NAND1_ID, devices.NAND, 2)
+    devices.make_device(NAND2_ID, devices.NAND, 2)
+    devices.make_device(AND1_ID, devices.AND, 2)
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(SW2_ID, devices.SWITCH, 1)
+
+    # And1 feeds an SR latch made of two NANDs, which feeds Or1
+    network.make_connection(SW1_ID, None, AND1_ID, I1)
+    network.make_connection(SW2_ID, None, AND1_ID, I2)
+    network.make_connection(AND1_ID, None, NAND1_ID, I1)
+    network.make_connection(NAND2_ID, None, NAND1_ID, I2)
+    network.make_connection(SW2_ID, None, NAND2_ID, I1)
+    network.make_connection(NAND1_ID, None, NAND2_ID, I2)
+    network.make_connection(NAND1_ID, None, OR1_ID, I1)
+    network.make_connection(SW1_ID, None, OR1_ID, I2)
+
+    # A new level starts where a gate reads a gate later in the sweep
+    network.compile_network()
+    assert network.schedule == [([AND1_ID, OR1_ID], []), ([NAND1_ID], []),
+                                ([NAND2_ID], [])]
+
+    edge_network = Network(names, devices, edge_levels=True)
+    edge_network.compile_network()
+    assert edge_network.schedule == [([AND1_ID], []),
+                                     ([], [[NAND1_ID, NAND2_ID]]),
+                                     ([OR1_ID], [])]
+
+    # Making a connection invalidates the schedule
+    [AND2_ID] = names.lookup(["And2"])
+    devices.make_device(AND2_ID, devices.AND, 1)
+    network.make_connection(OR1_ID, None, AND2_ID, I1)
+    assert network.schedule is None
+
+    assert network.execute_network()
+    assert network.schedule[0] == ([AND1_ID, AND2_ID, OR1_ID], [])
+    assert network.get_output_signal(AND2_ID, None) == devices.HIGH
+
+
+def test_execute_deep_chain(new_network):
+    """Test if a chain of gates deeper than the iteration limit settles."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1_ID, I1] = names.lookup(["Sw1", "I1"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    previous_id = SW1_ID
+    for gate_id in names.lookup(["Not" + str(i) for i in range(65)]):
+        devices.make_device(gate_id, devices.NAND, 1)
+        network.make_connection(previous_id, None, gate_id, I1)
+        previous_id = gate_id
+
+    assert network.execute_network()
+    assert network.get_output_signal(previous_id, None) == devices.HIGH
+
+    devices.set_switch(SW1_ID, devices.HIGH)
+    assert network.execute_network()
+    assert network.get_output_signal(previous_id, None) == devices.LOW
+
+
+def test_invalid_engine_raises_exception():
+    """Test if Network raises an exception for an unknown engine."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+    with pytest.raises(ValueError):
+        Network(new_names, new_devices, "unknown")
+
+
+def run_counter(engine, cycles, cache_dir=None):
+    """Return the signals of a two-bit counter with a latch after each cycle.
+
+    The counter's D-types are clocked directly and through an AND gate, and
+    an SR latch made from NANDs is set and reset by a switch and the counter.
+    The compiled engine caches its code in cache_dir, if it is given.
+    """
+    random.seed(7)
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, engine)
+    if engine == "compiled":
+        network.compiled_engine.cache_dir = cache_dir
+    [SW1_ID, SW2_ID, CL_ID, D1_ID, D2_ID, AND1_ID, XOR1_ID, NAND1_ID,
+     NAND2_ID, NOT1_ID, I1, I2] = names.lookup(["Sw1", "Sw2", "Clock1", "D1",
+                                                "D2", "And1", "Xor1", "Nand1",
+                                                "Nand2", "Not1", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(SW2_ID, devices.SWITCH, 0)
+    devices.make_device(CL_ID, devices.CLOCK, 2)
+    devices.make_device(D1_ID, devices.D_TYPE)
+    devices.make_device(D2_ID, devices.D_TYPE)
+    devices.make_device(AND1_ID, devices.AND, 2)
+    devices.make_device(XOR1_ID, devices.XOR)
+    devices.make_device(NAND1_ID, devices.NAND, 2)
+    devices.make_device(NAND2_ID, devices.NAND, 2)
+    devices.make_device(NOT1_ID, devices.NAND, 1)
+
+    connections = [(CL_ID, None, D1_ID, devices.CLK_ID),
+                   (D1_ID, devices.QBAR_ID, D1_ID, devices.DATA_ID),
+                   (CL_ID, None, AND1_ID, I1),
+                   (SW1_ID, None, AND1_ID, I2),
+                   (AND1_ID, None, D2_ID, devices.CLK_ID),
+                   (D1_ID, devices.Q_ID, XOR1_ID, I1),
+                   (D2_ID, devices.Q_ID, XOR1_ID, I2),
+                   (XOR1_ID, None, D2_ID, devices.DATA_ID),
+                   (D2_ID, devices.Q_ID, NOT1_ID, I1),
+                   (SW1_ID, None, NAND1_ID, I1),
+                   (NAND2_ID, None, NAND1_ID, I2),
+                   (NOT1_ID, None, NAND2_ID, I1),
+                   (NAND1_ID, None, NAND2_ID, I2)]
+    for dtype_id in [D1_ID, D2_ID]:
+        connections.append((SW2_ID, None, dtype_id, devices.SET_ID))
+        connections.append((SW2_ID, None, dtype_id, devices.CLEAR_ID))
+    for connection in connections:
+        assert network.make_connection(*connection) == network.NO_ERROR
+
+    signals = []
+    for cycle in range(cycles):
+        devices.set_switch(SW1_ID, (cycle // 5) % 2)
+        steady = network.execute_network()
+        signals.append([steady] + [
+            network.get_output_signal(device.device_id, output_id)
+            for device in devices.devices_list
+            for output_id in device.outputs])
+    return signals
+
+
+def test_event_engine_matches_levelized_engine():
+    """Test if the event engine gives the same signals as the default."""
+    assert run_counter("event", 40) == run_counter("levelized", 40)
+
+
+def test_vector_engine_matches_levelized_engine():
+    """Test if the vector engine gives the same signals as the default."""
+    assert run_counter("vector", 40) == run_counter("levelized", 40)
+
+
+def test_compiled_engine_matches_levelized_engine(tmp_path):
+    """Test if the compiled engine gives the same signals as the default."""
+    expected = run_counter("levelized", 40)
+    assert run_counter("compiled", 40) == expected
+    # Code read back from the cache gives the same signals
+    assert run_counter("compiled", 40, str(tmp_path)) == expected
+    assert len(os.listdir(str(tmp_path))) == 1
+    assert run_counter("compiled", 40, str(tmp_path)) == expected
+
+
+@pytest.mark.parametrize("engine", Network.engine_types)
+@pytest.mark.parametrize("edge_levels", [False, True])
+def test_gated_clock_reads_new_levels(engine, edge_levels):
+    """Test when a D-type clocked through a gate captures its data.
+
+    D1 toggles, and D2 is clocked by AND(D1.Q, Sw1) and reads NOR(D1.Q). By
+    default the gates compare signal codes, so the RISING D1.Q delays the
+    AND gate by an iteration and D2 captures LOW. With edge_levels the gates
+    read the RISING D1.Q as HIGH in the same iteration, so D2 sees its
+    clock edge while its data is still FALLING, read as HIGH.
+    """
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, engine, edge_levels=edge_levels)
+    [SW1_ID, SW2_ID, CL_ID, D1_ID, D2_ID, AND1_ID, NOR1_ID, I1, I2] = \
+        names.lookup(["Sw1", "Sw2", "Clock1", "D1", "D2", "And1", "Nor1",
+                      "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(SW2_ID, devices.SWITCH, 0)
+    devices.make_device(CL_ID, devices.CLOCK, 1)
+    devices.make_device(D1_ID, devices.D_TYPE)
+    devices.make_device(D2_ID, devices.D_TYPE)
+    devices.make_device(AND1_ID, devices.AND, 2)
+    devices.make_device(NOR1_ID, devices.NOR, 1)
+    connections = [(CL_ID, None, D1_ID, devices.CLK_ID),
+                   (D1_ID, devices.QBAR_ID, D1_ID, devices.DATA_ID),
+                   (D1_ID, devices.Q_ID, AND1_ID, I1),
+                   (SW1_ID, None, AND1_ID, I2),
+                   (D1_ID, devices.Q_ID, NOR1_ID, I1),
+                   (AND1_ID, None, D2_ID, devices.CLK_ID),
+                   (NOR1_ID, None, D2_ID, devices.DATA_ID)]
+    for dtype_id in [D1_ID, D2_ID]:
+        connections.append((SW2_ID, None, dtype_id, devices.SET_ID))
+        connections.append((SW2_ID, None, dtype_id, devices.CLEAR_ID))
+    for connection in connections:
+        assert network.make_connection(*connection) == network.NO_ERROR
+    for dtype_id in [D1_ID, D2_ID]:
+        devices.get_device(dtype_id).dtype_memory = devices.LOW
+    clock = devices.get_device(CL_ID)
+    clock.outputs[None] = devices.LOW
+    clock.clock_counter = 0
+
+    signals = []
+    for _ in range(4):
+        assert network.execute_network()
+        signals.append((network.get_output_signal(D1_ID, devices.Q_ID),
+                        network.get_output_signal(D2_ID, devices.Q_ID)))
+    if edge_levels:
+        assert signals == [(devices.LOW, devices.LOW),
+                           (devices.HIGH, devices.HIGH),
+                           (devices.HIGH, devices.HIGH),
+                           (devices.LOW, devices.HIGH)]
+    else:
+        assert signals == [(devices.LOW, devices.LOW),
+                           (devices.HIGH, devices.LOW),
+                           (devices.HIGH, devices.LOW),
+                           (devices.LOW, devices.LOW)]
+
+
+def make_ring_oscillator(engine):
+    """Return a network with a ring of three NAND gates enabled by a switch.
+
+    An odd number of inverting gates in a ring never settles.
+    """
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, engine)
+    [SW1_ID, NAND1_ID, NAND2_ID, NAND3_ID, I1, I2] = names.lookup(
+        ["Sw1", "Nand1", "Nand2", "Nand3", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    nand_ids = [NAND1_ID, NAND2_ID, NAND3_ID]
+    for nand_id in nand_ids:
+        devices.make_device(nand_id, devices.NAND, 2)
+        network.make_connection(SW1_ID, None, nand_id, I2)
+    for nand_id, driven_id in zip(nand_ids, nand_ids[1:] + nand_ids[:1]):
+        network.make_connection(nand_id, None, driven_id, I1)
+    return network
+
+
+@pytest.mark.parametrize("engine", Network.engine_types)
+def test_ring_oscillator_is_reported(engine):
+    """Test if a ring oscillator is found early, with its devices."""
+    network = make_ring_oscillator(engine)
+    assert not network.execute_network()
+    assert network.settle_iterations < network.iteration_limit
+    assert network.get_oscillating_names() == ["Nand1", "Nand2", "Nand3"]
+
+    # Disabling the ring stops the oscillation
+    [SW1_ID] = network.names.lookup(["Sw1"])
+    network.devices.set_switch(SW1_ID, 0)
+    assert network.execute_network()
+    assert network.oscillating_devices == []
+
+
+def test_record_state():
+    """Test if a repeated state is spotted, with the devices it changes."""
+    network = make_ring_oscillator("levelized")
+    states = {}
+    network.compile_network()
+    state_devices = network.get_state_devices()
+    cycle = [(0, 1, 1, 1), (0, 0, 1, 1), (0, 0, 1, 0)]
+    assert network.record_state(states, (0, 1, 1, 0))
+    for state in cycle:
+        assert network.record_state(states, state)
+    assert network.find_last_changing_devices(states) == [state_devices[3]]
+    # Only the second and fourth items change in the repeating states
+    assert not network.record_state(states, cycle[0])
+    assert network.oscillating_devices == [state_devices[1],
+                                           state_devices[3]]
+
+    # States with equal hashes are still different states
+    states = {}
+    assert hash((-1, 0, 0, 0)) == hash((-2, 0, 0, 0))
+    assert network.record_state(states, (-1, 0, 0, 0))
+    assert network.record_state(states, (-2, 0, 0, 0))
+
+
+def run_ripple_counter(engine, stages, iteration_limit=None):
+    """Return the results of a ripple counter of D-types rolling over.
+
+    Each D-type toggles and is clocked through a NAND inverter by the
+    previous one, so rolling over from all ones ripples through every stage
+    in a single cycle.
+    """
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, engine, iteration_limit)
+    [CL_ID, SET_ID, CLEAR_ID, I1] = names.lookup(["Clock1", "Set", "Clear",
+                                                 "I1"])
+    devices.make_device(CL_ID, devices.CLOCK, 1)
+    devices.make_device(SET_ID, devices.SWITCH, 1)
+    devices.make_device(CLEAR_ID, devices.SWITCH, 0)
+    clock = (CL_ID, None)
+    for stage in range(stages):
+        [dtype_id, nand_id] = names.lookup(["D" + str(stage),
+                                            "Nand" + str(stage)])
+        devices.make_device(dtype_id, devices.D_TYPE)
+        devices.make_device(nand_id, devices.NAND, 1)
+        for connection in [(clock + (dtype_id, devices.CLK_ID)),
+                           (dtype_id, devices.QBAR_ID, dtype_id,
+                            devices.DATA_ID),
+                           (SET_ID, None, dtype_id, devices.SET_ID),
+                           (CLEAR_ID, None, dtype_id, devices.CLEAR_ID),
+                           (dtype_id, devices.Q_ID, nand_id, I1)]:
+            assert network.make_connection(*connection) == network.NO_ERROR
+        clock = (nand_id, None)
+    results = [network.execute_network() for _ in range(4)]
+    devices.set_switch(SET_ID, 0)
+    results += [network.execute_network() for _ in range(8)]
+    return network, results
+
+
+@pytest.mark.parametrize("engine", Network.engine_types)
+def test_iteration_limit_follows_logic_depth(engine):
+    """Test if deep sequential chains settle with the default limit."""
+    network, results = run_ripple_counter(engine, 30)
+    assert all(results)
+    # Three sweeps of the gate level and a level for each D-type
+    assert network.logic_depth == 33
+    assert network.iteration_limit > 30
+
+    # A limit too small for the ripple reports an oscillation
+    network, results = run_ripple_counter(engine, 30, 20)
+    assert network.iteration_limit == 20
+    assert not all(results)
+
+
+def test_set_iteration_limit(new_network):
+    """Test if the iteration limit can be fixed and derived again."""
+    network = new_network
+    network.set_iteration_limit(5)
+    assert network.iteration_limit == 5
+    network.compile_network()
+    assert network.iteration_limit == 5
+    network.set_iteration_limit(None)
+    assert network.iteration_limit == network.minimum_iteration_limit
+    with pytest.raises(TypeError):
+        network.set_iteration_limit(2.5)
+    with pytest.raises(ValueError):
+        network.set_iteration_limit(0)
+
+
+@pytest.mark.parametrize("engine", Network.engine_types)
+def test_run_cycles_skips_idle_cycles(engine):
+    """Test if idle cycles are skipped without changing the signals."""
+    results = []
+    for fast_forward in [True, False]:
+        random.seed(3)
+        names = Names()
+        devices = Devices(names)
+        network = Network(names, devices, engine)
+        network.fast_forward = fast_forward
+        [SW1_ID, CL_ID, RC_ID, SG_ID, D1_ID, AND1_ID, I1, I2] = names.lookup(
+            ["Sw1", "Clock1", "Rc1", "Sig1", "D1", "And1", "I1", "I2"])
+        devices.make_device(SW1_ID, devices.SWITCH, 0)
+        devices.make_device(CL_ID, devices.CLOCK, 7)
+        devices.make_device(RC_ID, devices.RC, 12)
+        devices.make_device(SG_ID, devices.SIGGEN, "11100100")
+        devices.make_device(D1_ID, devices.D_TYPE)
+        devices.make_device(AND1_ID, devices.AND, 2)
+        for connection in [(CL_ID, None, D1_ID, devices.CLK_ID),
+                           (SG_ID, None, D1_ID, devices.DATA_ID),
+                           (SW1_ID, None, D1_ID, devices.SET_ID),
+                           (SW1_ID, None, D1_ID, devices.CLEAR_ID),
+                           (D1_ID, devices.Q_ID, AND1_ID, I1),
+                           (RC_ID, None, AND1_ID, I2)]:
+            assert network.make_connection(*connection) == network.NO_ERROR
+        stats = network.enable_profiling()
+        signals = []
+        for cycles in [1, 5, 40, 3, 20, 100]:
+            assert network.run_cycles(cycles) == cycles
+            signals.append([network.get_output_signal(device.device_id,
+                                                      output_id)
+                            for device in devices.devices_list
+                            for output_id in device.outputs])
+        results.append(signals)
+        assert stats.cycles + stats.idle_cycles == 169
+        assert (stats.idle_cycles > 0) == fast_forward
+    assert results[0] == results[1]
+
+
+def test_get_idle_cycles(new_network):
+    """Test if idle cycles are counted to the next clock edge."""
+    network = new_network
+    devices = network.devices
+    [CL_ID] = devices.names.lookup(["Clock1"])
+    devices.make_device(CL_ID, devices.CLOCK, 10)
+    clock = devices.get_device(CL_ID)
+    assert network.execute_network()
+    # The counter reaches the half period at the start of the next edge
+    assert network.get_idle_cycles() == 10 - clock.clock_counter
+    network.skip_idle_cycles(network.get_idle_cycles())
+    assert network.get_idle_cycles() == 0
+    signal = network.get_output_signal(CL_ID, None)
+    assert network.execute_network()
+    assert network.get_output_signal(CL_ID, None) != signal
+
+
+def test_simulated_devices(new_network):
+    """Test if only the fan-in of the given outputs is simulated."""
+    network = new_network
+    devices = network.devices
+    [SW1_ID, SW2_ID, G1_ID, G2_ID, I1, I2] = devices.names.lookup(
+        ["Sw1", "Sw2", "And1", "Nor1", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(SW2_ID, devices.SWITCH, 1)
+    devices.make_device(G1_ID, devices.AND, 2)
+    devices.make_device(G2_ID, devices.NOR, 1)
+    network.make_connection(SW1_ID, None, G1_ID, I1)
+    network.make_connection(SW2_ID, None, G1_ID, I2)
+    network.make_connection(SW1_ID, None, G2_ID, I1)
+
+    assert network.get_fan_in([(G1_ID, None)]) == {SW1_ID, SW2_ID, G1_ID}
+    assert network.get_fan_in([(G2_ID, None), (SW2_ID, None)]) == \
+        {SW1_ID, SW2_ID, G2_ID}
+    network.set_simulated_devices(network.get_fan_in([(G1_ID, None)]))
+    assert network.find_simulated_devices(devices.SWITCH) == [SW1_ID, SW2_ID]
+    assert network.find_simulated_devices(devices.NOR) == []
+    assert network.execute_network()
+    assert network.get_output_signal(G1_ID, None) == devices.HIGH
+    assert network.get_output_signal(G2_ID, None) == devices.LOW
+
+    network.set_simulated_devices(None)
+    assert network.execute_network()
+    assert network.get_output_signal(G2_ID, None) == devices.LOW
+    devices.set_switch(SW1_ID, 0)
+    assert network.execute_network()
+    assert network.get_output_signal(G2_ID, None) == devices.HIGH
+
+
+@pytest.mark.parametrize("engine", Network.engine_types)
+def test_snapshot_and_restore(engine, tmp_path):
+    """Test if a restored snapshot continues as the network it was taken
+    from, in another network built from the same definition file."""
+    networks = []
+    for _ in range(2):
+        names = Names()
+        devices = Devices(names, seed=5)
+        network = Network(names, devices, engine)
+        monitors = Monitors(names, devices, network)
+        scanner = Scanner("definition_file_1.txt", names)
+        assert Parser(names, devices, network, monitors, scanner).\
+            parse_network()
+        networks.append((network, monitors))
+    [(network, monitors), (other_network, other_monitors)] = networks
+    [SW1_ID] = network.names.lookup(["SW1"])
+
+    network.devices.cold_startup()
+    network.run_cycles(17)
+    network.devices.set_switch(SW1_ID, 0)
+    snapshot = network.snapshot()
+    assert isinstance(snapshot, bytes)
+    assert network.run_cycles(30, monitors) == 30
+    expected = [list(trace) for trace in monitors.monitors_dictionary.values()]
+
+    path = tmp_path / "network.snapshot"
+    path.write_bytes(snapshot)
+    other_network.restore(path.read_bytes())
+    assert other_network.snapshot() == snapshot
+    assert other_network.devices.get_device(SW1_ID).switch_state == 0
+    assert other_network.run_cycles(30, other_monitors) == 30
+    assert [list(trace) for trace in
+            other_monitors.monitors_dictionary.values()] == expected
+
+    # The network it was taken from can be forked again
+    network.restore(snapshot)
+    monitors.reset_monitors()
+    assert network.run_cycles(30, monitors) == 30
+    assert [list(trace) for trace in
+            monitors.monitors_dictionary.values()] == expected
+
+
+def test_restore_gives_errors(new_network):
+    """Test if snapshots of other networks are rejected."""
+    network = new_network
+    devices = network.devices
+    [SW1_ID, CL_ID] = devices.names.lookup(["Sw1", "Clock1"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    snapshot = network.snapshot()
+    with pytest.raises(TypeError):
+        network.restore(list(snapshot))
+    with pytest.raises(ValueError):
+        network.restore(snapshot[:-1])
+    devices.make_device(CL_ID, devices.CLOCK, 3)
+    with pytest.raises(ValueError):
+        network.restore(snapshot)
+    network.restore(bytearray(network.snapshot()))
@@ -0,0 +1,180 @@
+"""Test the optimise module."""
+import itertools
+
+import pytest
+
+import generate
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from optimise import Optimiser
+
+
+def run_optimised(simulator, first_cycles, cycles):
+    """Run the cycles, optimising the network after the first cycles.
+
+    Return the optimiser.
+    """
+    names, devices, network, monitors = simulator
+    devices.cold_startup()
+    assert network.run_cycles(first_cycles, monitors) == first_cycles
+    optimiser = Optimiser(names, devices, network, monitors)
+    optimiser.optimise_network()
+    assert network.run_cycles(cycles - first_cycles, monitors) == \
+        cycles - first_cycles
+    return optimiser
+
+
+@pytest.mark.parametrize("engine", Network.engine_types)
+@pytest.mark.parametrize("path", ["definition_file_1.txt",
+                                  "definition_file_2.txt"])
+def test_optimised_traces(engine, path, make_simulator, get_traces):
+    """Test if optimising leaves the monitored traces unchanged."""
+    for states in itertools.product([0, 1], repeat=2):
+        simulators = [make_simulator(engine, path, seed=2) for _ in range(2)]
+        for names, devices, network, monitors in simulators:
+            for switch_id, state in zip(devices.find_devices(devices.SWITCH),
+                                        states):
+                devices.set_switch(switch_id, state)
+        names, devices, network, monitors = simulators[0]
+        devices.cold_startup()
+        assert network.run_cycles(40, monitors) == 40
+        run_optimised(simulators[1], 1, 40)
+        assert get_traces(simulators[1][3]) == get_traces(monitors)
+
+
+def test_fold_constants(make_simulator, get_traces):
+    """Test if gates with constant outputs are replaced by switches."""
+    simulator = make_simulator(path="definition_file_2.txt", seed=2)
+    names, devices, network, monitors = simulator
+    optimiser = run_optimised(simulator, 1, 10)
+    assert optimiser.get_report() == ["Devices eliminated: 4 of 5",
+                                      "Gates folded to constants: 3",
+                                      "Gates collapsed: 0, inputs removed: 0"]
+    [G3_ID] = names.lookup(["G3"])
+    assert devices.find_devices() == [G3_ID]
+    assert devices.get_device(G3_ID).device_kind == devices.SWITCH
+    assert get_traces(monitors) == {(G3_ID, None): [devices.HIGH] * 10}
+
+
+def test_nothing_folded_before_settling(make_simulator):
+    """Test if outputs that have not settled are not folded."""
+    names, devices, network, monitors = make_simulator(
+        path="definition_file_2.txt", seed=2)
+    optimiser = Optimiser(names, devices, network, monitors)
+    devices.cold_startup()
+    assert optimiser.optimise_network() == 0
+    assert optimiser.folded == optimiser.collapsed == 0
+    assert len(devices.find_devices()) == 5
+
+
+@pytest.mark.parametrize("state, device_kind", [(0, "AND"), (1, "NAND")])
+def test_collapse_xor(state, device_kind, make_simulator):
+    """Test if an XOR with a constant input becomes a one-input gate."""
+    simulator = make_simulator(seed=2)
+    names, devices, network, monitors = simulator
+    [SW1_ID, CL1_ID, G1_ID, I1_ID, kind_id] = names.lookup(
+        ["SW1", "CL1", "G1", "I1", device_kind])
+    devices.set_switch(SW1_ID, state)
+    optimiser = run_optimised(simulator, 1, 5)
+    assert optimiser.collapsed >= 1
+    G1 = devices.get_device(G1_ID)
+    assert G1.device_kind == kind_id
+    assert G1.inputs == {I1_ID: (CL1_ID, None)}
+    # SW1 still drives the D-type
+    assert devices.get_device(SW1_ID) is not None
+
+
+def test_constant_rc_and_siggen(tmp_path, make_simulator, get_traces):
+    """Test if settled RCs and single-level siggens are folded."""
+    path = tmp_path / "definition.txt"
+    path.write_text("DEVICE:\n"
+                    "RC R1 = 2;\n"
+                    "SIGGEN S1 = 000;\n"
+                    "CLOCK CL1 = 1;\n"
+                    "OR G1 = 2;\n"
+                    "XOR G2;\n"
+                    "CONNECTION:\n"
+                    "CON R1 -> G1.I1;\n"
+                    "CON S1 -> G1.I2;\n"
+                    "CON G1 -> G2.I1;\n"
+                    "CON CL1 -> G2.I2;\n"
+                    "MONITOR:\n"
+                    "MON G2;\n")
+    expected = make_simulator(path=str(path), seed=2)
+    expected[1].cold_startup()
+    assert expected[2].run_cycles(20, expected[3]) == 20
+
+    # The RC is still HIGH, so only the siggen input is disconnected
+    simulator = make_simulator(path=str(path), seed=2)
+    optimiser = run_optimised(simulator, 1, 20)
+    assert (optimiser.folded, optimiser.collapsed) == (0, 1)
+    assert optimiser.eliminated == 1
+    assert get_traces(simulator[3]) == get_traces(expected[3])
+
+    # Once the RC has discharged, the OR gate is folded too
+    simulator = make_simulator(path=str(path), seed=2)
+    optimiser = run_optimised(simulator, 5, 20)
+    assert (optimiser.folded, optimiser.collapsed) == (1, 1)
+    assert optimiser.eliminated == 3
+    assert get_traces(simulator[3]) == get_traces(expected[3])
+
+
+@pytest.mark.parametrize("engine", Network.engine_types)
+def test_dead_loop_still_oscillates(engine, tmp_path, make_simulator,
+                                    get_traces):
+    """Test if a dead feedback loop is kept, so it is found oscillating."""
+    path = tmp_path / "definition.txt"
+    path.write_text("DEVICE:\n"
+                    "SWITCH SW1 = 1;\n"
+                    "CLOCK CL1 = 1;\n"
+                    "CLOCK CL2 = 5;\n"
+                    "NAND G1 = 2;\n"
+                    "XOR G2;\n"
+                    "CONNECTION:\n"
+                    "CON CL2 -> G1.I1;\n"
+                    "CON G1 -> G1.I2;\n"
+                    "CON SW1 -> G2.I1;\n"
+                    "CON CL1 -> G2.I2;\n"
+                    "MONITOR:\n"
+                    "MON G2;\n")
+    expected = make_simulator(engine, str(path), seed=2)
+    expected[1].cold_startup()
+    cycles = expected[2].run_cycles(20, expected[3])
+    assert cycles < 20
+
+    names, devices, network, monitors = make_simulator(engine, str(path),
+                                                       seed=2)
+    devices.cold_startup()
+    assert network.run_cycles(1, monitors) == 1
+    optimiser = Optimiser(names, devices, network, monitors)
+    assert optimiser.optimise_network() == 1  # only SW1 is removed
+    assert network.run_cycles(19, monitors) == cycles - 1
+    assert network.get_oscillating_names() == ["G1"]
+    assert get_traces(monitors) == get_traces(expected[3])
+
+
+def test_random_network(get_traces):
+    """Test if a random network loses its dead and constant logic."""
+    netlist = generate.make_random_network(200, seed=5)
+    device_list, connection_list, _ = netlist
+    traces = []
+    for optimise in [False, True]:
+        names = Names()
+        devices = Devices(names, seed=1)
+        network = Network(names, devices, "levelized")
+        monitors = Monitors(names, devices, network)
+        assert generate.build_netlist((device_list, connection_list,
+                                       ["G50", "G120"]), names, devices,
+                                      network, monitors)
+        simulator = (names, devices, network, monitors)
+        if optimise:
+            optimiser = run_optimised(simulator, 1, 30)
+            assert optimiser.eliminated > optimiser.devices_before / 2
+        else:
+            devices.cold_startup()
+            assert network.run_cycles(30, monitors) == 30
+        traces.append(get_traces(monitors))
+    assert traces[0] == traces[1]
@@ -0,0 +1,94 @@
+"""Test the profiling module."""
+import pytest
+
+from network import Network
+
+
+def run_cycles(network, monitors, cycles):
+    """Run the network and record the monitors for the given cycles."""
+    traces = []
+    for _ in range(cycles):
+        assert network.execute_network()
+        monitors.record_signals()
+    for device_id, output_id in monitors.monitors_dictionary:
+        traces.append(list(monitors.monitors_dictionary[(device_id,
+                                                         output_id)]))
+    return traces
+
+
+@pytest.mark.parametrize("engine", Network.engine_types)
+def test_profiling_counts_cycles(engine, make_simulator):
+    """Test if profiling counts the cycles without changing the signals."""
+    network, monitors = make_simulator(engine)[2:]
+    expected_network, expected_monitors = make_simulator(engine)[2:]
+    stats = network.enable_profiling(monitors)
+    assert network.stats is stats
+    assert run_cycles(network, monitors, 30) == \
+        run_cycles(expected_network, expected_monitors, 30)
+
+    assert stats.cycles == 30
+    assert sum(stats.iterations.values()) == 30
+    assert min(stats.iterations) >= 1
+    assert max(stats.iterations) <= network.iteration_limit
+    assert stats.evaluations[network.devices.CLOCK] >= 30
+    assert stats.transitions > 0
+    assert list(stats.phase_seconds)[-2:] == ["evaluate", "record_signals"]
+    assert all(seconds >= 0 for seconds in stats.phase_seconds.values())
+    assert stats.get_report()[0] == "Cycles: 30"
+
+
+def test_engines_give_the_same_counts(make_simulator):
+    """Test if the counters do not depend on the engine."""
+    counts = []
+    for engine in Network.engine_types:
+        network, monitors = make_simulator(engine)[2:]
+        stats = network.enable_profiling(monitors)
+        run_cycles(network, monitors, 40)
+        counts.append((stats.iterations, stats.transitions))
+    assert counts[1:] == counts[:-1]
+
+
+def test_event_engine_evaluates_fewer_devices(make_simulator):
+    """Test if the event engine counts only the devices it executes."""
+    evaluations = []
+    for engine in ["levelized", "event"]:
+        network, monitors = make_simulator(engine)[2:]
+        stats = network.enable_profiling()
+        run_cycles(network, monitors, 40)
+        evaluations.append(sum(stats.evaluations.values()))
+        assert "record_signals" not in stats.phase_seconds
+    assert evaluations[1] < evaluations[0]
+
+
+def test_disable_profiling(make_simulator):
+    """Test if disabling profiling restores the original methods."""
+    network, monitors = make_simulator("event")[2:]
+    stats = network.enable_profiling(monitors)
+    run_cycles(network, monitors, 5)
+    assert "execute_gate" in vars(network)
+    assert network.disable_profiling() is stats
+    assert "execute_gate" not in vars(network)
+    assert "record_signals" not in vars(monitors)
+    assert not network.profiled_methods
+    run_cycles(network, monitors, 5)
+    assert stats.cycles == 5
+
+    # Enabling again starts from zero
+    new_stats = network.enable_profiling(monitors)
+    assert new_stats is not stats
+    run_cycles(network, monitors, 2)
+    assert new_stats.cycles == 2
+    network.enable_profiling()
+    assert "record_signals" not in vars(monitors)
+
+
+def test_reset(make_simulator):
+    """Test if reset sets every counter to zero."""
+    network, monitors = make_simulator("levelized")[2:]
+    stats = network.enable_profiling(monitors)
+    run_cycles(network, monitors, 5)
+    stats.reset()
+    assert stats.cycles == 0 and stats.transitions == 0
+    assert not stats.evaluations and not stats.phase_seconds
+    assert stats.get_report() == ["Cycles: 0", "Device evaluations: none",
+                                  "Signal transitions: 0", "Time: 0.000 ms"]
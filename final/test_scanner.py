@@ -103,3 +103,28 @@ def more_test_display_error(error_symbol_location, expected_arrow_pos, expected_
     assert a.line_num == expected_line
 
 
+def test_symbols_do_not_depend_on_chunk_size():
+    """Test if symbols split across buffer chunks are scanned correctly."""
+    expected = []
+    for chunk_size in [Scanner.chunk_size, 1, 2, 7]:
+        names = Names()
+        scanner = Scanner("testfile.txt", names)
+        scanner.chunk_size = chunk_size
+        symbols = [(sym.type, sym.id, sym.line_num, sym.pos)
+                   for sym in scanner.symbols()]
+        assert symbols[-1][0] == scanner.EOF
+        if not expected:
+            expected = symbols
+        assert symbols == expected
+
+
+def test_display_error_output(capsys, new_names):
+    """Test if display_error prints the line with a caret under the symbol."""
+    scanner = Scanner("testfile.txt", new_names)
+    for i in range(4):
+        sym = scanner.get_symbol()
+    scanner.display_error("Expected a number", sym)
+    out, _ = capsys.readouterr()
+    assert out == ("ERROR on line 3: Expected a number\n"
+                   "SWITCH SW1 = 1, # test comments\n"
+                   "       ^\n")
@@ -0,0 +1,239 @@
+"""Test the session module."""
+import io
+
+import pytest
+
+import generate
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from session import Session
+from vcd import VCDWriter
+
+
+@pytest.fixture
+def simulate(make_simulator, get_traces):
+    """Return a function returning the traces of a run from cycle 0 with
+    the switch changes."""
+    def run(engine, cycles, switch_events, signal_names=()):
+        names, devices, network, monitors = make_simulator(engine)
+        for signal_name in signal_names:
+            monitors.make_monitor(*devices.get_signal_ids(signal_name))
+        devices.cold_startup()
+        cycle = 0
+        for event_cycle, switch_name, signal in sorted(switch_events) + [
+                (cycles, None, None)]:
+            assert network.run_cycles(event_cycle - cycle, monitors) == \
+                event_cycle - cycle
+            cycle = event_cycle
+            if switch_name is not None:
+                devices.set_switch(names.query(switch_name), signal)
+        return get_traces(monitors)
+    return run
+
+
+@pytest.mark.parametrize("engine", Network.engine_types)
+def test_set_switch_from_cycle(engine, make_simulator, get_traces,
+                               simulate):
+    """Test if setting a switch from a cycle gives a full re-simulation."""
+    names, devices, network, monitors = make_simulator(engine)
+    session = Session(names, devices, network, monitors, 7)
+    session.run(50)
+    assert sorted(session.checkpoints) == [0, 7, 14, 21, 28, 35, 42, 49]
+    assert get_traces(monitors) == simulate(engine, 50, [])
+
+    [SW1_ID, SW2_ID] = names.lookup(["SW1", "SW2"])
+    assert session.set_switch(SW1_ID, 0, 23)
+    assert sorted(session.checkpoints) == [0, 7, 14, 21, 28, 35, 42, 49]
+    assert get_traces(monitors) == simulate(engine, 50, [(23, "SW1", 0)])
+
+    # An earlier change keeps the later change of another switch
+    assert session.set_switch(SW2_ID, 0, 9)
+    assert get_traces(monitors) == simulate(engine, 50, [(9, "SW2", 0),
+                                                         (23, "SW1", 0)])
+
+    # A change of the same switch overrides its later changes
+    assert session.set_switch(SW1_ID, 1, 30)
+    assert session.set_switch(SW1_ID, 0, 12)
+    expected = simulate(engine, 60, [(9, "SW2", 0), (12, "SW1", 0),
+                                     (55, "SW2", 1)])
+    assert session.set_switch(SW2_ID, 1)
+    assert session.switch_events[-1] == (50, SW2_ID, 1)
+    session.continue_run(10)
+    assert session.cycles == 60
+    assert get_traces(monitors) == expected
+
+
+@pytest.mark.parametrize("engine", Network.engine_types)
+def test_add_monitor_simulates_the_fan_in(engine, make_simulator,
+                                          get_traces, simulate):
+    """Test if adding a monitor simulates only the devices it reads."""
+    names, devices, network, monitors = make_simulator(engine)
+    session = Session(names, devices, network, monitors, 10)
+    session.run(40)
+    [SW1_ID, G1_ID] = names.lookup(["SW1", "G1"])
+    session.set_switch(SW1_ID, 0, 15)
+
+    stats = network.enable_profiling()
+    assert session.add_monitor(G1_ID, None) == monitors.NO_ERROR
+    assert stats.evaluations[devices.D_TYPE] == 0
+    assert stats.evaluations[devices.NAND] == 0
+    assert stats.evaluations[devices.XOR] > 0
+    network.disable_profiling()
+    assert network.simulated_devices is None
+    assert get_traces(monitors) == simulate(engine, 40, [(15, "SW1", 0)],
+                                            ["G1"])
+
+    # The network continues from where it was
+    session.continue_run(15)
+    assert get_traces(monitors) == simulate(engine, 55, [(15, "SW1", 0)],
+                                            ["G1"])
+
+    assert session.add_monitor(G1_ID, None) == monitors.MONITOR_PRESENT
+    assert session.remove_monitor(G1_ID, None)
+    assert not session.remove_monitor(G1_ID, None)
+    assert get_traces(monitors) == simulate(engine, 55, [(15, "SW1", 0)])
+
+
+def test_set_switch_gives_errors(make_simulator):
+    """Test if set_switch rejects invalid switches and cycles."""
+    names, devices, network, monitors = make_simulator("levelized")
+    session = Session(names, devices, network, monitors)
+    session.run(10)
+    [SW1_ID, G1_ID] = names.lookup(["SW1", "G1"])
+    assert not session.set_switch(G1_ID, 1, 5)
+    assert not session.set_switch(SW1_ID, 2, 5)
+    assert not session.switch_events
+    with pytest.raises(ValueError):
+        session.set_switch(SW1_ID, 0, 11)
+    with pytest.raises(TypeError):
+        session.set_switch(SW1_ID, 0, 2.0)
+    with pytest.raises(TypeError):
+        Session(names, devices, network, monitors, "10")
+    with pytest.raises(ValueError):
+        Session(names, devices, network, monitors, 0)
+
+
+def test_run_discards_switch_changes(make_simulator, get_traces,
+                                    simulate):
+    """Test if running again starts from the current switch states."""
+    names, devices, network, monitors = make_simulator("event")
+    session = Session(names, devices, network, monitors, 4)
+    session.run(20)
+    [SW1_ID] = names.lookup(["SW1"])
+    session.set_switch(SW1_ID, 0, 5)
+    session.run(12)
+    assert not session.switch_events
+    assert sorted(session.checkpoints) == [0, 4, 8, 12]
+    expected = simulate("event", 12, [(0, "SW1", 0)])
+    assert get_traces(monitors) == expected
+
+
+@pytest.mark.parametrize("engine", Network.engine_types)
+def test_add_monitor_to_oscillating_network(engine, get_traces):
+    """Test if adding a monitor to an oscillating network simulates it all.
+
+    D1 and D2 oscillate through their SET and CLEAR inputs while CL2 is
+    HIGH. D2 starts later, after CL2 has passed through E1, E2 and E3, so
+    the network is left in a different iteration than the fan-in of D3.
+    """
+    device_list = [("SWITCH", "SW1", 0), ("CLOCK", "CL1", 1),
+                   ("CLOCK", "CL2", 2), ("AND", "G1", 2), ("NAND", "G2", 2),
+                   ("AND", "G3", 2), ("NAND", "G4", 2), ("NAND", "N1", 1),
+                   ("NAND", "N2", 1), ("NAND", "N3", 1),
+                   ("XOR", "G5", None)]
+    device_list.extend(("DTYPE", name, None)
+                       for name in ["D1", "D2", "D3", "E1", "E2", "E3"])
+    connection_list = [("D1.Q", "G1.I1"), ("CL2", "G1.I2"),
+                       ("D1.Q", "G2.I1"), ("CL2", "G2.I2"),
+                       ("G1", "D1.CLEAR"), ("G2", "D1.SET"),
+                       ("CL2", "E1.SET"), ("CL2", "N1.I1"),
+                       ("N1", "E1.CLEAR"), ("E1.Q", "E2.SET"),
+                       ("E1.Q", "N2.I1"), ("N2", "E2.CLEAR"),
+                       ("E2.Q", "E3.SET"), ("E2.Q", "N3.I1"),
+                       ("N3", "E3.CLEAR"), ("D2.Q", "G3.I1"),
+                       ("E3.Q", "G3.I2"), ("D2.Q", "G4.I1"),
+                       ("E3.Q", "G4.I2"),
+                       ("G3", "D2.CLEAR"), ("G4", "D2.SET"),
+                       ("D1.Q", "D3.DATA"), ("SW1", "D3.SET"),
+                       ("SW1", "D3.CLEAR"), ("SW1", "G5.I1"),
+                       ("CL1", "G5.I2")]
+    for name in ["D1", "D2", "E1", "E2", "E3"]:
+        connection_list.append(("SW1", name + ".DATA"))
+    for name in ["D1", "D2", "D3", "E1", "E2", "E3"]:
+        connection_list.append(("CL1", name + ".CLK"))
+    traces = []
+    for monitor_list in [["G5", "D3.Q"], ["G5"]]:
+        names = Names()
+        devices = Devices(names, seed=1)
+        network = Network(names, devices, engine)
+        monitors = Monitors(names, devices, network)
+        assert generate.build_netlist((device_list, connection_list,
+                                       monitor_list), names, devices,
+                                      network, monitors)
+        session = Session(names, devices, network, monitors, 5)
+        session.run(20)
+        assert session.oscillating_cycles
+        if monitor_list == ["G5"]:
+            assert session.add_monitor(*devices.get_signal_ids("D3.Q")) == \
+                monitors.NO_ERROR
+            assert sorted(session.checkpoints) == [0, 5, 10, 15, 20]
+        traces.append(get_traces(monitors))
+    assert traces[0] == traces[1]
+
+
+def test_replayed_cycles_are_not_written_to_vcd(make_simulator,
+                                                get_traces, simulate):
+    """Test if the VCD file holds every cycle once after a switch change."""
+    names, devices, network, monitors = make_simulator()
+    file = io.StringIO()
+    file.close = lambda: None  # keep the contents readable
+    writer = VCDWriter(names, devices, network, monitors, file)
+    monitors.set_vcd_writer(writer)
+    session = Session(names, devices, network, monitors, 4)
+    session.run(10)
+    [SW1_ID] = names.lookup(["SW1"])
+    assert session.set_switch(SW1_ID, 0, 3)
+    session.continue_run(5)
+    writer.close()
+    times = [int(line[1:]) for line in file.getvalue().splitlines()
+             if line.startswith("#")]
+    assert times == sorted(set(times))
+    assert times[-1] == 15
+    assert get_traces(monitors) == simulate("levelized", 15,
+                                            [(3, "SW1", 0)])
+
+@pytest.mark.parametrize("engine", Network.engine_types)
+def test_pruned_network(engine, get_traces):
+    """Test if pruning gives the same traces with fewer evaluations."""
+    device_list, connection_list, _ = generate.make_random_network(300,
+                                                                   seed=2)
+    evaluations = []
+    traces = []
+    for pruning in [False, True]:
+        names = Names()
+        devices = Devices(names, seed=1)
+        network = Network(names, devices, engine)
+        monitors = Monitors(names, devices, network)
+        assert generate.build_netlist((device_list, connection_list,
+                                       ["G5", "G40"]), names, devices,
+                                      network, monitors)
+        monitors.set_pruning(pruning)
+        session = Session(names, devices, network, monitors, 8)
+        stats = network.enable_profiling()
+        session.run(30)
+        evaluations.append(sum(stats.evaluations.values()))
+        switch_ids = devices.find_devices(devices.SWITCH)[:5]
+        for number, switch_id in enumerate(switch_ids):
+            session.set_switch(switch_id, number % 2, 6 * number)
+        # The new monitor reads devices that have not been simulated yet
+        assert session.add_monitor(*devices.get_signal_ids("G90")) == \
+            monitors.NO_ERROR
+        for number, switch_id in enumerate(switch_ids):
+            session.set_switch(switch_id, 1 - number % 2, 29 - 6 * number)
+        session.continue_run(10)
+        traces.append(get_traces(monitors))
+    assert traces[0] == traces[1]
+    assert evaluations[1] < evaluations[0] / 2
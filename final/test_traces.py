@@ -0,0 +1,141 @@
+"""Test the traces module."""
+import pytest
+
+from traces import RLETrace, WindowTrace, get_runs
+
+
+def test_window_trace_keeps_last_cycles():
+    """Test if the window holds the signals of the last cycles."""
+    trace = WindowTrace(4)
+    assert trace == [] and len(trace) == 0
+    trace.extend([0, 1, 2])
+    assert trace == [0, 1, 2]
+    trace.extend([3, 0, 1, 4])
+    assert trace == [3, 0, 1, 4]
+    assert (trace.cycles, trace.start, len(trace)) == (7, 3, 4)
+    assert trace[0] == 3 and trace[-1] == 4
+    assert trace[1:3] == [0, 1]
+    assert trace.get_cycle(2) is None and trace.get_cycle(5) == 1
+    with pytest.raises(IndexError):
+        trace[4]
+
+    trace.clear()
+    assert trace == [] and trace.cycles == 0
+
+
+def test_window_trace_spills_older_signals(tmp_path):
+    """Test if every signal that leaves the window is written to the file."""
+    signals = [cycle * 7 % 5 for cycle in range(23)]
+    trace = WindowTrace(5, open(tmp_path / "spill.trace", "wb"))
+    trace.extend(signals)
+    spilled = trace.read_spilled()
+    assert spilled == signals[:len(spilled)]
+    assert len(spilled) >= trace.start
+    assert trace == signals[-5:]
+
+    trace.clear()
+    assert trace.read_spilled() == []
+    trace.close()
+
+
+def test_window_trace_append_run(tmp_path):
+    """Test if appending runs gives the same window and spill file."""
+    runs = [(1, 3), (2, 12), (0, 1), (3, 25), (4, 0), (1, 4)]
+    traces = [WindowTrace(5, open(tmp_path / "run.trace", "wb")),
+              WindowTrace(5, open(tmp_path / "cycle.trace", "wb"))]
+    for signal, run_length in runs:
+        traces[0].append_run(signal, run_length)
+        traces[1].extend([signal] * run_length)
+        assert traces[0] == traces[1]
+        assert traces[0].cycles == traces[1].cycles
+        assert traces[0].read_spilled() == traces[1].read_spilled()
+    for trace in traces:
+        trace.close()
+
+
+def test_invalid_window():
+    """Test if invalid windows raise exceptions."""
+    with pytest.raises(TypeError):
+        WindowTrace(2.5)
+    with pytest.raises(ValueError):
+        WindowTrace(0)
+
+
+def test_rle_trace():
+    """Test if the runs give the same signals as a list."""
+    signals = [0, 0, 0, 1, 1, 2, 1, 1, 1, 1, 3, 0, 4, 4]
+    trace = RLETrace()
+    for signal in signals:
+        trace.append(signal)
+    assert trace == signals and len(trace) == len(signals)
+    assert list(trace.runs()) == [(0, 3), (1, 2), (2, 1), (1, 4), (3, 1),
+                                  (0, 1), (4, 2)]
+    assert list(trace.runs()) == list(get_runs(signals))
+    assert [trace[i] for i in range(-len(signals), len(signals))] == \
+        signals + signals
+    assert trace[2:9:3] == signals[2:9:3]
+    with pytest.raises(IndexError):
+        trace[len(signals)]
+
+    # Memory grows with the number of transitions
+    trace.append_run(1, 10 ** 9)
+    assert len(trace) == 10 ** 9 + len(signals)
+    assert len(trace.run_signals) == 8
+    assert trace[-1] == 1
+
+    assert RLETrace(signals) == trace[:len(signals)]
+    trace.clear()
+    assert trace == [] and list(trace.runs()) == []
+
+
+def test_truncate(tmp_path):
+    """Test if truncating removes the signals from a cycle on."""
+    signals = [0, 0, 1, 1, 1, 0, 4, 4]
+    trace = RLETrace(signals)
+    trace.truncate(20)
+    assert trace == signals
+    trace.truncate(4)
+    assert trace == signals[:4] and list(trace.runs()) == [(0, 2), (1, 2)]
+    trace.append(1)
+    assert list(trace.runs()) == [(0, 2), (1, 3)]
+    trace.truncate(2)
+    trace.append(0)
+    assert trace == [0, 0, 0]
+    trace.truncate(0)
+    assert trace == [] and trace.last_signal is None
+
+    trace = WindowTrace(4, open(str(tmp_path / "spill.trace"), "wb"))
+    trace.extend(signals + [1])
+    assert trace.spilled == 8
+    with pytest.raises(ValueError):
+        trace.truncate(7)
+    trace.truncate(8)
+    trace.extend([3, 3])
+    assert trace == [4, 4, 3, 3] and trace.start == 6
+    trace.close()
+    trace = WindowTrace(4)
+    trace.extend(signals)
+    trace.truncate(6)
+    assert trace == [1, 0] and trace.start == 4
+    trace.extend([2, 2, 2])
+    assert trace == [0, 2, 2, 2]
+    with pytest.raises(ValueError):
+        trace.truncate(2)
+
+
+@pytest.mark.parametrize("append_run", [False, True])
+def test_truncate_at_spilled_boundary(tmp_path, append_run):
+    """Test if signals spilled before a truncation are not spilled again."""
+    path = tmp_path / "spill.trace"
+    trace = WindowTrace(4, open(str(path), "wb"))
+    trace.extend([0, 1, 0, 1, 1, 1])
+    assert trace.spilled == 4
+    trace.truncate(4)
+    if append_run:
+        trace.append_run(0, 9)
+    else:
+        trace.extend([0] * 9)
+    assert trace.read_spilled() == [0, 1, 0, 1] + [0] * 8
+    assert path.stat().st_size == 12
+    assert trace == [0] * 4 and trace.start == 9
+    trace.close()
@@ -0,0 +1,75 @@
+"""Test the userint module."""
+import io
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from userint import UserInterface
+
+
+@pytest.fixture
+def userint():
+    """Return a user interface for definition_file_1.txt."""
+    names = Names()
+    devices = Devices(names, seed=3)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    scanner = Scanner("definition_file_1.txt", names)
+    parser = Parser(names, devices, network, monitors, scanner)
+    assert parser.parse_network()
+    return UserInterface(names, devices, network, monitors)
+
+
+def test_run_script(userint, capsys):
+    """Test if a script runs every command and displays traces once."""
+    script = io.StringIO("# comment\n\ns SW1 0 SW2 0\nm G1\nr 4\n"
+                         "c 3 2\nq\nr 100\n")
+    userint.run_script(script)
+    out, _ = capsys.readouterr()
+    assert "#: " not in out
+    assert out.count("Successfully set switch.") == 2
+    assert out.count("Continuing for 3 cycles.") == 2
+    assert out.count("G1:") == 1
+    assert userint.cycles_completed == 10
+    [SW2_ID, G1_ID] = userint.names.lookup(["SW2", "G1"])
+    assert userint.devices.get_device(SW2_ID).switch_state == 0
+    assert len(userint.monitors.monitors_dictionary[(G1_ID, None)]) == 10
+
+
+def test_run_script_to_trace_file(userint, capsys):
+    """Test if the traces of a script can be written to a file."""
+    trace_file = io.StringIO()
+    userint.run_script(io.StringIO("r 6\n"), trace_file)
+    out, _ = capsys.readouterr()
+    assert out == "Running for 6 cycles\n"
+    # The seed of the devices is written first, to reproduce the traces
+    assert trace_file.getvalue() == "Seed: 3\nG4: ______\nG5: ______\n"
+
+
+def test_script_errors(userint, capsys):
+    """Test if invalid batch commands stop at the invalid argument."""
+    userint.run_script(io.StringIO("s SW1 0 G1 1 SW2 0\nc 5 2\n"
+                                   "r 2\nc 1 0\n"))
+    out, _ = capsys.readouterr()
+    assert out.count("Successfully set switch.") == 1
+    assert "Error! Invalid switch." in out
+    assert "Error! Nothing to continue. Run first." in out
+    assert "Number out of range." in out
+    assert userint.cycles_completed == 2
+
+
+def test_profile_command(userint, capsys):
+    """Test if the profile command starts, stops and prints statistics."""
+    userint.run_script(io.StringIO("p\np 1\nr 5\np 0\nc 5\np\n"))
+    out, _ = capsys.readouterr()
+    assert "Error! Not profiled." in out
+    assert "Profiling started." in out
+    assert "Profiling stopped." in out
+    stats = userint.network.stats
+    assert "Cycles: %d\n" % stats.cycles in out
+    assert stats.cycles + stats.idle_cycles == 5
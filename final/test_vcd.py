@@ -0,0 +1,114 @@
+"""Test the vcd module."""
+import io
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from vcd import VCDWriter
+
+
+def make_writer():
+    """Return a switch, a clock and a D-type streamed to a VCD writer."""
+    names = Names()
+    devices = Devices(names, seed=1)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [SW1_ID, CL_ID, D1_ID] = names.lookup(["Sw1", "Clock1", "D1"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(CL_ID, devices.CLOCK, 2)
+    devices.make_device(D1_ID, devices.D_TYPE)
+    for input_id in [devices.DATA_ID, devices.SET_ID, devices.CLEAR_ID]:
+        network.make_connection(SW1_ID, None, D1_ID, input_id)
+    network.make_connection(CL_ID, None, D1_ID, devices.CLK_ID)
+    monitors.make_monitor(SW1_ID, None)
+    monitors.make_monitor(CL_ID, None)
+    monitors.make_monitor(D1_ID, devices.Q_ID)
+    file = io.StringIO()
+    file.close = lambda: None  # keep the contents readable
+    writer = VCDWriter(names, devices, network, monitors, file)
+    monitors.set_vcd_writer(writer)
+    return names, devices, network, monitors, writer
+
+
+def read_changes(text):
+    """Return {identifier: [(time, value)]} from the body of a VCD file."""
+    changes = {}
+    time = None
+    for line in text.split("$enddefinitions $end\n")[1].splitlines():
+        if line.startswith("#"):
+            time = int(line[1:])
+        elif line and not line.startswith("$"):
+            changes.setdefault(line[1:], []).append((time, line[0]))
+    return changes
+
+
+def test_header():
+    """Test if every monitor is declared as a one bit wire."""
+    names, devices, network, monitors, writer = make_writer()
+    writer.close()
+    text = writer.file.getvalue()
+    assert "$var wire 1 ! Sw1 $end" in text
+    assert "$var wire 1 \" Clock1 $end" in text
+    assert "$var wire 1 # D1_Q $end" in text
+    assert "$comment seed 1 $end\n" in text
+    assert text.endswith("$enddefinitions $end\n#0\n")
+
+
+def test_only_changes_are_written():
+    """Test if the file holds the changes of the recorded traces."""
+    names, devices, network, monitors, writer = make_writer()
+    for _ in range(20):
+        network.execute_network()
+        monitors.record_signals()
+    writer.close()
+    changes = read_changes(writer.file.getvalue())
+
+    values = {devices.LOW: "0", devices.HIGH: "1", devices.RISING: "1",
+              devices.FALLING: "0"}
+    for identifier, trace in zip(["!", "\"", "#"],
+                                 monitors.monitors_dictionary.values()):
+        expected = []
+        for time, signal in enumerate(trace):
+            if not expected or expected[-1][1] != values[signal]:
+                expected.append((time, values[signal]))
+        assert changes[identifier] == expected
+    assert changes["!"] == [(0, "0")]
+    assert len(changes["\""]) == 10
+
+
+def test_restart():
+    """Test if every signal is written again after a cold start-up."""
+    names, devices, network, monitors, writer = make_writer()
+    for _ in range(3):
+        network.execute_network()
+        monitors.record_signals()
+    monitors.reset_monitors()
+    devices.cold_startup()
+    network.execute_network()
+    monitors.record_signals()
+    changes = read_changes(writer.file.getvalue())
+    assert changes["!"] == [(0, "0"), (3, "0")]
+    assert writer.time == 4
+    assert "$comment cold start-up seed 1 $end\n" in writer.file.getvalue()
+
+
+def test_identifiers():
+    """Test if identifiers are distinct printable codes."""
+    identifiers = [VCDWriter.get_identifier(number) for number in range(9000)]
+    assert len(set(identifiers)) == 9000
+    assert all(33 <= ord(character) <= 126 for identifier in identifiers
+               for character in identifier)
+
+
+def test_skipped_cycles_match_executed_cycles():
+    """Test if skipping idle cycles writes the same changes and times."""
+    texts = []
+    for fast_forward in [True, False]:
+        names, devices, network, monitors, writer = make_writer()
+        network.fast_forward = fast_forward
+        assert network.run_cycles(30, monitors) == 30
+        writer.close()
+        texts.append(writer.file.getvalue().split("$enddefinitions")[1])
+    assert texts[0] == texts[1]
+    assert texts[0].endswith("#30\n")
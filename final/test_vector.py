@@ -0,0 +1,76 @@
+"""Test the vector module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+
+
+@pytest.fixture
+def vector_network():
+    """Return a vector engine Network with a clock driving a D-type."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices, "vector")
+
+    [SW1_ID, CL_ID, D1_ID, OR1_ID, I1, I2] = new_names.lookup(
+        ["Sw1", "Clock1", "D1", "Or1", "I1", "I2"])
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(CL_ID, new_devices.CLOCK, 1)
+    new_devices.make_device(D1_ID, new_devices.D_TYPE)
+    new_devices.make_device(OR1_ID, new_devices.OR, 2)
+
+    connections = [(CL_ID, None, D1_ID, new_devices.CLK_ID),
+                   (D1_ID, new_devices.QBAR_ID, D1_ID, new_devices.DATA_ID),
+                   (SW1_ID, None, D1_ID, new_devices.SET_ID),
+                   (SW1_ID, None, D1_ID, new_devices.CLEAR_ID),
+                   (SW1_ID, None, OR1_ID, I1),
+                   (D1_ID, new_devices.Q_ID, OR1_ID, I2)]
+    for connection in connections:
+        new_network.make_connection(*connection)
+    return new_network
+
+
+def test_execute_network(vector_network):
+    """Test if the vector engine keeps the signals in its arrays."""
+    network = vector_network
+    devices = network.devices
+    [SW1_ID, OR1_ID] = devices.names.lookup(["Sw1", "Or1"])
+
+    assert not network.vector_engine.is_loaded()
+    devices.set_switch(SW1_ID, devices.HIGH)
+    assert network.execute_network()
+    assert network.vector_engine.is_loaded()
+    assert network.get_output_signal(OR1_ID, None) == devices.HIGH
+    assert network.get_output_signal(OR1_ID, 100) is None
+
+    # The devices still hold the state they had before the cycle
+    assert devices.get_device(SW1_ID).outputs[None] == devices.LOW
+    network.vector_engine.store_state()
+    assert devices.get_device(SW1_ID).outputs[None] == devices.HIGH
+
+
+def test_cold_startup_reloads_state(vector_network):
+    """Test if the vector engine reloads the devices after a cold start."""
+    network = vector_network
+    devices = network.devices
+    [SW1_ID, D1_ID] = devices.names.lookup(["Sw1", "D1"])
+
+    devices.set_switch(SW1_ID, devices.HIGH)
+    network.execute_network()
+    devices.cold_startup()
+    assert not network.vector_engine.is_loaded()
+    signal = devices.get_device(D1_ID).outputs[devices.Q_ID]
+    assert network.get_output_signal(D1_ID, devices.Q_ID) == signal
+
+    network.execute_network()
+    assert network.vector_engine.is_loaded()
+
+
+def test_unconnected_network(vector_network):
+    """Test if the vector engine fails if an input is unconnected."""
+    network = vector_network
+    devices = network.devices
+    [AND1_ID] = devices.names.lookup(["And1"])
+    devices.make_device(AND1_ID, devices.AND, 2)
+    assert not network.execute_network()
@@ -0,0 +1,347 @@
+"""Store monitored signal traces compactly.
+
+Used in the Logic Simulator project by the monitors to store the signals
+recorded at each simulation cycle, when a plain list would use too much
+memory.
+
+Classes
+-------
+RLETrace - stores a signal trace as runs of equal signals.
+WindowTrace - keeps the signals of the last cycles in a ring buffer.
+"""
+import array
+import bisect
+import itertools
+
+
+def get_runs(signals):
+    """Return an iterator of (signal, run_length) pairs for a signal trace.
+
+    signals is an RLETrace, whose runs are stored, or any other sequence of
+    signals.
+    """
+    if isinstance(signals, RLETrace):
+        return signals.runs()
+    return ((signal, len(list(run)))
+            for signal, run in itertools.groupby(signals))
+
+
+class RLETrace:
+
+    """Store a signal trace as runs of equal signals.
+
+    The trace behaves like a list of signals: it can be appended to, indexed
+    by cycle, sliced, iterated over and compared with a list. Only the
+    signal and start cycle of each run are stored, so memory and the cost of
+    walking the runs grow with the number of transitions, not cycles.
+    Indexing finds the run by a binary search over the run starts.
+
+    Parameters
+    ----------
+    signals: initial signals of the trace (optional).
+
+    Public methods
+    --------------
+    append(self, signal): Records the signal of the next cycle.
+
+    append_run(self, signal, run_length): Records the signal for the next
+                                          run_length cycles.
+
+    extend(self, signals): Records the signals of the next cycles.
+
+    clear(self): Removes every signal.
+
+    truncate(self, cycles): Removes the signals from the cycle on.
+
+    runs(self): Returns an iterator of (signal, run_length) pairs.
+    """
+
+    def __init__(self, signals=()):
+        """Initialise the runs."""
+        self.run_signals = array.array("b")
+        self.run_starts = array.array("q")  # cycle at which each run starts
+        self.cycles = 0  # number of signals recorded
+        self.last_signal = None  # signal of the last run
+        self.extend(signals)
+
+    def append(self, signal):
+        """Record the signal of the next cycle."""
+        if signal != self.last_signal:
+            self.run_signals.append(signal)
+            self.run_starts.append(self.cycles)
+            self.last_signal = signal
+        self.cycles += 1
+
+    def append_run(self, signal, run_length):
+        """Record the signal for the next run_length cycles."""
+        if run_length <= 0:
+            return
+        if signal != self.last_signal:
+            self.run_signals.append(signal)
+            self.run_starts.append(self.cycles)
+            self.last_signal = signal
+        self.cycles += run_length
+
+    def extend(self, signals):
+        """Record the signals of the next cycles."""
+        for signal, run_length in get_runs(signals):
+            self.append_run(signal, run_length)
+
+    def clear(self):
+        """Remove every signal."""
+        del self.run_signals[:]
+        del self.run_starts[:]
+        self.cycles = 0
+        self.last_signal = None
+
+    def truncate(self, cycles):
+        """Remove the signals recorded from the cycle on."""
+        if cycles >= self.cycles:
+            return
+        runs = bisect.bisect_left(self.run_starts, max(cycles, 0))
+        del self.run_signals[runs:]
+        del self.run_starts[runs:]
+        self.cycles = max(cycles, 0)
+        self.last_signal = self.run_signals[-1] if runs else None
+
+    def runs(self):
+        """Return an iterator of (signal, run_length) pairs."""
+        ends = itertools.chain(itertools.islice(self.run_starts, 1, None),
+                               [self.cycles])
+        return ((signal, end - start) for signal, start, end
+                in zip(self.run_signals, self.run_starts, ends))
+
+    def __len__(self):
+        """Return the number of cycles recorded."""
+        return self.cycles
+
+    def __getitem__(self, index):
+        """Return the signal at the cycle, or a list for a slice."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.cycles))]
+        if index < 0:
+            index += self.cycles
+        if not 0 <= index < self.cycles:
+            raise IndexError("RLETrace index out of range")
+        run = bisect.bisect_right(self.run_starts, index) - 1
+        return self.run_signals[run]
+
+    def __iter__(self):
+        """Iterate over the signal of every cycle."""
+        for signal, run_length in self.runs():
+            for _ in range(run_length):
+                yield signal
+
+    def __eq__(self, other):
+        """Return True if other holds the same signals."""
+        if isinstance(other, RLETrace):
+            return (self.cycles == other.cycles
+                    and self.run_signals == other.run_signals
+                    and self.run_starts == other.run_starts)
+        if isinstance(other, (WindowTrace, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        """Return a representation of the runs."""
+        return "RLETrace(%r)" % list(self)
+
+
+class WindowTrace:
+
+    """Keep the signals of the last cycles in a ring buffer.
+
+    The trace behaves like a list of the signals in the window: it can be
+    appended to, indexed, sliced, iterated over and compared with a list.
+    Signals are stored one byte each in a preallocated array, so memory does
+    not grow with the number of cycles. If a spill file is given, signals
+    are written to it before they are overwritten, one byte per cycle.
+
+    Parameters
+    ----------
+    window: number of cycles to keep (a positive integer).
+    spill_file: binary file the older signals are written to (optional).
+
+    Public methods
+    --------------
+    append(self, signal): Records the signal of the next cycle.
+
+    append_run(self, signal, run_length): Records the signal for the next
+                                          run_length cycles.
+
+    extend(self, signals): Records the signals of the next cycles.
+
+    clear(self): Removes every signal, truncating the spill file.
+
+    truncate(self, cycles): Removes the signals from the cycle on.
+
+    get_cycle(self, cycle): Returns the signal recorded at the cycle, or None
+                            if it has left the window.
+
+    read_spilled(self): Returns the list of signals written to the spill
+                        file.
+
+    read_recorded(self): Returns the signals in the spill file followed by
+                         the later signals in the window.
+
+    close(self): Closes the spill file.
+    """
+
+    def __init__(self, window, spill_file=None):
+        """Initialise the ring buffer."""
+        if not isinstance(window, int) or isinstance(window, bool):
+            raise TypeError("Expected window to be an integer.")
+        if window < 1:
+            raise ValueError("Expected window to be a positive integer.")
+        self.window = window
+        self.spill_file = spill_file
+        self.buffer = array.array("b", bytes(window))
+        self.cycles = 0  # number of signals recorded
+        self.spilled = 0  # number of signals in the spill file
+        # oldest is the first cycle still in the buffer after a truncation
+        self.oldest = 0
+
+    @property
+    def start(self):
+        """Return the cycle of the oldest signal in the window."""
+        return max(self.oldest, self.cycles - self.window)
+
+    def append(self, signal):
+        """Record the signal of the next cycle."""
+        index = self.cycles % self.window
+        if index == 0 and self.cycles > self.spilled and \
+                self.spill_file is not None:
+            # The buffer is about to be overwritten from the start, so every
+            # signal in it is written out before the first one is lost,
+            # unless it was written out before a truncation
+            self.buffer.tofile(self.spill_file)
+            self.spilled = self.cycles
+        self.buffer[index] = signal
+        self.cycles += 1
+
+    def append_run(self, signal, run_length):
+        """Record the signal for the next run_length cycles.
+
+        Whole windows of the run are filled at once, so the cost grows with
+        the window, and the spill file, rather than with the run.
+        """
+        window = self.window
+        while run_length > 0 and self.cycles % window:
+            self.append(signal)
+            run_length -= 1
+        whole_windows = run_length // window
+        if whole_windows:
+            run = array.array("b", [signal]) * window
+            if self.spill_file is not None:
+                # Each window is written out when the next one starts
+                if self.cycles > self.spilled:
+                    self.buffer.tofile(self.spill_file)
+                for _ in range(whole_windows - 1):
+                    run.tofile(self.spill_file)
+                self.spilled = max(self.spilled, self.cycles +
+                                   (whole_windows - 1) * window)
+            self.buffer = run
+            self.cycles += whole_windows * window
+            run_length -= whole_windows * window
+        for _ in range(run_length):
+            self.append(signal)
+
+    def extend(self, signals):
+        """Record the signals of the next cycles."""
+        for signal in signals:
+            self.append(signal)
+
+    def clear(self):
+        """Remove every signal, truncating the spill file."""
+        self.cycles = 0
+        self.spilled = 0
+        self.oldest = 0
+        if self.spill_file is not None:
+            self.spill_file.seek(0)
+            self.spill_file.truncate()
+
+    def truncate(self, cycles):
+        """Remove the signals recorded from the cycle on.
+
+        Raise ValueError if signals before the cycle have left the window or
+        been written to the spill file, since they could not be recorded
+        again in order.
+        """
+        if cycles >= self.cycles:
+            return
+        if cycles < max(self.start, self.spilled):
+            raise ValueError("Expected cycles to be within the window.")
+        self.oldest = self.start
+        self.cycles = cycles
+
+    def get_cycle(self, cycle):
+        """Return the signal recorded at the cycle.
+
+        Return None if the cycle has not been recorded or has left the
+        window.
+        """
+        if self.start <= cycle < self.cycles:
+            return self.buffer[cycle % self.window]
+        return None
+
+    def read_spilled(self):
+        """Return the list of signals written to the spill file.
+
+        These are the signals of cycles 0 to spilled - 1, which include every
+        signal that has left the window.
+        """
+        if self.spill_file is None:
+            return []
+        self.spill_file.flush()
+        with open(self.spill_file.name, "rb") as file:
+            return list(array.array("b", file.read(self.spilled)))
+
+    def read_recorded(self):
+        """Return every signal still recorded, oldest first.
+
+        These are the signals in the spill file followed by the signals of
+        the later cycles in the window, or only the signals in the window if
+        older signals have been lost.
+        """
+        spilled = self.read_spilled()
+        if len(spilled) < self.start:
+            return list(self)
+        return spilled + [self.buffer[cycle % self.window]
+                          for cycle in range(len(spilled), self.cycles)]
+
+    def close(self):
+        """Close the spill file."""
+        if self.spill_file is not None:
+            self.spill_file.close()
+
+    def __len__(self):
+        """Return the number of signals in the window."""
+        return self.cycles - self.start
+
+    def __getitem__(self, index):
+        """Return the signal at the index of the window, or a list slice."""
+        length = len(self)
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(length))]
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("WindowTrace index out of range")
+        return self.buffer[(self.start + index) % self.window]
+
+    def __iter__(self):
+        """Iterate over the signals in the window, oldest first."""
+        buffer = self.buffer
+        window = self.window
+        for cycle in range(self.start, self.cycles):
+            yield buffer[cycle % window]
+
+    def __eq__(self, other):
+        """Return True if other holds the same signals as the window."""
+        if isinstance(other, (RLETrace, WindowTrace, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        """Return a representation of the window."""
+        return "WindowTrace(%d, %r)" % (self.window, list(self))
@@ -1,12 +1,14 @@
 """Implement the interactive command line user interface.
 
 Used in the Logic Simulator project to enable the user to enter commands
-to run the simulation or adjust the network properties.
+to run the simulation or adjust the network properties, either interactively
+or from a script of commands.
 
 Classes:
 --------
 UserInterface - reads and parses user commands.
 """
+import contextlib
 
 
 class UserInterface:
@@ -30,7 +32,11 @@ class UserInterface:
     command_interface(self): Reads in the commands and calls the corresponding
                              functions.
 
-    get_line(self): Prints a prompt for the user and updates the user entry.
+    run_script(self, script, trace_file=None): Executes the commands in a
+                            script and displays the traces at the end.
+
+    get_line(self): Prints a prompt for the user and updates the user entry,
+                    or reads the next line of the script.
 
     read_command(self): Returns the first non-whitespace character.
 
@@ -51,8 +57,11 @@ class UserInterface:
 
     help_command(self): Prints a list of valid commands.
 
-    switch_command(self): Sets the specified switch to the specified signal
-                          level.
+    switch_command(self): Sets the specified switches to the specified signal
+                          levels.
+
+    more_arguments(self): Returns True if more arguments follow the last one
+                          read.
 
     monitor_command(self): Sets the specified monitor.
 
@@ -63,7 +72,14 @@ class UserInterface:
 
     run_command(self): Runs the simulation from scratch.
 
-    continue_command(self): Continues a previously run simulation.
+    continue_command(self): Continues a previously run simulation, a number
+                            of times.
+
+    display_traces(self): Displays the monitored traces unless they are
+                          deferred.
+
+    profile_command(self): Starts or stops profiling the simulation, or
+                           prints the profiling statistics.
     """
 
     def __init__(self, names, devices, network, monitors):
@@ -79,10 +95,14 @@ class UserInterface:
         self.line = ""  # current string entered by the user
         self.cursor = 0  # cursor position
 
+        self.script = None  # file of commands, or None to read user entries
+        self.show_traces = True  # display the traces after every run
+
     def command_interface(self):
         """Read the command entered and call the corresponding function."""
-        print("Logic Simulator: interactive command line user interface.\n"
-              "Enter 'h' for help.")
+        if self.script is None:
+            print("Logic Simulator: interactive command line user interface."
+                  "\nEnter 'h' for help.")
         self.get_line()  # get the user entry
         command = self.read_command()  # read the first character
         while command != "q":
@@ -98,14 +118,49 @@ class UserInterface:
                 self.run_command()
             elif command == "c":
                 self.continue_command()
+            elif command == "p":
+                self.profile_command()
             else:
                 print("Invalid command. Enter 'h' for help.")
             self.get_line()  # get the user entry
             command = self.read_command()  # read the first character
 
+    def run_script(self, script, trace_file=None):
+        """Execute the commands in a script, then display the traces once.
+
+        script is a text file (or sys.stdin) with one command per line.
+        Blank lines and lines starting with '#' are skipped, and the script
+        ends at 'q' or at the end of the file. No prompt is printed and the
+        traces are displayed at the end rather than after every run, on the
+        console or in trace_file if given.
+        """
+        self.script = script
+        self.show_traces = False
+        try:
+            self.command_interface()
+        finally:
+            self.script = None
+            self.show_traces = True
+        if trace_file is None:
+            self.monitors.display_signals()
+        else:
+            with contextlib.redirect_stdout(trace_file):
+                self.monitors.display_signals()
+
     def get_line(self):
-        """Print prompt for the user and update the user entry."""
+        """Print prompt for the user and update the user entry.
+
+        If a script is being executed, read its next command instead, or 'q'
+        at the end of the script.
+        """
         self.cursor = 0
+        if self.script is not None:
+            for line in self.script:
+                if line.strip() and not line.lstrip().startswith("#"):
+                    self.line = line.rstrip("\n")
+                    return
+            self.line = "q"  # end of the script
+            return
         self.line = input("#: ")
         while self.line == "":  # if the user enters a blank line
             self.line = input("#: ")
@@ -203,23 +258,39 @@ class UserInterface:
         """Print a list of valid commands."""
         print("User commands:")
         print("r N       - run the simulation for N cycles")
-        print("c N       - continue the simulation for N cycles")
-        print("s X N     - set switch X to N (0 or 1)")
+        print("c N [K]   - continue the simulation for N cycles, K times")
+        print("s X N ... - set switch X to N (0 or 1), and any more pairs")
         print("m X       - set a monitor on signal X")
         print("z X       - zap the monitor on signal X")
+        print("p [N]     - start (1) or stop (0) profiling, or print the "
+              "statistics")
         print("h         - help (this command)")
         print("q         - quit the program")
 
     def switch_command(self):
-        """Set the specified switch to the specified signal level."""
-        switch_id = self.read_name()
-        if switch_id is not None:
+        """Set the specified switches to the specified signal levels.
+
+        Several switches can be set at once, as in 's SW1 1 SW2 0'.
+        """
+        while True:
+            switch_id = self.read_name()
+            if switch_id is None:
+                return
             switch_state = self.read_number(0, 1)
-            if switch_state is not None:
-                if self.devices.set_switch(switch_id, switch_state):
-                    print("Successfully set switch.")
-                else:
-                    print("Error! Invalid switch.")
+            if switch_state is None:
+                return
+            if self.devices.set_switch(switch_id, switch_state):
+                print("Successfully set switch.")
+            else:
+                print("Error! Invalid switch.")
+                return
+            if not self.more_arguments():
+                return
+
+    def more_arguments(self):
+        """Return True if more arguments follow the last one read."""
+        return (self.character.isspace()
+                and self.line[self.cursor:].strip() != "")
 
     def monitor_command(self):
         """Set the specified monitor."""
@@ -248,15 +319,19 @@ class UserInterface:
 
         Return True if successful.
         """
-        for _ in range(cycles):
-            if self.network.execute_network():
-                self.monitors.record_signals()
-            else:
-                print("Error! Network oscillating.")
-                return False
-        self.monitors.display_signals()
+        if self.network.run_cycles(cycles, self.monitors) < cycles:
+            print("Error! Network oscillating.")
+            oscillating_names = self.network.get_oscillating_names()
+            if oscillating_names:
+                print("Oscillating devices:", ", ".join(oscillating_names))
+            return False
         return True
 
+    def display_traces(self):
+        """Display the monitored traces, unless a script defers them."""
+        if self.show_traces:
+            self.monitors.display_signals()
+
     def run_command(self):
         """Run the simulation from scratch."""
         self.cycles_completed = 0
@@ -268,14 +343,48 @@ class UserInterface:
             self.devices.cold_startup()
             if self.run_network(cycles):
                 self.cycles_completed += cycles
+                self.display_traces()
 
     def continue_command(self):
-        """Continue a previously run simulation."""
+        """Continue a previously run simulation.
+
+        An optional repeat count continues the simulation that many times,
+        as in 'c 10 5', and the traces are displayed once at the end.
+        """
         cycles = self.read_number(0, None)
         if cycles is not None:  # if the number of cycles provided is valid
+            repeats = 1
+            if self.more_arguments():
+                repeats = self.read_number(1, None)
+                if repeats is None:
+                    return
             if self.cycles_completed == 0:
                 print("Error! Nothing to continue. Run first.")
-            elif self.run_network(cycles):
+                return
+            for _ in range(repeats):
+                if not self.run_network(cycles):
+                    return
                 self.cycles_completed += cycles
                 print(" ".join(["Continuing for", str(cycles), "cycles.",
                                 "Total:", str(self.cycles_completed)]))
+            self.display_traces()
+
+    def profile_command(self):
+        """Start or stop profiling, or print the profiling statistics.
+
+        'p 1' starts collecting statistics, 'p 0' stops, and 'p' alone prints
+        the statistics collected so far.
+        """
+        if self.line[self.cursor:].strip() == "":
+            if self.network.stats is None:
+                print("Error! Not profiled. Enter 'p 1' to start.")
+            else:
+                print("\n".join(self.network.stats.get_report()))
+            return
+        profiling = self.read_number(0, 1)
+        if profiling == 1:
+            self.network.enable_profiling(self.monitors)
+            print("Profiling started.")
+        elif profiling == 0:
+            self.network.disable_profiling()
+            print("Profiling stopped.")
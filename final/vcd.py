@@ -0,0 +1,145 @@
+"""Write monitored signals to a Value Change Dump file.
+
+Used in the Logic Simulator project to stream the monitored signals to a VCD
+file as they are recorded, so that long simulations can be inspected in a
+waveform viewer without holding the traces in memory.
+
+Classes
+-------
+VCDWriter - streams the changes of the monitored signals to a VCD file.
+"""
+import time
+
+
+class VCDWriter:
+
+    """Stream the changes of the monitored signals to a VCD file.
+
+    The header is written at the first simulation cycle, declaring a one bit
+    wire for every monitor present then. Monitors made later are not
+    written. Each simulation cycle is one time step, and only the signals
+    that changed are written. RISING is written as 1 and FALLING as 0, since
+    the edge has happened by the end of the cycle. A signal which cannot be
+    read is written as x. Signal names such as D1.Q are written as D1_Q.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    file: text file the VCD is written to.
+    timescale: duration of a simulation cycle (optional).
+
+    Public methods
+    --------------
+    write_header(self): Declares the monitored signals.
+
+    write_cycle(self): Writes the monitored signals that changed in this
+                       simulation cycle.
+
+    skip_cycles(self, cycles): Moves on by a number of cycles in which no
+                               signal changes.
+
+    restart(self): Marks a cold start-up, after which every signal is
+                   written again.
+
+    close(self): Writes the final time and closes the file.
+    """
+
+    def __init__(self, names, devices, network, monitors, file,
+                 timescale="1ns"):
+        """Initialise the writer."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+        self.file = file
+        self.timescale = timescale
+
+        # vcd_values maps each signal to its character in the VCD file
+        self.vcd_values = {devices.LOW: "0", devices.HIGH: "1",
+                           devices.RISING: "1", devices.FALLING: "0"}
+        # signals stores [(device_id, output_id, identifier)] once the header
+        # has been written, and values the last value written for each
+        self.signals = None
+        self.values = []
+        self.time = 0  # time of the next simulation cycle
+
+    @staticmethod
+    def get_identifier(number):
+        """Return a short identifier code made of printable characters."""
+        characters = []
+        while True:
+            number, digit = divmod(number, 94)
+            characters.append(chr(33 + digit))
+            if number == 0:
+                return "".join(characters)
+            number -= 1
+
+    def write_header(self):
+        """Declare the monitored signals."""
+        self.signals = []
+        lines = ["$date " + time.asctime() + " $end",
+                 "$version Logic Simulator $end",
+                 "$timescale " + self.timescale + " $end"]
+        if self.monitors.seed is not None:
+            # The seed reproduces the cold start-up of the traces
+            lines.append("$comment seed %d $end" % self.monitors.seed)
+        lines.append("$scope module logsim $end")
+        for number, (device_id, output_id) in enumerate(
+                self.monitors.monitors_dictionary):
+            identifier = self.get_identifier(number)
+            signal_name = self.devices.get_signal_name(device_id, output_id)
+            lines.append("$var wire 1 %s %s $end"
+                         % (identifier, signal_name.replace(".", "_")))
+            self.signals.append((device_id, output_id, identifier))
+        lines.extend(["$upscope $end", "$enddefinitions $end", ""])
+        self.file.write("\n".join(lines))
+        self.values = [None] * len(self.signals)
+
+    def write_cycle(self):
+        """Write the monitored signals that changed in this cycle."""
+        if self.signals is None:
+            self.write_header()
+        changes = []
+        get_output_signal = self.network.get_output_signal
+        for index, (device_id, output_id, identifier) in enumerate(
+                self.signals):
+            value = self.vcd_values.get(get_output_signal(device_id,
+                                                          output_id), "x")
+            if value != self.values[index]:
+                self.values[index] = value
+                changes.append(value + identifier)
+        if changes:
+            self.file.write("#%d\n%s\n" % (self.time, "\n".join(changes)))
+        self.time += 1
+
+    def skip_cycles(self, cycles):
+        """Move on by a number of cycles in which no signal changes."""
+        if self.signals is None:
+            self.write_header()
+        self.time += cycles
+
+    def restart(self):
+        """Mark a cold start-up, after which every signal is written again.
+
+        The seed of the cold start-up is noted, if the devices are seeded.
+
+        Time carries on from the previous run, since it cannot go back in a
+        VCD file.
+        """
+        if self.signals is not None:
+            if self.monitors.seed is None:
+                self.file.write("$comment cold start-up $end\n")
+            else:
+                self.file.write("$comment cold start-up seed %d $end\n"
+                                % self.monitors.seed)
+            self.values = [None] * len(self.signals)
+
+    def close(self):
+        """Write the final time and close the file."""
+        if self.signals is None:
+            self.write_header()
+        self.file.write("#%d\n" % self.time)
+        self.file.close()
@@ -0,0 +1,543 @@
+"""Execute the network with NumPy array operations.
+
+Used in the Logic Simulator project as the "vector" simulation engine of the
+network. All output signals are stored in one NumPy array and every level of
+the compiled schedule is executed with a few array operations.
+
+Classes
+-------
+VectorEngine - executes the network with array operations.
+"""
+import numpy as np
+
+
+class VectorEngine:
+
+    """Execute the network with array operations.
+
+    The engine executes the same schedule as network.Network.execute_network
+    and gives identical signals, but keeps the signals and device states in
+    arrays instead of the Device objects. The arrays are loaded from the
+    devices when the network is compiled or cold started, and can be written
+    back with store_state.
+
+    Signals are stored as their integer codes (LOW, HIGH, RISING, FALLING),
+    so the update_signal rules become lookup tables indexed by the current
+    signal and the target level.
+
+    Parameters
+    ----------
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    compile_engine(self): Builds the index arrays from the compiled schedule
+                          of the network.
+
+    load_state(self): Copies the signals and device states from the devices
+                      into the arrays.
+
+    store_state(self): Copies the signals and device states from the arrays
+                       back into the devices.
+
+    is_loaded(self): Returns True if the arrays hold the current state of the
+                     network.
+
+    get_output_signal(self, device_id, output_id): Returns the signal level
+                                                   at the given output.
+
+    get_network_state(self): Returns the signals and D-type memories as a
+                             hashable state.
+
+    get_idle_cycles(self): Returns the number of cycles before a clock,
+                           siggen or RC changes.
+
+    skip_idle_cycles(self, cycles): Advances the counters over idle cycles.
+
+    execute_network(self): Executes all the devices in the network for one
+                           simulation cycle.
+    """
+
+    def __init__(self, network):
+        """Initialise the lookup tables."""
+        self.network = network
+        self.devices = network.devices
+        devices = self.devices
+        [LOW, HIGH, RISING, FALLING] = [devices.LOW, devices.HIGH,
+                                        devices.RISING, devices.FALLING]
+
+        # Lookup tables indexed by signal code (and target level).
+        # gate_signal is the signal a gate reads, see network.gate_signals.
+        self.gate_signal = np.zeros(5, dtype=np.int8)
+        for signal, gate_signal in network.gate_signals.items():
+            self.gate_signal[signal] = gate_signal
+        self.previous_level = np.zeros(5, dtype=np.int8)
+        self.previous_level[[HIGH, FALLING]] = HIGH
+        self.settled_signal = np.zeros(5, dtype=np.int8)
+        self.settled_signal[[HIGH, RISING]] = HIGH
+        self.updated_signal = np.zeros((5, 2), dtype=np.int8)
+        for signal in [LOW, FALLING]:
+            self.updated_signal[signal] = [LOW, RISING]
+        for signal in [HIGH, RISING]:
+            self.updated_signal[signal] = [FALLING, HIGH]
+        self.toggled_signal = np.array([RISING, FALLING, RISING, FALLING, 4],
+                                       dtype=np.int8)
+
+        self.schedule = None
+        self.startup_count = None
+        self.output_index = {}
+        self.signals = None
+
+    def compile_engine(self):
+        """Build the index arrays from the compiled schedule of the network.
+
+        Gates of the same level are independent of each other, so the gates
+        of one level outside feedback loops are stored as a matrix of input
+        signal indices and executed together. D-types are split into ranks
+        that can be executed together without changing which outputs each
+        D-type reads before or after they are updated.
+        """
+        network = self.network
+        devices = self.devices
+        self.schedule = network.schedule
+
+        # Index every output in the order of the devices, then two spare
+        # signals which stay LOW and HIGH, used to pad gate inputs
+        self.output_index = {}
+        for device in devices.devices_list:
+            for output_id in device.outputs:
+                self.output_index[(device.device_id, output_id)] = \
+                    len(self.output_index)
+        self.low_index = len(self.output_index)
+        self.high_index = self.low_index + 1
+
+        self.connected = network.check_network()
+        if not self.connected:
+            return
+
+        def index_of(device_ids):
+            return np.array([self.output_index[(device_id, None)]
+                             for device_id in device_ids], dtype=np.intp)
+
+        self.switch_ids = self.network.find_simulated_devices(devices.SWITCH)
+        self.switch_devices = [devices.get_device(device_id)
+                               for device_id in self.switch_ids]
+        self.switch_outputs = index_of(self.switch_ids)
+
+        self.clock_ids = self.network.find_simulated_devices(devices.CLOCK)
+        self.clock_outputs = index_of(self.clock_ids)
+        self.siggen_ids = self.network.find_simulated_devices(devices.SIGGEN)
+        self.siggen_outputs = index_of(self.siggen_ids)
+        self.rc_ids = self.network.find_simulated_devices(devices.RC)
+        self.rc_outputs = index_of(self.rc_ids)
+        self.source_outputs = np.concatenate(
+            [self.clock_outputs, self.siggen_outputs, self.rc_outputs])
+
+        waves = [devices.get_device(device_id).siggen_wave
+                 for device_id in self.siggen_ids]
+        self.siggen_lengths = np.array([len(wave) for wave in waves],
+                                       dtype=np.int64)
+        self.siggen_offsets = np.cumsum(
+            np.concatenate([[0], self.siggen_lengths[:-1]])).astype(np.int64)
+        self.siggen_waves = np.array([signal for wave in waves
+                                      for signal in wave], dtype=np.int8)
+
+        self.compile_d_types()
+
+        self.levels = []
+        for gate_ids, loops in network.schedule:
+            self.levels.append((self.compile_gates(gate_ids),
+                                [self.compile_loop(loop) for loop in loops]))
+
+    def compile_d_types(self):
+        """Build the index arrays of the D-types, split into ranks.
+
+        The levelized engine executes the D-types one after the other, so a
+        D-type reads the new outputs of the D-types before it and the old
+        outputs of the D-types after it (and its own). A D-type is therefore
+        placed in a later rank than the D-types before it that it reads, and
+        in a rank no earlier than the D-types before it that read it.
+        """
+        devices = self.devices
+        self.d_type_ids = self.network.find_simulated_devices(devices.D_TYPE)
+        position = {device_id: number
+                    for number, device_id in enumerate(self.d_type_ids)}
+        rank = {}
+        for device_id in self.d_type_ids:
+            device_rank = 0
+            device = devices.get_device(device_id)
+            for connected_output in device.inputs.values():
+                driver_id = connected_output[0]
+                if driver_id in position and \
+                        position[driver_id] < position[device_id]:
+                    device_rank = max(device_rank, rank[driver_id] + 1)
+            for driven_output in devices.dtype_output_ids:
+                pins = self.network.fanout.get((device_id, driven_output), [])
+                for driven_id, input_id in pins:
+                    if driven_id in position and \
+                            position[driven_id] < position[device_id]:
+                        device_rank = max(device_rank, rank[driven_id])
+            rank[device_id] = device_rank
+
+        self.d_type_ranks = []
+        no_of_ranks = max(rank.values()) + 1 if rank else 0
+        for number in range(no_of_ranks):
+            members = [position[device_id] for device_id in self.d_type_ids
+                       if rank[device_id] == number]
+            self.d_type_ranks.append(np.array(members, dtype=np.intp))
+
+        def input_index(input_id):
+            return np.array([
+                self.output_index[devices.get_device(device_id).inputs[
+                    input_id]] for device_id in self.d_type_ids],
+                dtype=np.intp)
+
+        self.d_type_clk = input_index(devices.CLK_ID)
+        self.d_type_data = input_index(devices.DATA_ID)
+        self.d_type_set = input_index(devices.SET_ID)
+        self.d_type_clear = input_index(devices.CLEAR_ID)
+        self.d_type_q = np.array([self.output_index[(device_id, devices.Q_ID)]
+                                  for device_id in self.d_type_ids],
+                                 dtype=np.intp)
+        self.d_type_qbar = np.array([
+            self.output_index[(device_id, devices.QBAR_ID)]
+            for device_id in self.d_type_ids], dtype=np.intp)
+
+    def compile_gates(self, gate_ids):
+        """Return the index arrays of gates that are executed together.
+
+        Returns (outputs, inputs, x, y) for the gates other than XOR, where
+        inputs is a matrix padded with the spare signal equal to x, and
+        (outputs, inputs) for the XOR gates.
+        """
+        devices = self.devices
+        xor_ids = []
+        other_ids = []
+        for device_id in gate_ids:
+            if devices.get_device(device_id).device_kind == devices.XOR:
+                xor_ids.append(device_id)
+            else:
+                other_ids.append(device_id)
+
+        width = 1
+        for device_id in other_ids:
+            width = max(width, len(devices.get_device(device_id).inputs))
+        inputs = np.empty((len(other_ids), width), dtype=np.intp)
+        x = np.empty(len(other_ids), dtype=np.int8)
+        y = np.empty(len(other_ids), dtype=np.int8)
+        for number, device_id in enumerate(other_ids):
+            device = devices.get_device(device_id)
+            x[number], y[number] = self.network.gate_arguments[device_id]
+            if x[number] == devices.HIGH:
+                inputs[number] = self.high_index
+            else:
+                inputs[number] = self.low_index
+            for column, connected_output in enumerate(device.inputs.values()):
+                inputs[number, column] = self.output_index[connected_output]
+        outputs = np.array([self.output_index[(device_id, None)]
+                            for device_id in other_ids], dtype=np.intp)
+
+        xor_inputs = np.array([
+            [self.output_index[connected_output] for connected_output
+             in devices.get_device(device_id).inputs.values()]
+            for device_id in xor_ids], dtype=np.intp).reshape(-1, 2)
+        xor_outputs = np.array([self.output_index[(device_id, None)]
+                                for device_id in xor_ids], dtype=np.intp)
+        return ((outputs, inputs, x[:, np.newaxis], y),
+                (xor_outputs, xor_inputs))
+
+    def compile_loop(self, loop):
+        """Return a feedback loop as a list of gates in plain Python lists.
+
+        Each gate is (output index, input indices, x, y), where x and y are
+        None for XOR gates.
+        """
+        gates = []
+        for device_id in loop:
+            device = self.devices.get_device(device_id)
+            x, y = self.network.gate_arguments[device_id]
+            gates.append((self.output_index[(device_id, None)],
+                          [self.output_index[connected_output]
+                           for connected_output in device.inputs.values()],
+                          x, y))
+        return gates
+
+    def load_state(self):
+        """Copy the signals and device states from the devices."""
+        devices = self.devices
+        self.startup_count = devices.startup_count
+        self.signals = np.zeros(len(self.output_index) + 2, dtype=np.int8)
+        self.signals[self.high_index] = devices.HIGH
+        for (device_id, output_id), index in self.output_index.items():
+            self.signals[index] = \
+                devices.get_device(device_id).outputs[output_id]
+        if not self.connected:
+            return
+
+        def states(device_ids, attribute):
+            return np.array([getattr(devices.get_device(device_id), attribute)
+                             for device_id in device_ids], dtype=np.int64)
+
+        self.d_type_memory = states(self.d_type_ids,
+                                    "dtype_memory").astype(np.int8)
+        self.clock_half_period = states(self.clock_ids, "clock_half_period")
+        self.clock_counter = states(self.clock_ids, "clock_counter")
+        self.siggen_counter = states(self.siggen_ids, "siggen_counter")
+        self.time_constant = states(self.rc_ids, "time_constant")
+        self.rc_counter = states(self.rc_ids, "rc_counter")
+
+    def store_state(self):
+        """Copy the signals and device states back into the devices.
+
+        Devices that have been removed since the arrays were built are
+        skipped.
+        """
+        devices = self.devices
+        for (device_id, output_id), index in self.output_index.items():
+            device = devices.get_device(device_id)
+            if device is not None:
+                device.outputs[output_id] = int(self.signals[index])
+        if not self.connected:
+            return
+        for device_ids, attribute, values in [
+                (self.d_type_ids, "dtype_memory", self.d_type_memory),
+                (self.clock_ids, "clock_counter", self.clock_counter),
+                (self.siggen_ids, "siggen_counter", self.siggen_counter),
+                (self.rc_ids, "rc_counter", self.rc_counter)]:
+            for device_id, value in zip(device_ids, values.tolist()):
+                device = devices.get_device(device_id)
+                if device is not None:
+                    setattr(device, attribute, value)
+
+    def is_loaded(self):
+        """Return True if the arrays hold the current state of the network.
+
+        This is the case after a simulation cycle, until the network is
+        changed or cold started.
+        """
+        return (self.signals is not None and
+                self.schedule is self.network.schedule and
+                self.startup_count == self.devices.startup_count)
+
+    def get_output_signal(self, device_id, output_id):
+        """Return the signal level at the given output.
+
+        Return None if either of the specified IDs is invalid.
+        """
+        index = self.output_index.get((device_id, output_id))
+        if index is None:
+            return None
+        return int(self.signals[index])
+
+    def update_sources(self):
+        """Set clock, siggen and RC signals to RISING or FALLING if it is
+        time to do so."""
+        signals = self.signals
+
+        due = self.clock_counter == self.clock_half_period
+        if due.any():
+            outputs = self.clock_outputs[due]
+            signals[outputs] = self.toggled_signal[signals[outputs]]
+            self.clock_counter[due] = 0
+        self.clock_counter += 1
+
+        if len(self.siggen_ids):
+            self.siggen_counter = (self.siggen_counter + 1) % \
+                self.siggen_lengths
+            next_state = self.siggen_waves[self.siggen_offsets +
+                                           self.siggen_counter]
+            current = signals[self.siggen_outputs]
+            settled = (current == self.devices.HIGH) | \
+                (current == self.devices.LOW)
+            changing = settled & (current != next_state)
+            signals[self.siggen_outputs[changing]] = \
+                self.toggled_signal[current[changing]]
+
+        due = self.rc_counter == self.time_constant
+        if due.any():
+            signals[self.rc_outputs[due]] = self.devices.FALLING
+        self.rc_counter += 1
+
+    def execute_d_types(self):
+        """Execute the D-types rank by rank. Return True if none changed."""
+        signals = self.signals
+        memory = self.d_type_memory
+        steady = True
+        for members in self.d_type_ranks:
+            clock = signals[self.d_type_clk[members]]
+            data = self.previous_level[signals[self.d_type_data[members]]]
+            new_memory = np.where(clock == self.devices.RISING, data,
+                                  memory[members])
+            new_memory[signals[self.d_type_set[members]] ==
+                       self.devices.HIGH] = self.devices.HIGH
+            new_memory[signals[self.d_type_clear[members]] ==
+                       self.devices.HIGH] = self.devices.LOW
+            memory[members] = new_memory
+            for outputs, target in [(self.d_type_q[members], new_memory),
+                                    (self.d_type_qbar[members],
+                                     1 - new_memory)]:
+                old = signals[outputs]
+                new = self.updated_signal[old, target]
+                if steady and (new != old).any():
+                    steady = False
+                signals[outputs] = new
+        return steady
+
+    def execute_gates(self, gates):
+        """Execute gates of one level together. Return True if none changed."""
+        signals = self.signals
+        steady = True
+        (outputs, inputs, x, y), (xor_outputs, xor_inputs) = gates
+        targets = []
+        if len(outputs):
+            levels = self.gate_signal[signals[inputs]]
+            targets.append((outputs, np.where((levels == x).all(axis=1),
+                                              y, 1 - y)))
+        if len(xor_outputs):
+            levels = self.gate_signal[signals[xor_inputs]]
+            targets.append((xor_outputs,
+                            (levels[:, 0] != levels[:, 1]).astype(np.int8)))
+        for outputs, target in targets:
+            old = signals[outputs]
+            new = self.updated_signal[old, target]
+            if steady and (new != old).any():
+                steady = False
+            signals[outputs] = new
+        return steady
+
+    def execute_loop(self, loop):
+        """Execute a feedback loop until it settles, as
+        network.Network.execute_loop does. Return True if none changed."""
+        signals = self.signals
+        gate_signals = self.network.gate_signals
+        update_signal = self.updated_signal.tolist()
+        changed = False
+        loop_states = set()
+        for _ in range(self.network.iteration_limit):
+            loop_steady = True
+            for output, inputs, x, y in loop:
+                levels = [gate_signals[int(signals[input_index])]
+                          for input_index in inputs]
+                if x is None:  # XOR gate
+                    target = int(levels[0] != levels[1])
+                elif all(level == x for level in levels):
+                    target = y
+                else:
+                    target = 1 - y
+                old = int(signals[output])
+                new = update_signal[old][target]
+                if new != old:
+                    loop_steady = False
+                    signals[output] = new
+            if loop_steady:
+                break
+            changed = True
+            loop_state = tuple(int(signals[output])
+                               for output, inputs, x, y in loop)
+            if loop_state in loop_states:
+                break
+            loop_states.add(loop_state)
+        return not changed
+
+    def get_network_state(self):
+        """Return the signals and D-type memories as a hashable state, laid
+        out as network.Network.get_network_state does."""
+        return (self.signals[:self.low_index].tobytes() +
+                self.d_type_memory.tobytes())
+
+    def get_idle_cycles(self):
+        """Return the number of cycles before a clock, siggen or RC changes,
+        as network.Network.get_idle_cycles does, or None if none will."""
+        idle_cycles = []
+        for counter, limit in [(self.clock_counter, self.clock_half_period),
+                               (self.rc_counter, self.time_constant)]:
+            remaining = limit - counter
+            remaining = remaining[remaining >= 0]
+            if len(remaining):
+                idle_cycles.append(int(remaining.min()))
+        for number, output in enumerate(self.siggen_outputs.tolist()):
+            offset = int(self.siggen_offsets[number])
+            wave = self.siggen_waves[
+                offset:offset + int(self.siggen_lengths[number])].tolist()
+            siggen_idle_cycles = self.network.get_siggen_idle_cycles(
+                wave, int(self.siggen_counter[number]),
+                int(self.signals[output]))
+            if siggen_idle_cycles is not None:
+                idle_cycles.append(siggen_idle_cycles)
+        if not idle_cycles:
+            return None
+        return min(idle_cycles)
+
+    def skip_idle_cycles(self, cycles):
+        """Advance the clock, siggen and RC counters over idle cycles."""
+        self.clock_counter += cycles
+        self.rc_counter += cycles
+        if len(self.siggen_ids):
+            self.siggen_counter = (self.siggen_counter + cycles) % \
+                self.siggen_lengths
+
+    def execute_network(self):
+        """Execute all the devices in the network for one simulation cycle.
+
+        Return True if successful and the network does not oscillate.
+        """
+        if self.schedule is not self.network.schedule:
+            # Keep the state reached so far if the network has been changed
+            if self.signals is not None and \
+                    self.startup_count == self.devices.startup_count:
+                self.store_state()
+            self.compile_engine()
+            self.load_state()
+        elif self.startup_count != self.devices.startup_count:
+            self.load_state()
+        if not self.connected:
+            return False
+        signals = self.signals
+        devices = self.devices
+
+        switch_states = np.array([device.switch_state
+                                  for device in self.switch_devices],
+                                 dtype=np.int8)
+        self.update_sources()
+
+        self.network.oscillating_devices = []
+        states = {}  # states reached while settling
+        steady = False
+        iterations = 0
+        while iterations < self.network.iteration_limit:
+            iterations += 1
+            steady = True
+
+            old = signals[self.switch_outputs]
+            new = self.updated_signal[old, switch_states]
+            if (new != old).any():
+                steady = False
+                signals[self.switch_outputs] = new
+
+            if not self.execute_d_types():
+                steady = False
+
+            # Complete clock, siggen and RC transitions
+            old = signals[self.source_outputs]
+            new = self.settled_signal[old]
+            if (new != old).any():
+                steady = False
+                signals[self.source_outputs] = new
+
+            for gates, loops in self.levels:
+                if not self.execute_gates(gates):
+                    steady = False
+                for loop in loops:
+                    if not self.execute_loop(loop):
+                        steady = False
+            if steady:
+                break
+            if iterations > 2 and not self.network.record_state(
+                    states, self.get_network_state()):
+                break
+        if not steady and not self.network.oscillating_devices:
+            self.network.oscillating_devices = \
+                self.network.find_last_changing_devices(states)
+        self.network.settle_iterations = iterations
+        self.network.steady_state = steady
+        return steady